@@ -0,0 +1,789 @@
+# Benchmark das quatro versões do sistema bancário.
+#
+# Cada versão é carregada como módulo (o main() só roda sob __main__) e o seu
+# menu interativo é dirigido por um input() roteirizado, com print e
+# sys.stdout descartados: mede-se o mesmo caminho que o usuário percorre. Em
+# cada cenário o estado é montado antes da marca de início e só as operações
+# entre as marcas contam. Os cenários rodam para tamanhos crescentes e o
+# resultado vai para a tela (curvas de escala) e, com --json, para um
+# relatório que pode ser comparado com o de outro commit:
+#
+#   python benchmark-desafios.py [--tamanhos 500,1000,2000,4000] [--repeticoes 3]
+#       [--versoes v1,v2,v3,v4] [--cenarios cadastro,deposito,saque,extrato,listar]
+#       [--json relatorio.json] [--comparar anterior.json] [--tolerancia 0.25]
+#
+# Os cenários diretos (CENARIOS_DIRETOS) chamam as funções e classes de cada
+# versão sem passar pelo menu, para medir o que o menu não alcança: lotes,
+# diário, memória por item. Um cenário direto pode ter variantes (v4-compacto,
+# v4-numpy...), que aparecem como colunas próprias nas curvas.
+#
+# Com --comparar, o processo termina com código 1 se algum cenário ficou mais
+# lento que o do relatório anterior além da tolerância.
+
+import builtins
+import gc
+import importlib.util
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from decimal import Decimal
+from itertools import chain
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+TAMANHOS = (500, 1000, 2000, 4000)
+REPETICOES = 3
+TOLERANCIA = 0.25
+# Extratos e listagens medidos em cada rodada dos cenários de consulta
+CONSULTAS = 20
+# Chamadas medidas nos cenários diretos de custo por consulta
+CHAMADAS = 10_000
+# Contas que dividem os lançamentos dos cenários diretos de lote
+CONTAS_LOTE = 100
+# Partições do MotorParticionado comparadas com o processo único; o ganho
+# depende de haver núcleos livres para elas
+PARTICOES = (1, 2, 4)
+# Threads do cenário de concorrência, sobre o mesmo lote em cada contagem
+TRABALHADORES = (1, 2, 4, 8)
+# Cenários em que a vazão (transações por segundo) é a medida de interesse
+CENARIOS_VAZAO = ("concorrencia", "particionado")
+# Os limites diários derrubariam quase todas as operações depois das
+# primeiras; o benchmark mede o caminho das operações concluídas
+LIMITE_SEM_TRAVA = 10**9
+VARIAVEIS_AMBIENTE = ("BANCO_XYZ_DADOS", "BANCO_XYZ_AUDITORIA", "BANCO_XYZ_METRICAS", "BANCO_XYZ_HISTORICO", "BANCO_XYZ_CACHE_TZ")
+MARCA = object()
+
+class RoteiroEsgotado(BaseException):
+    # BaseException: as versões capturam Exception no laço do menu
+    pass
+
+def cpf(cliente):
+    return str(10_000_000_000 + cliente)
+
+# Entradas do menu de cada versão para cada operação; a conta do cliente n
+# (contado a partir de 0) é a de número n + 1
+def cadastro_v2(cliente):
+    return ["NU", cpf(cliente), f"Cliente {cliente}", "01-01-2000", "Rua A, 1"]
+
+def cadastro_v3(cliente):
+    return ["NU", cpf(cliente), f"Cliente {cliente}", "01/01/2000", "Rua A, 1"]
+
+ROTEIROS = {
+    "v1": {
+        "deposito": lambda cliente, valor: ["D", valor],
+        "saque": lambda cliente, valor: ["S", valor],
+        "extrato": lambda cliente: ["E"],
+    },
+    "v2": {
+        "cliente": cadastro_v2,
+        "conta": lambda cliente: ["NC", cpf(cliente)],
+        "deposito": lambda cliente, valor: ["D", valor],
+        "saque": lambda cliente, valor: ["S", valor],
+        "extrato": lambda cliente: ["E"],
+        "listar": lambda: ["LC"],
+    },
+    "v3": {
+        "cliente": cadastro_v3,
+        "conta": lambda cliente: ["NC", cpf(cliente)],
+        "deposito": lambda cliente, valor: ["D", cpf(cliente), str(cliente + 1), valor],
+        "saque": lambda cliente, valor: ["S", cpf(cliente), str(cliente + 1), valor],
+        "extrato": lambda cliente: ["E", cpf(cliente), str(cliente + 1)],
+        "listar": lambda: ["LC"],
+    },
+    "v4": {
+        "cliente": cadastro_v3,
+        "conta": lambda cliente: ["NC", cpf(cliente)],
+        "deposito": lambda cliente, valor: ["D", cpf(cliente), valor],
+        "saque": lambda cliente, valor: ["S", cpf(cliente), valor],
+        "extrato": lambda cliente: ["E", cpf(cliente)],
+        "listar": lambda: ["LC"],
+    },
+}
+
+def liberar_v1_v2(modulo):
+    modulo.LIMITE_SAQUES = LIMITE_SEM_TRAVA
+
+def liberar_v3(modulo):
+    modulo.ContaCorrente.__init__.__defaults__ = (500, LIMITE_SEM_TRAVA)
+
+def liberar_v4(modulo):
+    modulo.Historico.LIMITE_DIARIO = LIMITE_SEM_TRAVA
+
+VERSOES = {
+    "v1": ("desafio-01.py", liberar_v1_v2),
+    "v2": ("desafio-02-Estrutura-de-dados.py", liberar_v1_v2),
+    "v3": ("desafio-03-POO.py", liberar_v3),
+    "v4": ("desafios-04-05-decorador-iterador-gerador-datas-timezones.py", liberar_v4),
+}
+
+# Cenários: (operações exigidas, função que devolve preparo, medidas e o
+# número de operações medidas)
+def abrir_contas(roteiro, quantidade):
+    return list(chain.from_iterable(roteiro["cliente"](n) + roteiro["conta"](n) for n in range(quantidade)))
+
+def conta_inicial(roteiro):
+    return abrir_contas(roteiro, 1) if "cliente" in roteiro else []
+
+def cenario_cadastro(roteiro, tamanho):
+    return [], abrir_contas(roteiro, tamanho), 2 * tamanho
+
+def cenario_deposito(roteiro, tamanho):
+    medidas = list(chain.from_iterable(roteiro["deposito"](0, "10.00") for _ in range(tamanho)))
+    return conta_inicial(roteiro), medidas, tamanho
+
+def cenario_saque(roteiro, tamanho):
+    preparo = conta_inicial(roteiro) + roteiro["deposito"](0, f"{tamanho}.00")
+    medidas = list(chain.from_iterable(roteiro["saque"](0, "1.00") for _ in range(tamanho)))
+    return preparo, medidas, tamanho
+
+def cenario_extrato(roteiro, tamanho):
+    # O custo por extrato em função do tamanho do histórico
+    preparo = conta_inicial(roteiro) + list(chain.from_iterable(roteiro["deposito"](0, "10.00") for _ in range(tamanho)))
+    medidas = list(chain.from_iterable(roteiro["extrato"](0) for _ in range(CONSULTAS)))
+    return preparo, medidas, CONSULTAS
+
+def cenario_listar(roteiro, tamanho):
+    # O custo por listagem em função do número de contas
+    medidas = list(chain.from_iterable(roteiro["listar"]() for _ in range(CONSULTAS)))
+    return abrir_contas(roteiro, tamanho), medidas, CONSULTAS
+
+CENARIOS = {
+    "cadastro": (("cliente", "conta"), cenario_cadastro),
+    "deposito": (("deposito",), cenario_deposito),
+    "saque": (("deposito", "saque"), cenario_saque),
+    "extrato": (("deposito", "extrato"), cenario_extrato),
+    "listar": (("cliente", "conta", "listar"), cenario_listar),
+}
+
+# Cenários diretos: cada um recebe a versão e o tamanho e devolve uma Medida
+# por variante, sempre na mesma ordem
+Medida = namedtuple("Medida", "variante segundos operacoes bytes_por_item", defaults=(None,))
+
+def bytes_retidos(funcao):
+    # Memória que continua alocada depois de funcao(), pelo tracemalloc; o
+    # resultado é devolvido para continuar vivo até a medida
+    gc.collect()
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.get_traced_memory()[0]
+        resultado = funcao()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - antes, resultado
+    finally:
+        tracemalloc.stop()
+
+def preparar_v4(banco, silencioso=True):
+    if silencioso:
+        banco.configurar_apresentador(banco.ApresentadorSilencioso())
+    # A primeira leitura do dia carrega as transições do fuso (~20 ms), o que
+    # distorceria os tamanhos pequenos
+    banco.RELOGIO.dia()
+
+def conta_v4(banco, numero=1):
+    cliente = banco.PessoaFisica(f"Cliente {numero}", "01/01/2000", cpf(numero), "Rua A, 1")
+    conta = banco.ContaCorrente.nova_conta(cliente, numero)
+    cliente.adicionar_conta(conta)
+    return conta
+
+def abrir_contas_v4(banco, quantidade, clientes=None):
+    clientes = banco.ClienteRegistry() if clientes is None else clientes
+    for numero in range(1, quantidade + 1):
+        cliente = banco.PessoaFisica(f"Cliente {numero}", "01/01/2000", cpf(numero), "Rua A, 1")
+        clientes.adicionar(cliente)
+        conta = banco.ContaCorrente.nova_conta(cliente, numero)
+        cliente.adicionar_conta(conta)
+        clientes.adicionar_conta(conta)
+    return clientes
+
+def lote_depositos(banco, tamanho):
+    deposito = banco.Deposito.de_centavos(100)
+    return [((banco.AGENCIA, 1 + n % CONTAS_LOTE), deposito) for n in range(tamanho)]
+
+def direto_limite_diario(versao, tamanho):
+    # Conferência do limite com tamanho transações no histórico: o custo por
+    # chamada não deve crescer com o histórico
+    with isolado(versao) as banco:
+        cliente = banco.PessoaFisica("Cliente 0", "01/01/2000", cpf(0), "Rua A, 1")
+        conta = banco.ContaCorrente.nova_conta(cliente, 1)
+        if versao == "v3":
+            for _ in range(tamanho):
+                banco.Deposito(1).registrar(conta)
+                banco.Saque(1).registrar(conta)
+            contar = conta.historico.contar
+            inicio = time.perf_counter()
+            for _ in range(CHAMADAS):
+                contar("Saque")
+        else:
+            preparar_v4(banco)
+            for _ in range(tamanho):
+                banco.Deposito(1).registrar(conta)
+            excedeu = banco.excedeu_limite_transacoes
+            inicio = time.perf_counter()
+            for _ in range(CHAMADAS):
+                excedeu(conta)
+        return [Medida(versao, time.perf_counter() - inicio, CHAMADAS)]
+
+def direto_busca_cliente(versao, tamanho):
+    # Busca por CPF entre tamanho clientes, como no NU, NC, D, S e E do menu
+    with isolado(versao) as banco:
+        cpfs = [cpf(n) for n in range(tamanho)]
+        if versao == "v2":
+            clientes = {c: banco.Usuario(f"Cliente {c}", "01-01-2000", c, "Rua A, 1") for c in cpfs}
+            buscar = banco.filtrar_usuario
+        else:
+            clientes = banco.ClienteRegistry()
+            for c in cpfs:
+                clientes.adicionar(banco.PessoaFisica(f"Cliente {c}", "01/01/2000", c, "Rua A, 1"))
+            buscar = banco.filtrar_cliente
+        buscas = [cpfs[(n * 7919) % tamanho] for n in range(CHAMADAS)]
+        inicio = time.perf_counter()
+        for c in buscas:
+            buscar(c, clientes)
+        return [Medida(versao, time.perf_counter() - inicio, CHAMADAS)]
+
+def direto_memoria_historico(versao, tamanho):
+    # Depósitos no histórico de objetos e no compacto (colunas em array):
+    # tempo por lançamento e bytes retidos por transação
+    medidas = []
+    for variante, classe in (("v4", "Historico"), ("v4-compacto", "HistoricoCompacto")):
+        with isolado(versao) as banco:
+            preparar_v4(banco)
+            banco.configurar_historico(getattr(banco, classe))
+            conta = conta_v4(banco)
+            deposito = banco.Deposito(1)
+            inicio = time.perf_counter()
+            for _ in range(tamanho):
+                deposito.registrar(conta)
+            segundos = time.perf_counter() - inicio
+
+            outra = conta_v4(banco, 2)
+
+            def lancar():
+                for _ in range(tamanho):
+                    deposito.registrar(outra)
+
+            retidos, _ = bytes_retidos(lancar)
+            medidas.append(Medida(variante, segundos, tamanho, retidos / tamanho))
+    return medidas
+
+def direto_registrar(versao, tamanho):
+    # Deposito/Saque.registrar direto na conta, só com aritmética de centavos;
+    # os valores são convertidos de Decimal antes da marca
+    with isolado(versao) as banco:
+        if versao == "v4":
+            preparar_v4(banco)
+            conta = conta_v4(banco)
+        else:
+            cliente = banco.PessoaFisica("Cliente 0", "01/01/2000", cpf(0), "Rua A, 1")
+            conta = banco.ContaCorrente.nova_conta(cliente, 1)
+        deposito, saque = banco.Deposito(Decimal("0.10")), banco.Saque(Decimal("0.10"))
+        inicio = time.perf_counter()
+        for _ in range(tamanho):
+            deposito.registrar(conta)
+            saque.registrar(conta)
+        return [Medida(versao, time.perf_counter() - inicio, 2 * tamanho)]
+
+def direto_apresentador(versao, tamanho):
+    # Depósitos sem apresentação (ApresentadorSilencioso) e com as molduras
+    # impressas de fato, no os.devnull
+    medidas = []
+    for variante, silencioso in (("v4-silencioso", True), ("v4-moldura", False)):
+        with isolado(versao, imprimir=not silencioso) as banco:
+            preparar_v4(banco, silencioso)
+            conta = conta_v4(banco)
+            deposito = banco.Deposito(1)
+            inicio = time.perf_counter()
+            for _ in range(tamanho):
+                deposito.registrar(conta)
+            medidas.append(Medida(variante, time.perf_counter() - inicio, tamanho))
+    return medidas
+
+def direto_diario(versao, tamanho):
+    # aplicar_lote sem e com o diário (histórico compacto), e a recuperação
+    # do estado a partir do diário gravado; no diário, bytes_por_item é o
+    # tamanho em disco por transação, cadastro das contas incluído
+    medidas = []
+    for variante in ("v4", "v4-diario"):
+        with isolado(versao) as banco, tempfile.TemporaryDirectory() as diretorio:
+            preparar_v4(banco)
+            banco.configurar_historico(banco.HistoricoCompacto)
+            clientes = None
+            if variante == "v4-diario":
+                clientes, _ = banco.recuperar_estado(diretorio)
+                banco.configurar_diario(banco.Diario(diretorio, clientes))
+            clientes = abrir_contas_v4(banco, CONTAS_LOTE, clientes)
+            itens = lote_depositos(banco, tamanho)
+            inicio = time.perf_counter()
+            banco.aplicar_lote(clientes, itens)
+            banco.configurar_diario(None)
+            segundos = time.perf_counter() - inicio
+            if variante == "v4":
+                medidas.append(Medida(variante, segundos, tamanho))
+                continue
+            em_disco = sum(os.path.getsize(os.path.join(diretorio, nome)) for nome in os.listdir(diretorio))
+            medidas.append(Medida(variante, segundos, tamanho, em_disco / tamanho))
+            inicio = time.perf_counter()
+            banco.recuperar_estado(diretorio)
+            medidas.append(Medida("v4-recuperar", time.perf_counter() - inicio, tamanho))
+    return medidas
+
+def direto_auditoria(versao, tamanho):
+    # Custo no chamador de uma operação vazia decorada com log_transacao, sem
+    # e com a AuditoriaAssincrona; a gravação fica na thread da auditoria e
+    # a descarga final não entra na medida
+    medidas = []
+    for variante in ("v4", "v4-auditoria"):
+        with isolado(versao) as banco, tempfile.TemporaryDirectory() as diretorio:
+            preparar_v4(banco)
+            if variante == "v4-auditoria":
+                banco.configurar_auditoria(banco.AuditoriaAssincrona(os.path.join(diretorio, "auditoria.jsonl")))
+            operacao = banco.log_transacao(lambda: None)
+            inicio = time.perf_counter()
+            for _ in range(tamanho):
+                operacao()
+            medidas.append(Medida(variante, time.perf_counter() - inicio, tamanho))
+            banco.configurar_auditoria(None)
+    return medidas
+
+def direto_listar_contas(versao, tamanho):
+    # ContasView sobre tamanho contas: ordenação por saldo e por titular,
+    # busca de páginas no meio da visão ordenada e a listagem completa
+    # impressa no os.devnull, com o pico de memória por conta
+    with isolado(versao, imprimir=True) as banco:
+        preparar_v4(banco)
+        contas = []
+        for numero in range(1, tamanho + 1):
+            conta = conta_v4(banco, numero)
+            conta._saldo = (numero * 7919) % 1_000_000
+            contas.append(conta)
+        visao = banco.ContasView(contas)
+        medidas = []
+        for chave in ("saldo", "titular"):
+            inicio = time.perf_counter()
+            ordenada = visao.ordenar(chave)
+            medidas.append(Medida(f"v4-{chave}", time.perf_counter() - inicio, tamanho))
+
+        meio = len(ordenada) // 2
+        inicio = time.perf_counter()
+        for _ in range(CONSULTAS):
+            pagina, _ = ordenada.pagina(meio)
+            list(pagina.linhas())
+        medidas.append(Medida("v4-pagina", time.perf_counter() - inicio, CONSULTAS))
+
+        inicio = time.perf_counter()
+        banco.listar_contas(contas)
+        segundos = time.perf_counter() - inicio
+        gc.collect()
+        tracemalloc.start()
+        try:
+            banco.listar_contas(contas)
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        medidas.append(Medida("v4-listar", segundos, tamanho, pico / tamanho))
+        return medidas
+
+def direto_concorrencia(versao, tamanho):
+    # O mesmo lote de tamanho depósitos e saques (aplicar_lote_concorrente) e
+    # de tamanho transferências (transferir, repartidas entre as threads) com
+    # cada número de TRABALHADORES; contas novas a cada contagem
+    from concurrent.futures import ThreadPoolExecutor
+    with isolado(versao) as banco:
+        preparar_v4(banco)
+        deposito, saque = banco.Deposito.de_centavos(200), banco.Saque.de_centavos(100)
+        itens = [((banco.AGENCIA, 1 + n % CONTAS_LOTE), saque if n % 2 else deposito) for n in range(tamanho)]
+        pares = [(1 + n % CONTAS_LOTE, 1 + (n * 37 + 1) % CONTAS_LOTE) for n in range(tamanho)]
+        medidas = []
+        for trabalhadores in TRABALHADORES:
+            clientes = abrir_contas_v4(banco, CONTAS_LOTE)
+            inicio = time.perf_counter()
+            banco.aplicar_lote_concorrente(
+                clientes, itens, trabalhadores=trabalhadores, tamanho_bloco=max(64, tamanho // (4 * trabalhadores)),
+            )
+            medidas.append(Medida(f"v4-lote-{trabalhadores}t", time.perf_counter() - inicio, tamanho))
+
+        for trabalhadores in TRABALHADORES:
+            clientes = abrir_contas_v4(banco, CONTAS_LOTE)
+            contas = {conta.numero: conta for conta in clientes.contas}
+            for conta in contas.values():
+                conta._saldo = 100 * tamanho
+            transferencias = [(contas[origem], contas[destino]) for origem, destino in pares]
+
+            def transferir(fatia):
+                for origem, destino in fatia:
+                    banco.transferir(origem, destino, 1)
+
+            fatias = [transferencias[i::trabalhadores] for i in range(trabalhadores)]
+            with ThreadPoolExecutor(trabalhadores) as pool:
+                inicio = time.perf_counter()
+                list(pool.map(transferir, fatias))
+                segundos = time.perf_counter() - inicio
+            medidas.append(Medida(f"v4-transf-{trabalhadores}t", segundos, tamanho))
+        return medidas
+
+def direto_particionado(versao, tamanho):
+    # Depósitos e saques alternados por CPF: aplicar_lote num processo só e o
+    # MotorParticionado com cada número de PARTICOES; a criação dos processos
+    # e o cadastro ficam fora da medida
+    with isolado(versao) as banco:
+        preparar_v4(banco)
+        deposito, saque = banco.Deposito.de_centavos(200), banco.Saque.de_centavos(100)
+        itens = [(cpf(1 + n % CONTAS_LOTE), saque if n % 2 else deposito) for n in range(tamanho)]
+        clientes = abrir_contas_v4(banco, CONTAS_LOTE)
+        inicio = time.perf_counter()
+        banco.aplicar_lote(clientes, itens)
+        medidas = [Medida("v4-1proc", time.perf_counter() - inicio, tamanho)]
+
+        cadastro = [(f"Cliente {numero}", "01/01/2000", cpf(numero), "Rua A, 1") for numero in range(1, CONTAS_LOTE + 1)]
+        for particoes in PARTICOES:
+            motor = banco.MotorParticionado(particoes)
+            try:
+                motor.cadastrar(cadastro)
+                inicio = time.perf_counter()
+                motor.processar(itens)
+                medidas.append(Medida(f"v4-p{particoes}", time.perf_counter() - inicio, tamanho))
+            finally:
+                motor.fechar()
+        return medidas
+
+def direto_comandos(versao, tamanho):
+    # Modo --comandos da v1/v2: tamanho depósitos e saques alternados e um
+    # extrato no fim; com o extrato em lista, o custo por linha não cresce
+    # com o tamanho do extrato
+    linhas = ["D 10.00" if n % 2 else "S 1.00" for n in range(1, tamanho + 1)] + ["E"]
+    with isolado(versao) as banco:
+        inicio = time.perf_counter()
+        banco.executar_comandos(linhas)
+        return [Medida(versao, time.perf_counter() - inicio, len(linhas))]
+
+def direto_memoria_contas(versao, tamanho):
+    # tamanho clientes com uma conta cada, montados direto nas estruturas da
+    # versão: tempo e bytes retidos por cliente com a sua conta
+    with isolado(versao) as banco:
+        if versao == "v2":
+            def cadastrar():
+                usuarios, contas = {}, []
+                for numero in range(1, tamanho + 1):
+                    usuario = usuarios[cpf(numero)] = banco.Usuario(f"Cliente {numero}", "01-01-2000", cpf(numero), "Rua A, 1")
+                    contas.append(banco.Conta(banco.AGENCIA, numero, usuario))
+                return usuarios, contas
+        else:
+            def cadastrar():
+                clientes = banco.ClienteRegistry()
+                for numero in range(1, tamanho + 1):
+                    cliente = banco.PessoaFisica(f"Cliente {numero}", "01/01/2000", cpf(numero), "Rua A, 1")
+                    clientes.adicionar(cliente)
+                    conta = banco.ContaCorrente.nova_conta(cliente, numero)
+                    cliente.adicionar_conta(conta)
+                    clientes.adicionar_conta(conta)
+                return clientes
+
+        inicio = time.perf_counter()
+        cadastrar()
+        segundos = time.perf_counter() - inicio
+        retidos, _ = bytes_retidos(cadastrar)
+        return [Medida(versao, segundos, tamanho, retidos / tamanho)]
+
+def direto_fechamento(versao, tamanho):
+    # fechamento_mensal sobre tamanho contas com saldos variados, vetorizado
+    # com NumPy (se instalado) e em Python puro; custo por conta
+    variantes = [("v4-python", False)]
+    if importlib.util.find_spec("numpy") is not None:
+        # Importado antes da marca, como num processo que já fez um fechamento
+        importlib.import_module("numpy")
+        variantes.insert(0, ("v4-numpy", True))
+    medidas = []
+    for variante, usar_numpy in variantes:
+        with isolado(versao) as banco:
+            preparar_v4(banco)
+            clientes = abrir_contas_v4(banco, tamanho)
+            for conta in clientes.contas:
+                conta._saldo = (conta.numero * 7919) % 1_000_000
+            inicio = time.perf_counter()
+            banco.fechamento_mensal(clientes, usar_numpy=usar_numpy)
+            medidas.append(Medida(variante, time.perf_counter() - inicio, tamanho))
+    return medidas
+
+# Roda num interpretador novo, com só o que o Python carrega ao iniciar: a
+# carga do script inclui os imports dele (pytz, zoneinfo...) ainda frios
+CARGA_SCRIPT = """
+import importlib.util, sys, time
+inicio = time.perf_counter()
+spec = importlib.util.spec_from_file_location("banco", sys.argv[1])
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print(time.perf_counter() - inicio)
+"""
+
+def direto_importacao(versao, tamanho):
+    # Tempo de importação de cada versão num processo novo; o tamanho não
+    # entra, cada rodada é uma carga. Os .pyc vão para um cache temporário,
+    # preenchido por uma primeira carga descartada: mede-se a carga de uma
+    # instalação normal, sem a compilação do fonte
+    caminho = os.path.join(DIRETORIO, VERSOES[versao][0])
+    with tempfile.TemporaryDirectory() as cache:
+        ambiente = {nome: valor for nome, valor in os.environ.items()
+                    if nome not in VARIAVEIS_AMBIENTE and nome != "PYTHONDONTWRITEBYTECODE"}
+        ambiente["PYTHONPYCACHEPREFIX"] = cache
+        for _ in range(2):
+            saida = subprocess.run([sys.executable, "-c", CARGA_SCRIPT, caminho], capture_output=True, text=True, env=ambiente, check=True)
+    return [Medida(versao, float(saida.stdout.split()[-1]), 1)]
+
+CENARIOS_DIRETOS = {
+    "limite_diario": (("v3", "v4"), direto_limite_diario),
+    "busca_cliente": (("v2", "v3", "v4"), direto_busca_cliente),
+    "memoria_historico": (("v4",), direto_memoria_historico),
+    "registrar": (("v3", "v4"), direto_registrar),
+    "apresentador": (("v4",), direto_apresentador),
+    "diario": (("v4",), direto_diario),
+    "auditoria": (("v4",), direto_auditoria),
+    "listar_contas": (("v4",), direto_listar_contas),
+    "concorrencia": (("v4",), direto_concorrencia),
+    "particionado": (("v4",), direto_particionado),
+    "comandos": (("v1", "v2"), direto_comandos),
+    "memoria_contas": (("v2", "v3", "v4"), direto_memoria_contas),
+    "fechamento": (("v4",), direto_fechamento),
+    "importacao": (("v1", "v2", "v3", "v4"), direto_importacao),
+}
+
+def carregar(versao):
+    arquivo, liberar = VERSOES[versao]
+    nome = f"banco_{versao}"
+    spec = importlib.util.spec_from_file_location(nome, os.path.join(DIRETORIO, arquivo))
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nome] = modulo
+    spec.loader.exec_module(modulo)
+    liberar(modulo)
+    return modulo
+
+@contextmanager
+def isolado(versao, entrada=None, imprimir=False):
+    # Um módulo novo por rodada (a v1 guarda o estado em variáveis globais),
+    # com sys.stdout no os.devnull, print descartado (ou, com imprimir,
+    # escrevendo no os.devnull) e sem as variáveis de ambiente do banco
+    modulo = carregar(versao)
+    anteriores = builtins.input, builtins.print, sys.stdout, sys.argv
+    ambiente = {nome: os.environ.pop(nome) for nome in VARIAVEIS_AMBIENTE if nome in os.environ}
+    descarte = open(os.devnull, "w")
+    if entrada is not None:
+        builtins.input = entrada
+    if not imprimir:
+        builtins.print = lambda *args, **kwargs: None
+    sys.stdout = descarte
+    sys.argv = [VERSOES[versao][0]]
+    gc.collect()
+    try:
+        yield modulo
+    finally:
+        builtins.input, builtins.print, sys.stdout, sys.argv = anteriores
+        os.environ.update(ambiente)
+        descarte.close()
+        del sys.modules[f"banco_{versao}"]
+
+def medir(versao, preparo, medidas):
+    entradas = chain(preparo, [MARCA], medidas, [MARCA], ["Q"])
+    marcas = []
+
+    def entrada(mensagem=""):
+        for item in entradas:
+            if item is MARCA:
+                marcas.append(time.perf_counter())
+                continue
+            return item
+        raise RoteiroEsgotado(versao)
+
+    with isolado(versao, entrada) as modulo:
+        modulo.main()
+    if len(marcas) != 2:
+        raise RuntimeError(f"{versao}: o menu encerrou antes do fim do roteiro")
+    return marcas[1] - marcas[0]
+
+def expoente(pontos):
+    # Inclinação de log(µs por operação) x log(tamanho): perto de 0, custo
+    # constante por operação; perto de 1, o custo cresce com os dados
+    if len(pontos) < 2:
+        return None
+    xs = [math.log(tamanho) for tamanho, _ in pontos]
+    ys = [math.log(max(custo, 1e-9)) for _, custo in pontos]
+    media_x = sum(xs) / len(xs)
+    media_y = sum(ys) / len(ys)
+    variancia = sum((x - media_x) ** 2 for x in xs)
+    if not variancia:
+        return None
+    return round(sum((x - media_x) * (y - media_y) for x, y in zip(xs, ys)) / variancia, 3)
+
+def anotar(resultados, versao, cenario, tamanho, operacoes, segundos, bytes_por_item=None):
+    resultado = {
+        "versao": versao,
+        "cenario": cenario,
+        "tamanho": tamanho,
+        "operacoes": operacoes,
+        "segundos": round(segundos, 6),
+        "us_por_operacao": round(segundos / operacoes * 1e6, 3),
+        "tx_por_segundo": round(operacoes / segundos) if segundos else None,
+    }
+    memoria = ""
+    if bytes_por_item is not None:
+        resultado["bytes_por_item"] = round(bytes_por_item, 1)
+        memoria = f" {bytes_por_item:>10,.1f} B/item"
+    resultados.append(resultado)
+    sys.stderr.write(f"{cenario:<17} {versao} {tamanho:>7}: {resultado['us_por_operacao']:>12,.1f} µs/op{memoria}\n")
+
+def executar_benchmark(versoes, cenarios, tamanhos, repeticoes):
+    resultados = []
+    for cenario in cenarios:
+        if cenario in CENARIOS_DIRETOS:
+            executar_direto(resultados, versoes, cenario, tamanhos, repeticoes)
+            continue
+        exigidas, montar = CENARIOS[cenario]
+        for versao in versoes:
+            roteiro = ROTEIROS[versao]
+            if not all(operacao in roteiro for operacao in exigidas):
+                continue
+            for tamanho in tamanhos:
+                preparo, medidas, operacoes = montar(roteiro, tamanho)
+                segundos = min(medir(versao, preparo, medidas) for _ in range(repeticoes))
+                anotar(resultados, versao, cenario, tamanho, operacoes, segundos)
+    return resultados
+
+def executar_direto(resultados, versoes, cenario, tamanhos, repeticoes):
+    suportadas, medir_direto = CENARIOS_DIRETOS[cenario]
+    for versao in versoes:
+        if versao not in suportadas:
+            continue
+        for tamanho in tamanhos:
+            rodadas = [medir_direto(versao, tamanho) for _ in range(repeticoes)]
+            # A melhor rodada de cada variante
+            for medidas in zip(*rodadas):
+                melhor = min(medidas, key=lambda medida: medida.segundos)
+                anotar(resultados, melhor.variante, cenario, tamanho, melhor.operacoes, melhor.segundos, melhor.bytes_por_item)
+
+def calcular_expoentes(resultados):
+    curvas = {}
+    for r in resultados:
+        curvas.setdefault(f"{r['versao']}/{r['cenario']}", []).append((r["tamanho"], r["us_por_operacao"]))
+    return {chave: expoente(pontos) for chave, pontos in curvas.items()}
+
+def commit_atual():
+    try:
+        saida = subprocess.run(["git", "rev-parse", "HEAD"], cwd=DIRETORIO, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return saida.stdout.strip() or None
+
+def montar_relatorio(resultados, tamanhos, repeticoes):
+    return {
+        "formato": 1,
+        "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "tamanhos": list(tamanhos),
+        "repeticoes": repeticoes,
+        "resultados": resultados,
+        "expoentes": calcular_expoentes(resultados),
+    }
+
+def mostrar_curvas(relatorio):
+    resultados = relatorio["resultados"]
+    for cenario in chain(CENARIOS, CENARIOS_DIRETOS):
+        linhas = [r for r in resultados if r["cenario"] == cenario]
+        if not linhas:
+            continue
+        # Versões e variantes na ordem em que foram medidas
+        versoes = list(dict.fromkeys(r["versao"] for r in linhas))
+        custos = {(r["versao"], r["tamanho"]): r["us_por_operacao"] for r in linhas}
+        print(f"\n{cenario} (µs por operação)")
+        print(f"{'tamanho':>10}" + "".join(f"{v:>14}" for v in versoes))
+        for tamanho in relatorio["tamanhos"]:
+            print(f"{tamanho:>10}" + "".join(f"{custos.get((v, tamanho), float('nan')):>14,.1f}" for v in versoes))
+        expoentes = [relatorio["expoentes"].get(f"{v}/{cenario}") for v in versoes]
+        print(f"{'expoente':>10}" + "".join(f"{e:>14.2f}" if e is not None else f"{'-':>14}" for e in expoentes))
+        if cenario in CENARIOS_VAZAO:
+            vazao = {(r["versao"], r["tamanho"]): r.get("tx_por_segundo") or float("nan") for r in linhas}
+            print(f"\n{cenario} (transações por segundo)")
+            print(f"{'tamanho':>10}" + "".join(f"{v:>14}" for v in versoes))
+            for tamanho in relatorio["tamanhos"]:
+                print(f"{tamanho:>10}" + "".join(f"{vazao.get((v, tamanho), float('nan')):>14,.0f}" for v in versoes))
+        memoria = {(r["versao"], r["tamanho"]): r["bytes_por_item"] for r in linhas if "bytes_por_item" in r}
+        if memoria:
+            print(f"\n{cenario} (bytes por item)")
+            print(f"{'tamanho':>10}" + "".join(f"{v:>14}" for v in versoes))
+            for tamanho in relatorio["tamanhos"]:
+                print(f"{tamanho:>10}" + "".join(f"{memoria.get((v, tamanho), float('nan')):>14,.1f}" for v in versoes))
+
+def comparar(relatorio, anterior, tolerancia):
+    # Regressões: cenários mais lentos que no relatório anterior além da
+    # tolerância (0.25 = 25% mais µs por operação)
+    base = {(r["versao"], r["cenario"], r["tamanho"]): r["us_por_operacao"] for r in anterior["resultados"]}
+    regressoes = []
+    print(f"\nComparação com {anterior.get('commit') or 'relatório anterior'} (tolerância {tolerancia:.0%})")
+    for r in relatorio["resultados"]:
+        antes = base.get((r["versao"], r["cenario"], r["tamanho"]))
+        if not antes:
+            continue
+        variacao = r["us_por_operacao"] / antes - 1
+        marca = ""
+        if variacao > tolerancia:
+            regressoes.append(r)
+            marca = "  << REGRESSÃO"
+        print(f"{r['cenario']:<17} {r['versao']} {r['tamanho']:>7}: {antes:>12,.1f} -> {r['us_por_operacao']:>12,.1f} µs/op ({variacao:+.0%}){marca}")
+    return regressoes
+
+def opcao_linha_comando(argumentos, nome, padrao=None):
+    # Valor que segue a opção nome na linha de comando
+    if nome in argumentos:
+        posicao = argumentos.index(nome)
+        if posicao + 1 < len(argumentos):
+            return argumentos[posicao + 1]
+    return padrao
+
+def lista_opcao(argumentos, nome, padrao, validos=None):
+    texto = opcao_linha_comando(argumentos, nome)
+    if texto is None:
+        return list(padrao)
+    itens = [item.strip() for item in texto.split(",") if item.strip()]
+    if validos is not None:
+        desconhecidos = [item for item in itens if item not in validos]
+        if desconhecidos:
+            raise SystemExit(f"{nome}: desconhecido(s): {', '.join(desconhecidos)}; válidos: {', '.join(validos)}")
+    return itens
+
+def main():
+    argumentos = sys.argv[1:]
+    tamanhos = [int(tamanho) for tamanho in lista_opcao(argumentos, "--tamanhos", map(str, TAMANHOS))]
+    versoes = lista_opcao(argumentos, "--versoes", VERSOES, VERSOES)
+    todos = list(chain(CENARIOS, CENARIOS_DIRETOS))
+    cenarios = lista_opcao(argumentos, "--cenarios", todos, todos)
+    repeticoes = int(opcao_linha_comando(argumentos, "--repeticoes", REPETICOES))
+    tolerancia = float(opcao_linha_comando(argumentos, "--tolerancia", TOLERANCIA))
+
+    resultados = executar_benchmark(versoes, cenarios, sorted(tamanhos), repeticoes)
+    relatorio = montar_relatorio(resultados, sorted(tamanhos), repeticoes)
+    mostrar_curvas(relatorio)
+
+    caminho_json = opcao_linha_comando(argumentos, "--json")
+    if caminho_json:
+        with open(caminho_json, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False, sort_keys=True)
+            arquivo.write("\n")
+        print(f"\nRelatório gravado em {caminho_json}")
+
+    caminho_anterior = opcao_linha_comando(argumentos, "--comparar")
+    if caminho_anterior:
+        with open(caminho_anterior, encoding="utf-8") as arquivo:
+            anterior = json.load(arquivo)
+        regressoes = comparar(relatorio, anterior, tolerancia)
+        if regressoes:
+            print(f"\n{len(regressoes)} regressão(ões) acima da tolerância")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,29 @@
 # Criar um sistema bancário com as operalções: sacar, depositaar e visualizar extratp.
 
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# Valores monetários são mantidos em centavos inteiros
+def para_centavos(texto):
+    # Converte o valor digitado em centavos inteiros, sem passar por float
+    try:
+        valor = Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {texto!r}")
+    if not valor.is_finite():
+        raise ValueError(f"Valor inválido: {texto!r}")
+    try:
+        return int(valor.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP).scaleb(2))
+    except InvalidOperation:
+        # Valores grandes demais para a precisão do Decimal (ex.: 1e30)
+        raise ValueError(f"Valor inválido: {texto!r}")
+
+def para_reais(centavos):
+    return Decimal(centavos).scaleb(-2)
+
 # Menu estatico 
 menu = """
 =======================================================
@@ -18,73 +42,126 @@ Selecione a opção desejada: """
 # Declaração de variáveis com valores iniciais ou fixos.
 saldo = 0
 limite = 500
-extrato = ""
+# Extrato: lista de lançamentos (tipo, centavos), só acrescentada; o texto é
+# montado apenas quando o extrato é exibido
+extrato = []
 numero_saques = 0
 LIMITE_SAQUES = 3
 
-while True:
-    try:
-        opcao = input(menu).upper() #Colocado .upper() para caso o usuário digitar em minusculo converte para maiusculo para não dar erro no sistema.
-
-        if opcao == "D":
-            valor = float(input("\nInforme o valor do depósito: R$ "))
-
-            if valor > 0:
-                print("\nOperação realizada com sucesso!")
-                saldo += valor
-                extrato += f"Depósito: R$ {valor:.2f}\n"
-
+# Operações; devolvem se foram concluídas e a mensagem para o usuário
+def depositar(valor):
+    global saldo
+    if valor > 0:
+        saldo += valor
+        extrato.append(("Depósito", valor))
+        return True, "\nOperação realizada com sucesso!"
+    return False, "Operação não concluída! O valor informado é inválido."
+
+def sacar(valor):
+    global saldo, numero_saques
+    if valor > saldo:
+        return False, "\nOperação não concluída! Você não possui saldo suficiente."
+    if valor > limite * 100:
+        return False, "\nOperação não concluída! O valor do saque excede o limite."
+    if numero_saques >= LIMITE_SAQUES:
+        return False, "\nOperação não concluída! Número máximo de saques excedido."
+    if valor > 0:
+        saldo -= valor
+        extrato.append(("Saque", valor))
+        numero_saques += 1
+        return True, "\n Opração realizada com sucesso, retire seu dinheiro!"
+    return False, "Operação não concluída! O valor informado é inválido."
+
+def exibir_extrato():
+    print("\n================ EXTRATO ================")
+    print("Não foram realizadas movimentações." if not extrato else "".join(f"{tipo}: R$ {para_reais(valor):.2f}\n" for tipo, valor in extrato))
+    print(f"\nSaldo: R$ {para_reais(saldo):.2f}")
+    print("==========================================")
+
+# Modo não interativo: "--comandos <arquivo>" (ou "-" para a entrada padrão)
+# executa um comando por linha com as mesmas operações do menu, sem o menu, e
+# mostra um resumo no fim; as mensagens das operações vão para o os.devnull:
+#   D [cpf] <valor> | S [cpf] <valor> | E [cpf] | Q (encerra a leitura)
+# A v1 tem um único saldo, então o CPF é aceito e ignorado. Linhas vazias e
+# iniciadas por # são ignoradas
+def executar_comandos(linhas):
+    sucesso = falhas = erros = 0
+    inicio = time.perf_counter()
+    for numero, linha in enumerate(linhas, 1):
+        partes = linha.split()
+        if not partes or partes[0].startswith("#"):
+            continue
+        opcao = partes[0].upper()
+        if opcao == "Q":
+            break
+        try:
+            if opcao in ("D", "S") and len(partes) in (2, 3):
+                operacao = depositar if opcao == "D" else sacar
+                concluida, _ = operacao(para_centavos(partes[-1]))
+            elif opcao == "E" and len(partes) <= 2:
+                exibir_extrato()
+                concluida = True
             else:
-                print("Operação não concluída! O valor informado é inválido.")
-
-        elif opcao == "S":
-            print("\nAvisos Legais:")
-            print(f"O Valor máximo permitido por saque é de R$ {limite}.")
-            print(f"A quantidade máxima diária permitida é de {LIMITE_SAQUES} saques!")
-            print(f"Você já efetuou {numero_saques} hoje.")
+                raise ValueError(f"Comando inválido: {linha.strip()!r}")
+        except ValueError as erro:
+            erros += 1
+            sys.stderr.write(f"linha {numero}: {erro}\n")
+            continue
+        if concluida:
+            sucesso += 1
+        else:
+            falhas += 1
+    return sucesso, falhas, erros, time.perf_counter() - inicio
+
+def main():
+    if len(sys.argv) >= 3 and sys.argv[1] == "--comandos":
+        with open(os.devnull, "w") as descarte, redirect_stdout(descarte):
+            if sys.argv[2] == "-":
+                sucesso, falhas, erros, segundos = executar_comandos(sys.stdin)
+            else:
+                with open(sys.argv[2], encoding="utf-8") as arquivo:
+                    sucesso, falhas, erros, segundos = executar_comandos(arquivo)
+        total = sucesso + falhas + erros
+        print("\n================ RESUMO ================")
+        print(f"Comandos: {total}")
+        print(f"Sucesso: {sucesso} | Falhas: {falhas} | Erros: {erros}")
+        print(f"Tempo: {segundos:.3f} s | Vazão: {total / segundos if segundos else 0:,.0f} comandos/s")
+        print("========================================")
+        return
+
+    while True:
+        try:
+            opcao = input(menu).upper() #Colocado .upper() para caso o usuário digitar em minusculo converte para maiusculo para não dar erro no sistema.
+
+            if opcao == "D":
+                valor = para_centavos(input("\nInforme o valor do depósito: R$ "))
+                print(depositar(valor)[1])
+
+            elif opcao == "S":
+                print("\nAvisos Legais:")
+                print(f"O Valor máximo permitido por saque é de R$ {limite}.")
+                print(f"A quantidade máxima diária permitida é de {LIMITE_SAQUES} saques!")
+                print(f"Você já efetuou {numero_saques} hoje.")
         
-            valor = float(input("\nInforme o valor do saque: R$ "))
-
-            excedeu_saldo = valor > saldo
-
-            excedeu_limite = valor > limite
-
-            excedeu_saques = numero_saques >= LIMITE_SAQUES
-
-            if excedeu_saldo:
-                print("\nOperação não concluída! Você não possui saldo suficiente.")
+                valor = para_centavos(input("\nInforme o valor do saque: R$ "))
+                print(sacar(valor)[1])
 
-            elif excedeu_limite:
-                print("\nOperação não concluída! O valor do saque excede o limite.")
+            elif opcao == "E":
+                exibir_extrato()
 
-            elif excedeu_saques:
-                print("\nOperação não concluída! Número máximo de saques excedido.")
-
-            elif valor > 0:
-                print("\n Opração realizada com sucesso, retire seu dinheiro!")
-                saldo -= valor
-                extrato += f"Saque: R$ {valor:.2f}\n"
-                numero_saques += 1
+            elif opcao == "Q":
+                print("\n\nEncerrando o Sistema!")
+                print("\nObrigado por utilizar nossos serviços!\n\n\n")
+                break;
 
             else:
-                print("Operação não concluída! O valor informado é inválido.")
-
-        elif opcao == "E":
-            print("\n================ EXTRATO ================")
-            print("Não foram realizadas movimentações." if not extrato else extrato)
-            print(f"\nSaldo: R$ {saldo:.2f}")
-            print("==========================================")
-
-        elif opcao == "Q":
-            print("\n\nEncerrando o Sistema!")
-            print("\nObrigado por utilizar nossos serviços!\n\n\n")
-            break;
-
-        else:
-            print("\nOpção inválida, por favor selecione novamente a operação desejada.")
-    except ValueError:
-        print("\n\n######################################################################################################")
-        print("####                                                                                              ####")
-        print('#### Valor informado esta no formato incorreto, não utilize  " , " para valores! Tente novamente! ####')
-        print("####                                                                                              ####")
-        print("######################################################################################################\n\n")
+                print("\nOpção inválida, por favor selecione novamente a operação desejada.")
+        except ValueError:
+            print("\n\n######################################################################################################")
+            print("####                                                                                              ####")
+            print('#### Valor informado esta no formato incorreto, não utilize  " , " para valores! Tente novamente! ####')
+            print("####                                                                                              ####")
+            print("######################################################################################################\n\n")
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,81 @@
 #V1 - Criar um sistema bancário com as operações: sacar, depositar e visualizar extrato.
 # V2 - Adicionado operações: criar usuário, criar conta, listar contas.
 
+import os
+import shlex
+import sys
+import time
+from collections import namedtuple
+from contextlib import redirect_stdout
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+
+LIMITE_SAQUES = 3
+AGENCIA = "0001"
+LIMITE_SAQUE = 500_00
+
+# Usuários e contas são tuplas nomeadas (sem um dicionário por registro); o
+# acesso por chave, usuario["nome"] e conta["agencia"], continua valendo
+class AcessoPorChave:
+    __slots__ = ()
+
+    def __getitem__(self, chave):
+        if isinstance(chave, str):
+            return getattr(self, chave)
+        return tuple.__getitem__(self, chave)
+
+class Usuario(AcessoPorChave, namedtuple("Usuario", "nome data_nascimento cpf endereco")):
+    __slots__ = ()
+
+class Conta(AcessoPorChave, namedtuple("Conta", "agencia numero_conta usuario")):
+    __slots__ = ()
+
 # Funções
-def mostrar_moldura(texto, borda='=', largura=75):
-    print("\n")
-    print(borda * (largura + 8))
-    print(borda * 4 + " " * largura + borda * 4)
+def para_centavos(texto):
+    # Converte o valor digitado em centavos inteiros, sem passar por float
+    try:
+        valor = Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {texto!r}")
+    if not valor.is_finite():
+        raise ValueError(f"Valor inválido: {texto!r}")
+    try:
+        return int(valor.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP).scaleb(2))
+    except InvalidOperation:
+        # Valores grandes demais para a precisão do Decimal (ex.: 1e30)
+        raise ValueError(f"Valor inválido: {texto!r}")
+
+def para_reais(centavos):
+    return Decimal(centavos).scaleb(-2)
+
+# Bordas e linhas vazias são montadas uma única vez por (borda, largura)
+@lru_cache(maxsize=None)
+def partes_moldura(borda, largura):
+    lateral = borda * 4
+    return borda * (largura + 8), lateral + " " * largura + lateral, lateral
+
+def linha_moldura(texto, lateral, largura):
     espaco_esq = (largura - len(texto)) // 2
     espaco_dir = largura - len(texto) - espaco_esq
-    print(borda * 4 + " " * espaco_esq + texto + " " * espaco_dir + borda * 4)
-    print(borda * 4 + " " * largura + borda * 4)
-    print(borda * (largura + 8))
-    print("\n")
-
-def mostrar_moldura_multilinha(linhas, borda='@', largura=75):
-    print("\n" + borda * (largura + 8))
-    print(borda * 4 + " " * largura + borda * 4)
+    return f"{lateral}{' ' * espaco_esq}{texto}{' ' * espaco_dir}{lateral}"
+
+# Cada moldura é montada em um buffer e escrita com um único write
+def mostrar_moldura(texto, borda='=', largura=75):
+    cheia, vazia, lateral = partes_moldura(borda, largura)
+    sys.stdout.write(f"\n\n{cheia}\n{vazia}\n{linha_moldura(texto, lateral, largura)}\n{vazia}\n{cheia}\n\n\n")
+
+def mostrar_moldura_multilinha(linhas, borda='@', largura=75, tamanho_bloco=None):
+    # Com tamanho_bloco, as linhas são escritas em blocos à medida que são consumidas
+    cheia, vazia, lateral = partes_moldura(borda, largura)
+    escrever = sys.stdout.write
+    buffer = [f"\n{cheia}\n{vazia}\n"]
     for linha in linhas:
-        linha = linha.strip()
-        espaco_esq = (largura - len(linha)) // 2
-        espaco_dir = largura - len(linha) - espaco_esq
-        print(borda * 4 + " " * espaco_esq + linha + " " * espaco_dir + borda * 4)
-    print(borda * 4 + " " * largura + borda * 4)
-    print(borda * (largura + 8) + "\n")
+        buffer.append(linha_moldura(linha.strip(), lateral, largura) + "\n")
+        if tamanho_bloco and len(buffer) >= tamanho_bloco:
+            escrever("".join(buffer))
+            buffer.clear()
+    buffer.append(f"{vazia}\n{cheia}\n\n")
+    escrever("".join(buffer))
 
 def mostrar_aviso_legal(limite, limite_saques, numero_saques, largura=75):
     linhas = [
@@ -53,10 +106,12 @@ def menu():
     Selecione a opção desejada: """
     return input(menu)
 
+# O extrato é uma lista de lançamentos (tipo, centavos): depositar e sacar só
+# acrescentam a ela, e o extrato exibido é montado direto dos lançamentos
 def depositar(saldo, valor, extrato, /):
     if valor > 0:
         saldo += valor
-        extrato += f"Depósito:     R$ {valor:.2f}\n"
+        extrato.append(("Depósito", valor))
         mostrar_moldura("Depósito realizado com sucesso!", borda='*')
     else:
         mostrar_moldura("Operação falhou! O valor informado é inválido.", borda='#')
@@ -76,7 +131,7 @@ def sacar(*, saldo, valor, extrato, limite, numero_saques, limite_saques):
         mostrar_moldura("Operação não concluída! Número máximo de saques excedido.", borda='#')
     elif valor > 0:
         saldo -= valor
-        extrato += f"Saque:        R$ {valor:.2f}\n"
+        extrato.append(("Saque", valor))
         numero_saques += 1
         mostrar_moldura("Operação realizada com sucesso, retire seu dinheiro!", borda='*')
     else:
@@ -84,42 +139,19 @@ def sacar(*, saldo, valor, extrato, limite, numero_saques, limite_saques):
     return saldo, extrato, numero_saques
 
 def exibir_extrato(saldo, /, *, extrato):
-    conteudo = extrato if extrato else "Não foram realizadas movimentações!"
-    linhas = conteudo.strip().split("\n")
-
     largura = 75
     borda = "="
-    print("\n" + borda * (largura + 8))
-    print(borda * 4 + " " * largura + borda * 4)
+    cheia, vazia, lateral = partes_moldura(borda, largura)
+    buffer = [f"\n{cheia}\n{vazia}\n{linha_moldura('EXTRATO', lateral, largura)}\n{vazia}\n"]
 
-    titulo = "EXTRATO"
-    espaco_esq = (largura - len(titulo)) // 2
-    espaco_dir = largura - len(titulo) - espaco_esq
-    print(borda * 4 + " " * espaco_esq + titulo + " " * espaco_dir + borda * 4)
+    if not extrato:
+        buffer.append(linha_moldura("Não foram realizadas movimentações!", lateral, largura) + "\n")
+    for tipo, valor in extrato:
+        buffer.append(linha_moldura(f"{tipo:<12} R$ {para_reais(valor):>10.2f}", lateral, largura) + "\n")
 
-    print(borda * 4 + " " * largura + borda * 4)
-
-    for linha in linhas:
-        if ":" in linha:
-            tipo, valor = linha.split(":")
-            tipo = tipo.strip()
-            valor = valor.strip()
-            texto_formatado = f"{tipo:<12} R$ {float(valor.split('R$')[-1]):>10.2f}"
-        else:
-            texto_formatado = linha.strip()
-
-        espaco_esq = (largura - len(texto_formatado)) // 2
-        espaco_dir = largura - len(texto_formatado) - espaco_esq
-        print(borda * 4 + " " * espaco_esq + texto_formatado + " " * espaco_dir + borda * 4)
-
-    print(borda * 4 + " " * largura + borda * 4)
-
-    saldo_texto = f"Saldo: R$ {saldo:,.2f}"
-    linha_formatada = f"{saldo_texto:>{largura}}"
-    print(borda * 4 + linha_formatada + borda * 4)
-
-    print(borda * 4 + " " * largura + borda * 4)
-    print(borda * (largura + 8) + "\n")
+    saldo_texto = f"Saldo: R$ {para_reais(saldo):,.2f}"
+    buffer.append(f"{vazia}\n{lateral}{saldo_texto:>{largura}}{lateral}\n{vazia}\n{cheia}\n\n")
+    sys.stdout.write("".join(buffer))
 
 def criar_usuario(usuarios):
     cpf = input("Informe o CPF (somente números): ")
@@ -131,40 +163,169 @@ def criar_usuario(usuarios):
         nome = input("Informe o nome completo: ")
         data_nascimento = input("Informe a data de nascimento (dd-mm-aaaa): ")
         endereco = input("Informe o endereço (logradouro, nro - bairro - cidade/sigla estado): ")
-        usuarios.append({"nome": nome, "data_nascimento": data_nascimento, "cpf": cpf, "endereco": endereco})
+        usuarios[cpf] = Usuario(nome, data_nascimento, cpf, endereco)
         mostrar_moldura("Usuário criado com sucesso!", borda='*')
     else:
         mostrar_moldura("CPF inválido! É obrigatório ter 11 números. Tente novamente!", borda='#')
 
 def filtrar_usuario(cpf, usuarios):
-    usuarios_filtrados = [usuario for usuario in usuarios if usuario["cpf"] == cpf]
-    return usuarios_filtrados[0] if usuarios_filtrados else None
+    # usuarios é um dicionário indexado pelo CPF
+    return usuarios.get(cpf)
 
 def criar_conta(agencia, numero_conta, usuarios):
     cpf = input("Informe o CPF do usuário: ")
     usuario = filtrar_usuario(cpf, usuarios)
     if usuario:
         mostrar_moldura("Conta criada com sucesso!", borda='*')
-        return {"agencia": agencia, "numero_conta": numero_conta, "usuario": usuario}
+        return Conta(agencia, numero_conta, usuario)
     mostrar_moldura("Usuário não encontrado! Processo encerrado!", borda='#')
 
 def listar_contas(contas):
     for conta in contas:
         linhas = [
-            f"Agência: {conta['agencia']}",
-            f"C/C: {conta['numero_conta']}",
-            f"Titular: {conta['usuario']['nome']}"
+            f"Agência: {conta.agencia}",
+            f"C/C: {conta.numero_conta}",
+            f"Titular: {conta.usuario.nome}"
         ]
         mostrar_moldura_multilinha(linhas, borda='@')
 
+# Modo não interativo: "--comandos <arquivo>" (ou "-" para a entrada padrão)
+# executa um comando compacto por linha com as mesmas funções do menu, sem o
+# menu, e mostra um resumo no fim; as molduras das operações vão para o
+# os.devnull:
+#   NU <cpf> "<nome>" <nascimento> "<endereço>" | NC <cpf>
+#   D [cpf] <valor> | S [cpf] <valor> | E [cpf] | LC | Q (encerra a leitura)
+# Na v2 há um único saldo, então o CPF de D, S e E é aceito e ignorado.
+# Linhas vazias e iniciadas por # são ignoradas
+def arquivo_comandos(argumentos):
+    if len(argumentos) >= 2 and argumentos[0] == "--comandos":
+        return argumentos[1]
+    return None
+
+def interpretar_comando(linha):
+    # (comando, argumentos), ou None para linhas vazias e comentários; só o
+    # NU, que tem textos com espaços, passa pelo shlex
+    linha = linha.strip()
+    if not linha or linha.startswith("#"):
+        return None
+    if linha[:3].upper() == "NU ":
+        partes = shlex.split(linha)
+    else:
+        partes = linha.split()
+    return partes[0].upper(), partes[1:]
+
+# comando -> (mínimo, máximo) de argumentos
+ARGUMENTOS_COMANDOS = {"D": (1, 2), "S": (1, 2), "E": (0, 1), "NU": (4, 4), "NC": (1, 1), "LC": (0, 0)}
+
+def executar_comandos(linhas):
+    # Sessão nova, com o mesmo estado inicial do main(). Falhas são operações
+    # recusadas; erros são linhas que não puderam ser interpretadas,
+    # relatadas no stderr
+    saldo = 0
+    extrato = []
+    numero_saques = 0
+    usuarios = {}
+    contas = []
+    resumo = {"sucesso": 0, "falhas": 0, "erros": 0, "por_comando": {}}
+    inicio = time.perf_counter()
+
+    for numero, linha in enumerate(linhas, 1):
+        try:
+            interpretado = interpretar_comando(linha)
+            if interpretado is None:
+                continue
+            opcao, argumentos = interpretado
+            if opcao == "Q":
+                break
+            if opcao not in ARGUMENTOS_COMANDOS:
+                raise ValueError(f"Comando desconhecido: {opcao}")
+            minimo, maximo = ARGUMENTOS_COMANDOS[opcao]
+            if not minimo <= len(argumentos) <= maximo:
+                raise ValueError(f"{opcao} espera de {minimo} a {maximo} argumento(s)")
+            resumo["por_comando"][opcao] = resumo["por_comando"].get(opcao, 0) + 1
+
+            if opcao == "D":
+                saldo_anterior = saldo
+                saldo, extrato = depositar(saldo, para_centavos(argumentos[-1]), extrato)
+                ok = saldo != saldo_anterior
+
+            elif opcao == "S":
+                saques_anteriores = numero_saques
+                saldo, extrato, numero_saques = sacar(
+                    saldo=saldo,
+                    valor=para_centavos(argumentos[-1]),
+                    extrato=extrato,
+                    limite=LIMITE_SAQUE,
+                    numero_saques=numero_saques,
+                    limite_saques=LIMITE_SAQUES,
+                )
+                ok = numero_saques != saques_anteriores
+
+            elif opcao == "E":
+                exibir_extrato(saldo, extrato=extrato)
+                ok = True
+
+            elif opcao == "NU":
+                cpf, nome, data_nascimento, endereco = argumentos
+                ok = len(cpf) == 11 and not filtrar_usuario(cpf, usuarios)
+                if ok:
+                    usuarios[cpf] = Usuario(nome, data_nascimento, cpf, endereco)
+
+            elif opcao == "NC":
+                usuario = filtrar_usuario(argumentos[0], usuarios)
+                ok = usuario is not None
+                if ok:
+                    contas.append(Conta(AGENCIA, len(contas) + 1, usuario))
+
+            else:
+                listar_contas(contas)
+                ok = True
+
+        except ValueError as erro:
+            resumo["erros"] += 1
+            sys.stderr.write(f"linha {numero}: {erro}\n")
+            continue
+
+        resumo["sucesso" if ok else "falhas"] += 1
+
+    resumo["segundos"] = time.perf_counter() - inicio
+    resumo["total"] = resumo["sucesso"] + resumo["falhas"] + resumo["erros"]
+    return resumo
+
+def executar_arquivo_comandos(caminho):
+    with open(os.devnull, "w") as descarte, redirect_stdout(descarte):
+        if caminho == "-":
+            resumo = executar_comandos(sys.stdin)
+        else:
+            with open(caminho, encoding="utf-8") as arquivo:
+                resumo = executar_comandos(arquivo)
+    mostrar_resumo_comandos(resumo)
+    return resumo
+
+def mostrar_resumo_comandos(resumo):
+    vazao = resumo["total"] / resumo["segundos"] if resumo["segundos"] else 0
+    linhas = [
+        "RESUMO DOS COMANDOS",
+        "-" * 45,
+        f"Comandos: {resumo['total']}",
+        f"Sucesso: {resumo['sucesso']} | Falhas: {resumo['falhas']} | Erros: {resumo['erros']}",
+        f"Tempo: {resumo['segundos']:.3f} s | Vazão: {vazao:,.0f} comandos/s",
+        "-" * 45,
+    ]
+    linhas.extend(f"{opcao}: {quantidade}" for opcao, quantidade in sorted(resumo["por_comando"].items()))
+    mostrar_moldura_multilinha(linhas, borda='=')
+
 def main():
-    LIMITE_SAQUES = 3
-    AGENCIA = "0001"
+    caminho_comandos = arquivo_comandos(sys.argv[1:])
+    if caminho_comandos:
+        executar_arquivo_comandos(caminho_comandos)
+        return
+
     saldo = 0
-    limite = 500
-    extrato = ""
+    limite = LIMITE_SAQUE
+    extrato = []
     numero_saques = 0
-    usuarios = []
+    usuarios = {}
     contas = []
 
     while True:
@@ -172,13 +333,13 @@ def main():
             opcao = menu().upper()
 
             if opcao == "D":
-                valor = float(input("Informe o valor do depósito: "))
+                valor = para_centavos(input("Informe o valor do depósito: "))
                 saldo, extrato = depositar(saldo, valor, extrato)
 
             elif opcao == "S":
-                mostrar_aviso_legal(limite, LIMITE_SAQUES, numero_saques)
+                mostrar_aviso_legal(para_reais(limite), LIMITE_SAQUES, numero_saques)
 
-                valor = float(input("Informe o valor do saque: "))
+                valor = para_centavos(input("Informe o valor do saque: "))
                 saldo, extrato, numero_saques = sacar(
                     saldo=saldo,
                     valor=valor,
@@ -213,4 +374,5 @@ def main():
         except ValueError:
             mostrar_moldura("Você está cometendo algum erro, por favor siga as instruções atentamente!", borda='#')
 
-main()
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,220 @@
 # V2 - Adicionado operações: criar usuário, criar conta, listar contas.
 # V3 - Modelando sistema com Programação Orientada a objeto (POO).
 
+import os
+import shlex
+import sys
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import Counter, defaultdict, namedtuple
+from contextlib import redirect_stdout
 from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache, wraps
+from itertools import chain, islice
+
+AGENCIA = "0001"
+
+# Valores monetários: centavos inteiros internamente, Decimal na interface
+CENTAVO = Decimal("0.01")
+
+def para_centavos(valor):
+    if type(valor) is int:
+        return valor * 100
+    try:
+        if not isinstance(valor, Decimal):
+            valor = Decimal(str(valor))
+        if not valor.is_finite():
+            raise ValueError(f"Valor monetário inválido: {valor}")
+        return int(valor.quantize(CENTAVO, rounding=ROUND_HALF_UP).scaleb(2))
+    except InvalidOperation:
+        # Texto que não é número ou valor grande demais para a precisão do
+        # Decimal (ex.: 1e30)
+        raise ValueError(f"Valor monetário inválido: {valor}")
+
+def para_reais(centavos):
+    return Decimal(centavos).scaleb(-2)
+
+# Campos da operação em andamento (CPF, conta, motivo da falha), preenchidos
+# pela própria operação com anotar_operacao
+CONTEXTO_OPERACAO = threading.local()
+
+def anotar_operacao(**campos):
+    atuais = getattr(CONTEXTO_OPERACAO, "campos", None)
+    if atuais is not None:
+        atuais.update(campos)
+
+# Métricas de latência por operação em histogramas log-lineares (estilo HDR):
+# cada potência de 2, em nanossegundos, é dividida em 2**BITS_SUBFAIXA faixas
+# iguais, o que limita o erro relativo a 1/8
+BITS_SUBFAIXA = 3
+
+def indice_faixa(ns):
+    expoente = ns.bit_length()
+    if expoente <= BITS_SUBFAIXA + 1:
+        return ns
+    subfaixa = (ns >> (expoente - 1 - BITS_SUBFAIXA)) & ((1 << BITS_SUBFAIXA) - 1)
+    return ((expoente - BITS_SUBFAIXA) << BITS_SUBFAIXA) + subfaixa
+
+def limite_faixa(indice):
+    # Primeiro valor acima da faixa
+    if indice < 2 << BITS_SUBFAIXA:
+        return indice + 1
+    deslocamento = (indice >> BITS_SUBFAIXA) - 1
+    return ((1 << BITS_SUBFAIXA) + (indice & ((1 << BITS_SUBFAIXA) - 1)) + 1) << deslocamento
+
+class HistogramaLatencia:
+    def __init__(self):
+        self.contagens = [0] * (64 << BITS_SUBFAIXA)
+        self.total = 0
+        self.soma = 0
+        self.maximo = 0
+
+    def registrar(self, ns):
+        self.contagens[indice_faixa(ns)] += 1
+        self.total += 1
+        self.soma += ns
+        if ns > self.maximo:
+            self.maximo = ns
+
+    def faixas(self):
+        # (limite da faixa, contagem acumulada) das faixas ocupadas
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            if contagem:
+                acumulado += contagem
+                yield limite_faixa(indice), acumulado
+
+    def percentil(self, p):
+        alvo = -(-self.total * p // 100)
+        for limite, acumulado in self.faixas():
+            if acumulado >= alvo:
+                return min(limite - 1, self.maximo)
+        return 0
+
+def rotulo_prometheus(texto):
+    return str(texto).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Metricas:
+    def __init__(self):
+        self.latencias = defaultdict(HistogramaLatencia)
+        self.falhas = Counter()
+
+    def registrar(self, operacao, ns, motivo=None):
+        self.latencias[operacao].registrar(ns)
+        if motivo is not None:
+            self.falhas[operacao, motivo] += 1
+
+    def exportar_prometheus(self):
+        nome = "banco_operacao_duracao_segundos"
+        linhas = [
+            f"# HELP {nome} Latência das operações bancárias.",
+            f"# TYPE {nome} histogram",
+        ]
+        for operacao, histograma in sorted(self.latencias.items()):
+            rotulo = f'operacao="{rotulo_prometheus(operacao)}"'
+            for limite, acumulado in histograma.faixas():
+                linhas.append(f'{nome}_bucket{{{rotulo},le="{(limite - 1) / 1e9:.9g}"}} {acumulado}')
+            linhas.append(f'{nome}_bucket{{{rotulo},le="+Inf"}} {histograma.total}')
+            linhas.append(f"{nome}_sum{{{rotulo}}} {histograma.soma / 1e9:.9g}")
+            linhas.append(f"{nome}_count{{{rotulo}}} {histograma.total}")
+        linhas += [
+            "# HELP banco_operacao_falhas_total Falhas das operações bancárias por motivo.",
+            "# TYPE banco_operacao_falhas_total counter",
+        ]
+        for (operacao, motivo), total in sorted(self.falhas.items()):
+            linhas.append(f'banco_operacao_falhas_total{{operacao="{rotulo_prometheus(operacao)}",motivo="{rotulo_prometheus(motivo)}"}} {total}')
+        return "\n".join(linhas) + "\n"
+
+    def gravar(self, caminho):
+        # Troca atômica, para quem lê o arquivo nunca ver um snapshot pela metade
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            arquivo.write(self.exportar_prometheus())
+        os.replace(temporario, caminho)
+
+METRICAS = Metricas()
+
+def configurar_metricas(metricas):
+    global METRICAS
+    METRICAS = metricas
+
+def gravar_metricas():
+    # Com BANCO_XYZ_METRICAS definido, o snapshot vai para esse arquivo
+    caminho = os.environ.get("BANCO_XYZ_METRICAS")
+    if caminho and METRICAS is not None:
+        METRICAS.gravar(caminho)
+        return caminho
+    return None
+
+# Decorador de instrumentação: mede a latência e conta o motivo da falha
+# anotado pela operação (ou o tipo da exceção)
+def medir_operacao(func):
+    operacao = func.__name__
+
+    @wraps(func)
+    def envelope(*args, **kwargs):
+        metricas = METRICAS
+        if metricas is None:
+            return func(*args, **kwargs)
+
+        anterior = getattr(CONTEXTO_OPERACAO, "campos", None)
+        campos = CONTEXTO_OPERACAO.campos = {}
+        erro = None
+        inicio = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            erro = type(e).__name__
+            raise
+        finally:
+            latencia = time.perf_counter_ns() - inicio
+            CONTEXTO_OPERACAO.campos = anterior
+            if anterior is not None:
+                anterior.update(campos)
+            metricas.registrar(operacao, latencia, erro or campos.get("motivo"))
+    return envelope
+
+# Captura de perfil (cProfile + tracemalloc), ligada e desligada em tempo de
+# execução pelo menu oculto PF
+class CapturaPerfil:
+    def __init__(self, diretorio="."):
+        import cProfile
+        import tracemalloc
+        self.diretorio = diretorio
+        tracemalloc.start()
+        self._perfil = cProfile.Profile()
+        self._perfil.enable()
+
+    def encerrar(self):
+        import tracemalloc
+        self._perfil.disable()
+        memoria = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        carimbo = time.strftime("%Y%m%d-%H%M%S")
+        caminho_perfil = os.path.join(self.diretorio, f"perfil-{carimbo}.prof")
+        caminho_memoria = os.path.join(self.diretorio, f"memoria-{carimbo}.txt")
+        self._perfil.dump_stats(caminho_perfil)
+        with open(caminho_memoria, "w", encoding="utf-8") as arquivo:
+            for estatistica in memoria.statistics("lineno")[:50]:
+                arquivo.write(f"{estatistica}\n")
+        return caminho_perfil, caminho_memoria
+
+CAPTURA_PERFIL = None
+
+def alternar_perfil():
+    global CAPTURA_PERFIL
+    if CAPTURA_PERFIL is None:
+        CAPTURA_PERFIL = CapturaPerfil(os.environ.get("BANCO_XYZ_PERFIL", "."))
+        mostrar_moldura("Captura de perfil iniciada.", borda='=')
+        return
+    caminhos = list(CAPTURA_PERFIL.encerrar())
+    CAPTURA_PERFIL = None
+    metricas = gravar_metricas()
+    if metricas:
+        caminhos.append(metricas)
+    mostrar_moldura_multilinha(["Captura de perfil encerrada:"] + caminhos, borda='=')
 
 # Funções Estéticas "molduras"
 
@@ -11,31 +223,40 @@ def calcular_largura_ideal(linhas, largura_minima=45, padding=8):
     comprimento_max = max(len(l.strip()) for l in linhas)
     return max(comprimento_max, largura_minima) + padding
 
+# Bordas e linhas vazias são montadas uma única vez por (borda, largura)
+@lru_cache(maxsize=None)
+def partes_moldura(borda, largura):
+    lateral = borda * 4
+    return borda * (largura + 8), lateral + " " * largura + lateral, lateral
+
+def linha_moldura(texto, lateral, largura):
+    espaco_esq = (largura - len(texto)) // 2
+    espaco_dir = largura - len(texto) - espaco_esq
+    return f"{lateral}{' ' * espaco_esq}{texto}{' ' * espaco_dir}{lateral}"
+
+# Cada moldura é montada em um buffer e escrita com um único write
 def mostrar_moldura(texto, borda='=', largura=None):
     if largura is None:
         largura = calcular_largura_ideal([texto])
-    print("\n")
-    print(borda * (largura + 8))
-    print(borda * 4 + " " * largura + borda * 4)
-    espaco_esq = (largura - len(texto)) // 2
-    espaco_dir = largura - len(texto) - espaco_esq
-    print(borda * 4 + " " * espaco_esq + texto + " " * espaco_dir + borda * 4)
-    print(borda * 4 + " " * largura + borda * 4)
-    print(borda * (largura + 8))
-    print("\n")
+    cheia, vazia, lateral = partes_moldura(borda, largura)
+    sys.stdout.write(f"\n\n{cheia}\n{vazia}\n{linha_moldura(texto, lateral, largura)}\n{vazia}\n{cheia}\n\n\n")
 
-def mostrar_moldura_multilinha(linhas, borda='@', largura=None):
+def mostrar_moldura_multilinha(linhas, borda='@', largura=None, tamanho_bloco=None):
+    # Com tamanho_bloco, as linhas são escritas em blocos à medida que são
+    # consumidas (modo streaming); informe a largura para não materializar tudo
     if largura is None:
+        linhas = list(linhas)
         largura = calcular_largura_ideal(linhas)
-    print("\n" + borda * (largura + 8))
-    print(borda * 4 + " " * largura + borda * 4)
+    cheia, vazia, lateral = partes_moldura(borda, largura)
+    escrever = sys.stdout.write
+    buffer = [f"\n{cheia}\n{vazia}\n"]
     for linha in linhas:
-        linha = linha.strip()
-        espaco_esq = (largura - len(linha)) // 2
-        espaco_dir = largura - len(linha) - espaco_esq
-        print(borda * 4 + " " * espaco_esq + linha + " " * espaco_dir + borda * 4)
-    print(borda * 4 + " " * largura + borda * 4)
-    print(borda * (largura + 8) + "\n")
+        buffer.append(linha_moldura(linha.strip(), lateral, largura) + "\n")
+        if tamanho_bloco and len(buffer) >= tamanho_bloco:
+            escrever("".join(buffer))
+            buffer.clear()
+    buffer.append(f"{vazia}\n{cheia}\n\n")
+    escrever("".join(buffer))
 
 def mostrar_aviso_legal(limite, limite_saques, numero_saques):
     linhas = [
@@ -47,29 +268,63 @@ def mostrar_aviso_legal(limite, limite_saques, numero_saques):
     mostrar_moldura_multilinha(linhas, borda='=')
 
 def mostrar_menu_moldurado(linhas, borda='=', largura_total=84, largura_conteudo=50):
-    print("\n" + borda * (largura_total))
-    margem = (largura_total - largura_conteudo - 8) // 2
-    for linha in linhas:
-        texto = linha.strip()
-        texto_formatado = texto.ljust(largura_conteudo)
-        print(f"{borda*4}{' ' * margem}{texto_formatado}{' ' * margem}{borda*4}")
-    print(borda * (largura_total))
-    print()
+    cheia = borda * largura_total
+    margem = " " * ((largura_total - largura_conteudo - 8) // 2)
+    lateral = borda * 4
+    corpo = "".join(f"{lateral}{margem}{linha.strip().ljust(largura_conteudo)}{margem}{lateral}\n" for linha in linhas)
+    sys.stdout.write(f"\n{cheia}\n{corpo}{cheia}\n\n")
 
 # Classes
 
+class ClienteRegistry:
+    def __init__(self):
+        self._clientes = {}
+        self._contas = {}
+
+    def __len__(self):
+        return len(self._clientes)
+
+    def __iter__(self):
+        return iter(self._clientes.values())
+
+    def __contains__(self, cpf):
+        return cpf in self._clientes
+
+    def buscar(self, cpf):
+        return self._clientes.get(cpf)
+
+    def adicionar(self, cliente):
+        if cliente.cpf in self._clientes:
+            return False
+        self._clientes[cliente.cpf] = cliente
+        for conta in cliente.contas:
+            self.adicionar_conta(conta)
+        return True
+
+    def adicionar_conta(self, conta):
+        self._contas[(conta.agencia, conta.numero)] = conta
+
+    def buscar_conta(self, agencia, numero):
+        return self._contas.get((agencia, numero))
+
+# Classes do domínio com __slots__: sem __dict__ por instância, o que pesa
+# quando há milhões de clientes, contas e transações
 class Cliente:
+    __slots__ = ("endereco", "contas")
+
     def __init__(self, endereco):
         self.endereco = endereco
         self.contas = []
 
     def realizar_transacao(self, conta, transacao):
-        transacao.registrar(conta)
+        return transacao.registrar(conta)
 
     def adicionar_conta(self, conta):
         self.contas.append(conta)
 
 class PessoaFisica(Cliente):
+    __slots__ = ("nome", "data_nascimento", "cpf")
+
     def __init__(self, nome, data_nascimento, cpf, endereco):
         super().__init__(endereco)
         self.nome = nome
@@ -77,12 +332,16 @@ class PessoaFisica(Cliente):
         self.cpf = cpf
 
 class Conta:
+    __slots__ = ("_saldo", "_numero", "_agencia", "_cliente", "_historico", "_trava")
+
     def __init__(self, numero, cliente):
         self._saldo = 0
         self._numero = numero
-        self._agencia = "0001"
+        self._agencia = AGENCIA
         self._cliente = cliente
         self._historico = Historico()
+        # Saldo e histórico só mudam com a trava da conta
+        self._trava = threading.RLock()
 
     @classmethod
     def nova_conta(cls, cliente, numero):
@@ -90,7 +349,7 @@ class Conta:
 
     @property
     def saldo(self):
-        return self._saldo
+        return para_reais(self._saldo)
 
     @property
     def numero(self):
@@ -109,91 +368,174 @@ class Conta:
         return self._historico
 
     def sacar(self, valor):
-        if valor <= 0:
+        return self.sacar_centavos(para_centavos(valor))
+
+    def sacar_centavos(self, centavos):
+        if centavos <= 0:
+            anotar_operacao(motivo="Valor invalido")
             mostrar_moldura("Operacao falhou! Valor invalido.", borda='#')
             return False
-        if valor > self._saldo:
+        if centavos > self._saldo:
+            anotar_operacao(motivo="Saldo insuficiente")
             mostrar_moldura("Operacao falhou! Saldo insuficiente.", borda='#')
             return False
-        self._saldo -= valor
+        self._saldo -= centavos
         mostrar_moldura("Saque realizado com sucesso!", borda='*')
         return True
 
     def depositar(self, valor):
-        if valor <= 0:
+        return self.depositar_centavos(para_centavos(valor))
+
+    def depositar_centavos(self, centavos):
+        if centavos <= 0:
+            anotar_operacao(motivo="Valor invalido")
             mostrar_moldura("Operacao falhou! Valor invalido.", borda='#')
             return False
-        self._saldo += valor
+        self._saldo += centavos
         mostrar_moldura("Deposito realizado com sucesso!", borda='*')
         return True
 
 class ContaCorrente(Conta):
+    __slots__ = ("_limite", "_limite_centavos", "_limite_saques")
+
     def __init__(self, numero, cliente, limite=500, limite_saques=3):
         super().__init__(numero, cliente)
         self._limite = limite
+        self._limite_centavos = para_centavos(limite)
         self._limite_saques = limite_saques
 
-    def sacar(self, valor):
-        numero_saques = len([
-            t for t in self.historico.transacoes if t["tipo"] == "Saque"
-        ])
-        if valor > self._limite:
+    def sacar_centavos(self, centavos):
+        numero_saques = self.historico.contar("Saque")
+        if centavos > self._limite_centavos:
+            anotar_operacao(motivo="Valor excede limite")
             mostrar_moldura("Operacao falhou! Valor excede limite.", borda='#')
             return False
         if numero_saques >= self._limite_saques:
+            anotar_operacao(motivo="Limite de saques excedido")
             mostrar_moldura("Operacao falhou! Limite de saques excedido.", borda='#')
             return False
-        return super().sacar(valor)
+        return super().sacar_centavos(centavos)
+
+# Transação registrada, imutável; o valor só vira Decimal quando lido e o
+# acesso no formato antigo (t["tipo"], t["valor"], t["data"]) continua valendo
+class RegistroTransacao(namedtuple("RegistroTransacao", "tipo centavos data")):
+    __slots__ = ()
+
+    @property
+    def valor(self):
+        return para_reais(self.centavos)
+
+    def __getitem__(self, chave):
+        if isinstance(chave, str):
+            return getattr(self, chave)
+        return tuple.__getitem__(self, chave)
+
+# Data/hora atual formatada, refeita só quando o segundo muda: as transações
+# do mesmo segundo compartilham a mesma string
+ULTIMA_DATA = (None, "")
+
+def data_atual():
+    global ULTIMA_DATA
+    segundo = int(time.time())
+    ultimo, texto = ULTIMA_DATA
+    if segundo != ultimo:
+        texto = datetime.fromtimestamp(segundo).strftime("%d-%m-%Y %H:%M:%S")
+        ULTIMA_DATA = (segundo, texto)
+    return texto
 
 class Historico:
+    __slots__ = ("_transacoes", "_contagem")
+
     def __init__(self):
         self._transacoes = []
+        self._contagem = defaultdict(int)
 
     @property
     def transacoes(self):
         return self._transacoes
 
+    def contar(self, tipo):
+        return self._contagem[tipo]
+
     def adicionar_transacao(self, transacao):
-        self._transacoes.append({
-            "tipo": transacao.__class__.__name__,
-            "valor": transacao.valor,
-            "data": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-        })
+        tipo = transacao.__class__.__name__
+        self._contagem[tipo] += 1
+        self._transacoes.append(RegistroTransacao(tipo, transacao.centavos, data_atual()))
+
+    def gerar_relatorio(self, tipo_transacao=None, inicio=None, fim=None):
+        # inicio e fim são datas (date) inclusivas
+        de = inicio.strftime("%Y%m%d") if inicio else None
+        ate = fim.strftime("%Y%m%d") if fim else None
+        for transacao in self._transacoes:
+            if tipo_transacao is not None and transacao.tipo != tipo_transacao:
+                continue
+            if de or ate:
+                data = transacao.data
+                chave = data[6:10] + data[3:5] + data[:2]
+                if (de and chave < de) or (ate and chave > ate):
+                    continue
+            yield transacao
 
 class Transacao(ABC):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def valor(self):
         pass
 
+    @property
+    def centavos(self):
+        return para_centavos(self.valor)
+
 
     @abstractmethod
     def registrar(self, conta):
         pass
 
 class Saque(Transacao):
+    __slots__ = ("_centavos",)
+
     def __init__(self, valor):
-        self._valor = valor
+        self._centavos = para_centavos(valor)
 
     @property
     def valor(self):
-        return self._valor
+        return para_reais(self._centavos)
+
+    @property
+    def centavos(self):
+        return self._centavos
 
     def registrar(self, conta):
-        if conta.sacar(self.valor):
-            conta.historico.adicionar_transacao(self)
+        # Com a trava, a conferência do limite de saques, o saldo e o
+        # histórico mudam num passo só
+        with conta._trava:
+            if conta.sacar_centavos(self.centavos):
+                conta.historico.adicionar_transacao(self)
+                return True
+            return False
 
 class Deposito(Transacao):
+    __slots__ = ("_centavos",)
+
     def __init__(self, valor):
-        self._valor = valor
+        self._centavos = para_centavos(valor)
 
     @property
     def valor(self):
-        return self._valor
+        return para_reais(self._centavos)
+
+    @property
+    def centavos(self):
+        return self._centavos
 
     def registrar(self, conta):
-        if conta.depositar(self.valor):
-            conta.historico.adicionar_transacao(self)
+        with conta._trava:
+            if conta.depositar_centavos(self.centavos):
+                conta.historico.adicionar_transacao(self)
+                return True
+            return False
 
 # Funções
 
@@ -218,12 +560,12 @@ def menu():
 def ler_valor_numerico(msg):
     valor_str = input(msg)
     try:
-        valor = float(valor_str)
+        valor = para_reais(para_centavos(Decimal(valor_str.strip())))
         if valor <= 0:
             mostrar_moldura("Valor inválido! Deve ser maior que zero.", borda='#')
             return None
         return valor
-    except ValueError:
+    except (ValueError, InvalidOperation):
         mostrar_moldura("Valor inválido! Tente novamente.", borda='#')
         return None
 
@@ -239,63 +581,85 @@ def solicitar_cpf():
         if validar_cpf(cpf):
             return cpf
 
-def solicitar_numero_conta(cliente):
+def solicitar_numero_conta(cliente, clientes):
     while True:
         numero_conta_str = input("Número da conta: ")
         if not numero_conta_str.isdigit():
             mostrar_moldura("Conta inválida! Digite apenas números.", borda='#')
             continue
         numero_conta = int(numero_conta_str)
-        conta = recuperar_conta_cliente(cliente, numero_conta)
+        conta = recuperar_conta_cliente(cliente, numero_conta, clientes)
         if conta:
             return conta
         else:
             mostrar_moldura("Número da conta não pertence ao cliente. Tente novamente.", borda='#')
 
 def filtrar_cliente(cpf, clientes):
-    return next((c for c in clientes if c.cpf == cpf), None)
+    return clientes.buscar(cpf)
 
-def recuperar_conta_cliente(cliente, numero_conta):
-    return next((c for c in cliente.contas if c.numero == numero_conta), None)
+def recuperar_conta_cliente(cliente, numero_conta, clientes):
+    conta = clientes.buscar_conta(AGENCIA, numero_conta)
+    return conta if conta is not None and conta.cliente is cliente else None
 
+@medir_operacao
 def depositar(clientes):
     cpf = solicitar_cpf()
     cliente = filtrar_cliente(cpf, clientes)
     if not cliente:
+        anotar_operacao(motivo="Cliente não encontrado")
         mostrar_moldura("Cliente não encontrado!", borda='#')
         return
-    conta = solicitar_numero_conta(cliente)
+    conta = solicitar_numero_conta(cliente, clientes)
     valor = ler_valor_numerico("Valor do depósito: ")
     if valor is None:
+        anotar_operacao(motivo="Valor inválido")
         return
     cliente.realizar_transacao(conta, Deposito(valor))
 
+@medir_operacao
 def sacar(clientes):
     cpf = solicitar_cpf()
     cliente = filtrar_cliente(cpf, clientes)
     if not cliente:
+        anotar_operacao(motivo="Cliente não encontrado")
         mostrar_moldura("Cliente não encontrado!", borda='#')
         return
-    conta = solicitar_numero_conta(cliente)
+    conta = solicitar_numero_conta(cliente, clientes)
     if isinstance(conta, ContaCorrente):
-        numero_saques = len([t for t in conta.historico.transacoes if t["tipo"] == "Saque"])
+        numero_saques = conta.historico.contar("Saque")
         mostrar_aviso_legal(conta._limite, conta._limite_saques, numero_saques)
     valor = ler_valor_numerico("Valor do saque: ")
     if valor is None:
+        anotar_operacao(motivo="Valor inválido")
         return
     cliente.realizar_transacao(conta, Saque(valor))
 
-def exibir_extrato(clientes):
+TAMANHO_PAGINA_EXTRATO = 500
+
+def linhas_extrato(conta, tipo_transacao=None, inicio=None, fim=None, pagina=None, tamanho_pagina=TAMANHO_PAGINA_EXTRATO):
+    transacoes = conta.historico.gerar_relatorio(tipo_transacao, inicio, fim)
+    if pagina is not None:
+        transacoes = islice(transacoes, (pagina - 1) * tamanho_pagina, pagina * tamanho_pagina)
+    vazio = True
+    for t in transacoes:
+        vazio = False
+        yield f"{t['data']:<20} | {t['tipo']:<10} | R$ {t['valor']:>12.2f}"
+    if vazio:
+        yield "Nao foram realizadas movimentacoes."
+
+@medir_operacao
+def exibir_extrato(clientes, tipo_transacao=None, inicio=None, fim=None, pagina=None, tamanho_pagina=TAMANHO_PAGINA_EXTRATO):
     cpf = solicitar_cpf()
     cliente = filtrar_cliente(cpf, clientes)
     if not cliente:
+        anotar_operacao(motivo="Cliente não encontrado")
         mostrar_moldura("Cliente nao encontrado!", borda='#')
         return
-    conta = solicitar_numero_conta(cliente)
+    conta = solicitar_numero_conta(cliente, clientes)
     if not conta:
         return
     timestamp = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-    linhas = [
+    cabecalho = [
         f"EXTRATO - Gerado em {timestamp}",
         "-" * 60,
         f"Nome: {cliente.nome}",
@@ -306,39 +670,41 @@ def exibir_extrato(clientes):
         f"{'Data':<20} | {'Tipo':<10} | {'Valor':>15}",
         "-" * 60
     ]
-    transacoes = conta.historico.transacoes
-    if not transacoes:
-        linhas.append("Nao foram realizadas movimentacoes.")
-    else:
-        for t in transacoes:
-            data = t["data"]
-            tipo = t["tipo"]
-            valor = t["valor"]
-            linhas.append(f"{data:<20} | {tipo:<10} | R$ {valor:>12.2f}")
-    linhas.append("-" * 60)
-    linhas.append(f"{'Saldo atual:':>47} R$ {conta.saldo:>10.2f}")
-    mostrar_moldura_multilinha(linhas, borda='=')
+    rodape = [
+        "-" * 60,
+        f"{'Saldo atual:':>47} R$ {conta.saldo:>10.2f}"
+    ]
+    # Colunas de largura fixa: a largura sai do cabeçalho e do rodapé, sem
+    # percorrer as transações, que são escritas em blocos à medida que são lidas
+    largura = calcular_largura_ideal(cabecalho + rodape)
+    corpo = linhas_extrato(conta, tipo_transacao, inicio, fim, pagina, tamanho_pagina)
+    mostrar_moldura_multilinha(chain(cabecalho, corpo, rodape), borda='=', largura=largura, tamanho_bloco=tamanho_pagina)
 
+@medir_operacao
 def criar_cliente(clientes):
     cpf = solicitar_cpf()
     if filtrar_cliente(cpf, clientes):
+        anotar_operacao(motivo="Cliente já existe")
         mostrar_moldura("Cliente já existe!", borda='#')
         return
     nome = input("Nome completo: ")
     nasc = input("Data de nascimento (dd/mm/aaaa): ")
     endereco = input("Endereço completo: ")
-    clientes.append(PessoaFisica(nome, nasc, cpf, endereco))
+    clientes.adicionar(PessoaFisica(nome, nasc, cpf, endereco))
     mostrar_moldura("Cliente criado com sucesso!", borda='*')
 
+@medir_operacao
 def criar_conta(contas, clientes):
     cpf = solicitar_cpf()
     cliente = filtrar_cliente(cpf, clientes)
     if not cliente:
+        anotar_operacao(motivo="Cliente não encontrado")
         mostrar_moldura("Cliente nao encontrado!", borda='#')
         return
     numero = len(contas) + 1
     conta = ContaCorrente.nova_conta(cliente, numero)
     cliente.adicionar_conta(conta)
+    clientes.adicionar_conta(conta)
     contas.append(conta)
     mostrar_moldura("Conta criada com sucesso!", borda='*')
 
@@ -357,9 +723,182 @@ def listar_contas(contas):
         ])
     mostrar_moldura_multilinha(linhas, borda='@')
 
+# Modo não interativo: "--comandos <arquivo>" (ou "-" para a entrada padrão)
+# executa um comando compacto por linha com as mesmas operações do domínio,
+# sem menu, e mostra um resumo no fim; as molduras das operações vão para o
+# os.devnull:
+#   NU <cpf> "<nome>" <nascimento> "<endereço>" | NC <cpf>
+#   D <cpf> <valor> [conta] | S <cpf> <valor> [conta] | E <cpf> [conta] | LC
+#   Q (encerra a leitura)
+# Sem o número da conta, vale a primeira conta do cliente. Linhas vazias e
+# iniciadas por # são ignoradas
+ResumoComandos = namedtuple("ResumoComandos", "total sucesso falhas erros segundos por_comando motivos")
+
+def arquivo_comandos(argumentos):
+    if len(argumentos) >= 2 and argumentos[0] == "--comandos":
+        return argumentos[1]
+    return None
+
+def interpretar_comando(linha):
+    # (comando, argumentos), ou None para linhas vazias e comentários; só o
+    # NU, que tem textos com espaços, passa pelo shlex
+    linha = linha.strip()
+    if not linha or linha.startswith("#"):
+        return None
+    if linha[:3].upper() == "NU ":
+        partes = shlex.split(linha)
+    else:
+        partes = linha.split()
+    return partes[0].upper(), partes[1:]
+
+def valor_comando(texto):
+    # Conferido já na leitura: um valor fora da faixa é erro da linha
+    try:
+        valor = Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {texto!r}")
+    para_centavos(valor)
+    return valor
+
+def conta_comando(clientes, cpf, numero=None):
+    cliente = filtrar_cliente(cpf, clientes)
+    if not cliente:
+        anotar_operacao(motivo="Cliente não encontrado")
+        return None
+    if numero is None:
+        conta = cliente.contas[0] if cliente.contas else None
+    elif numero.isdigit():
+        conta = recuperar_conta_cliente(cliente, int(numero), clientes)
+    else:
+        raise ValueError(f"Conta inválida: {numero!r}")
+    if conta is None:
+        anotar_operacao(motivo="Conta não encontrada")
+    return conta
+
+def comando_novo_cliente(clientes, contas, cpf, nome, nascimento, endereco):
+    if not validar_cpf(cpf):
+        raise ValueError(f"CPF inválido: {cpf!r}")
+    if filtrar_cliente(cpf, clientes):
+        anotar_operacao(motivo="Cliente já existe")
+        return False
+    clientes.adicionar(PessoaFisica(nome, nascimento, cpf, endereco))
+    return True
+
+def comando_nova_conta(clientes, contas, cpf):
+    cliente = filtrar_cliente(cpf, clientes)
+    if not cliente:
+        anotar_operacao(motivo="Cliente não encontrado")
+        return False
+    conta = ContaCorrente.nova_conta(cliente, len(contas) + 1)
+    cliente.adicionar_conta(conta)
+    clientes.adicionar_conta(conta)
+    contas.append(conta)
+    return True
+
+def comando_deposito(clientes, contas, cpf, valor, numero=None):
+    conta = conta_comando(clientes, cpf, numero)
+    if conta is None:
+        return False
+    return conta.cliente.realizar_transacao(conta, Deposito(valor_comando(valor)))
+
+def comando_saque(clientes, contas, cpf, valor, numero=None):
+    conta = conta_comando(clientes, cpf, numero)
+    if conta is None:
+        return False
+    return conta.cliente.realizar_transacao(conta, Saque(valor_comando(valor)))
+
+def comando_extrato(clientes, contas, cpf, numero=None):
+    conta = conta_comando(clientes, cpf, numero)
+    if conta is None:
+        return False
+    # As linhas são geradas como no extrato do menu, mas não são exibidas
+    for _ in linhas_extrato(conta):
+        pass
+    return True
+
+def comando_listar_contas(clientes, contas):
+    listar_contas(contas)
+    return True
+
+# comando -> (função, mínimo e máximo de argumentos)
+COMANDOS_SCRIPT = {
+    "NU": (comando_novo_cliente, 4, 4),
+    "NC": (comando_nova_conta, 1, 1),
+    "D": (comando_deposito, 2, 3),
+    "S": (comando_saque, 2, 3),
+    "E": (comando_extrato, 1, 2),
+    "LC": (comando_listar_contas, 0, 0),
+}
+
+def executar_comandos(linhas, clientes, contas):
+    # Falhas são recusas do domínio, com o motivo anotado pela operação; erros
+    # são linhas que não puderam ser interpretadas, relatadas no stderr
+    por_comando = Counter()
+    motivos = Counter()
+    sucesso = falhas = erros = 0
+    inicio = time.perf_counter()
+    for numero, linha in enumerate(linhas, 1):
+        campos = CONTEXTO_OPERACAO.campos = {}
+        try:
+            interpretado = interpretar_comando(linha)
+            if interpretado is None:
+                continue
+            comando, argumentos = interpretado
+            if comando == "Q":
+                break
+            if comando not in COMANDOS_SCRIPT:
+                raise ValueError(f"Comando desconhecido: {comando}")
+            executar, minimo, maximo = COMANDOS_SCRIPT[comando]
+            if not minimo <= len(argumentos) <= maximo:
+                raise ValueError(f"{comando} espera de {minimo} a {maximo} argumento(s)")
+            por_comando[comando] += 1
+            ok = executar(clientes, contas, *argumentos)
+        except (ValueError, ArithmeticError) as e:
+            erros += 1
+            sys.stderr.write(f"linha {numero}: {e}\n")
+            continue
+        finally:
+            CONTEXTO_OPERACAO.campos = None
+        if ok:
+            sucesso += 1
+        else:
+            falhas += 1
+            motivos[campos.get("motivo", "Sem motivo")] += 1
+    segundos = time.perf_counter() - inicio
+    return ResumoComandos(sucesso + falhas + erros, sucesso, falhas, erros, segundos, por_comando, motivos)
+
+def executar_arquivo_comandos(caminho, clientes, contas):
+    with open(os.devnull, "w") as descarte, redirect_stdout(descarte):
+        if caminho == "-":
+            resumo = executar_comandos(sys.stdin, clientes, contas)
+        else:
+            with open(caminho, encoding="utf-8") as arquivo:
+                resumo = executar_comandos(arquivo, clientes, contas)
+    mostrar_resumo_comandos(resumo)
+    return resumo
+
+def mostrar_resumo_comandos(resumo):
+    vazao = resumo.total / resumo.segundos if resumo.segundos else 0
+    linhas = [
+        "RESUMO DOS COMANDOS",
+        "-" * 45,
+        f"Comandos: {resumo.total}",
+        f"Sucesso: {resumo.sucesso} | Falhas: {resumo.falhas} | Erros: {resumo.erros}",
+        f"Tempo: {resumo.segundos:.3f} s | Vazão: {vazao:,.0f} comandos/s",
+        "-" * 45,
+    ]
+    linhas.extend(f"{comando}: {quantidade}" for comando, quantidade in sorted(resumo.por_comando.items()))
+    linhas.extend(f"{motivo}: {quantidade}" for motivo, quantidade in resumo.motivos.most_common())
+    mostrar_moldura_multilinha(linhas, borda='=', largura=calcular_largura_ideal(linhas))
+
 def main():
-    clientes = []
+    clientes = ClienteRegistry()
     contas = []
+    caminho_comandos = arquivo_comandos(sys.argv[1:])
+    if caminho_comandos:
+        executar_arquivo_comandos(caminho_comandos, clientes, contas)
+        gravar_metricas()
+        return
     while True:
         try:
             opcao = menu().strip().upper()
@@ -376,11 +915,15 @@ def main():
             elif opcao == 'LC':
                 listar_contas(contas)
             elif opcao == 'Q':
+                gravar_metricas()
                 mostrar_moldura("Encerrando o sistema...", borda='=')
                 break
+            elif opcao == 'PF': # Menu oculto para ligar/desligar a captura de perfil
+                alternar_perfil()
             else:
                 mostrar_moldura("Opcao invalida!", borda='#')
         except ValueError:
             mostrar_moldura("Erro de entrada! Tente novamente.", borda='#')
 
-main()
+if __name__ == "__main__":
+    main()
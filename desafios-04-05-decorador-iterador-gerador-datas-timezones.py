@@ -3,54 +3,516 @@
 # V3 - Modelando sistema com Programação Orientada a objeto (POO).
 # V4 - Sistema Bancário com POO, Decoradores, Iterador, Gerador, Datas, TimeZones.
 
+import atexit
+import gc
+import mmap
+import os
+import shlex
+import struct
+import sys
+import threading
+import time
+import zlib
 from abc import ABC, abstractmethod
-from datetime import datetime
-from pytz import timezone, all_timezones
-from collections import defaultdict
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache, wraps
+from itertools import chain, islice, starmap
+from collections import Counter, defaultdict, deque, namedtuple
 
 
-# TZ default utilizado pelo sistema
-TIMEZONE_ATUAL = timezone("America/Sao_Paulo")
+AGENCIA = "0001"
 
-# Decorador de log
+# TZ default utilizado pelo sistema; o pytz só é carregado no primeiro uso
+NOME_TIMEZONE_PADRAO = "America/Sao_Paulo"
+TIMEZONE_ATUAL = None
+
+@lru_cache(maxsize=None)
+def obter_timezone(nome):
+    from pytz import timezone
+    return timezone(nome)
+
+def get_timezone_atual():
+    global TIMEZONE_ATUAL
+    if TIMEZONE_ATUAL is None:
+        TIMEZONE_ATUAL = obter_timezone(NOME_TIMEZONE_PADRAO)
+    return TIMEZONE_ATUAL
+
+# Instantes das transições (mudança de offset) de um fuso, em epoch
+EPOCA = datetime(1970, 1, 1)
+SEM_TRANSICAO = 1 << 62
+
+@lru_cache(maxsize=None)
+def transicoes_timezone(fuso):
+    utc = getattr(fuso, "_utc_transition_times", None)
+    if utc is None:
+        return None
+    return [int((t - EPOCA).total_seconds()) for t in utc]
+
+# Relógio do sistema: instantes são inteiros (epoch, em segundos); o dia local
+# e o offset UTC ficam em cache até a meia-noite ou a próxima transição do fuso
+class Relogio:
+    def __init__(self):
+        # (fuso, início, fim, offset, dia): trocado de uma vez, para que threads
+        # concorrentes nunca vejam um intervalo com o dia de outro
+        self._cache = (None, 0, 0, 0, None)
+        self._ultimo_instante = 0
+
+    def agora(self):
+        # Dentro do mesmo segundo devolve o mesmo objeto int: os registros
+        # desse segundo compartilham o instante em vez de guardar uma cópia cada
+        instante = int(time.time())
+        if instante != self._ultimo_instante:
+            self._ultimo_instante = instante
+        return self._ultimo_instante
+
+    def _situar(self, instante):
+        fuso = get_timezone_atual()
+        cache = self._cache
+        if fuso is cache[0] and cache[1] <= instante < cache[2]:
+            return cache
+        momento = datetime.fromtimestamp(instante, fuso)
+        decorrido = momento.hour * 3600 + momento.minute * 60 + momento.second
+        transicoes = transicoes_timezone(fuso)
+        if transicoes is None:
+            if fuso.utcoffset(momento.replace(tzinfo=None)) == fuso.utcoffset(None):
+                # Fuso de offset fixo
+                anterior, proxima = -SEM_TRANSICAO, SEM_TRANSICAO
+            else:
+                # tzinfo sem tabela de transições: revalida a cada hora
+                anterior, proxima = instante - instante % 3600, instante - instante % 3600 + 3600
+        else:
+            posicao = bisect_right(transicoes, instante)
+            anterior = transicoes[posicao - 1] if posicao else -SEM_TRANSICAO
+            proxima = transicoes[posicao] if posicao < len(transicoes) else SEM_TRANSICAO
+        self._cache = cache = (
+            fuso,
+            max(instante - decorrido, anterior),
+            min(instante - decorrido + 86400, proxima),
+            int(momento.utcoffset().total_seconds()),
+            momento.date(),
+        )
+        return cache
+
+    def dia(self, instante=None):
+        if instante is None:
+            instante = self.agora()
+        return self._situar(instante)[4]
+
+    def momento(self, instante=None):
+        if instante is None:
+            instante = self.agora()
+        return datetime.fromtimestamp(instante, get_timezone_atual())
+
+    def formatar(self, instante, formato="%d-%m-%Y %H:%M:%S"):
+        # Dentro do intervalo em cache, basta somar o offset; fora dele (extratos
+        # antigos) o cache não é trocado
+        fuso, inicio, fim, offset, _ = self._cache
+        if fuso is get_timezone_atual() and inicio <= instante < fim:
+            return (EPOCA + timedelta(seconds=instante + offset)).strftime(formato)
+        return self.momento(instante).strftime(formato)
+
+# Relógio parado, para testes e reprocessamentos
+class RelogioCongelado(Relogio):
+    def __init__(self, instante):
+        super().__init__()
+        self.instante = int(instante)
+
+    def agora(self):
+        return self.instante
+
+    def avancar(self, segundos):
+        self.instante += int(segundos)
+
+RELOGIO = Relogio()
+
+def configurar_relogio(relogio):
+    global RELOGIO
+    RELOGIO = relogio
+
+# Valores monetários: centavos inteiros internamente, Decimal na interface
+CENTAVO = Decimal("0.01")
+
+def para_centavos(valor):
+    if type(valor) is int:
+        return valor * 100
+    try:
+        if not isinstance(valor, Decimal):
+            valor = Decimal(str(valor))
+        if not valor.is_finite():
+            raise ValueError(f"Valor monetário inválido: {valor}")
+        return int(valor.quantize(CENTAVO, rounding=ROUND_HALF_UP).scaleb(2))
+    except InvalidOperation:
+        # Texto que não é número ou valor grande demais para a precisão do
+        # Decimal (ex.: 1e30)
+        raise ValueError(f"Valor monetário inválido: {valor}")
+
+def para_reais(centavos):
+    return Decimal(centavos).scaleb(-2)
+
+def formatar_centavos(centavos):
+    # Como f"{para_reais(centavos):.2f}", sem passar por Decimal nos não negativos
+    if centavos >= 0:
+        return f"{centavos // 100}.{centavos % 100:02d}"
+    return f"{para_reais(centavos):.2f}"
+
+# Decorador de log; com a AUDITORIA configurada, cada chamada também gera um
+# registro (operação, CPF, conta, desfecho, latência) gravado em segundo plano
 def log_transacao(func):
+    operacao = func.__name__
+
+    @wraps(func)
     def envelope(*args, **kwargs):
-        resultado = func(*args, **kwargs)
-        texto_log = f"{get_horario_atual().strftime('%d-%m-%Y %H:%M:%S')}: {func.__name__.upper()} executada."
-        mostrar_moldura(texto_log, borda='=')
+        auditoria = AUDITORIA
+        if auditoria is None:
+            resultado = func(*args, **kwargs)
+            notificar(EventoLog(operacao, RELOGIO.agora()))
+            return resultado
+
+        anterior = getattr(CONTEXTO_OPERACAO, "campos", None)
+        campos = CONTEXTO_OPERACAO.campos = {}
+        resultado = erro = None
+        inicio = time.perf_counter_ns()
+        try:
+            resultado = func(*args, **kwargs)
+        except Exception as e:
+            erro = e
+            raise
+        finally:
+            latencia = time.perf_counter_ns() - inicio
+            CONTEXTO_OPERACAO.campos = anterior
+            instante = RELOGIO.agora()
+            auditoria.registrar(operacao, instante, campos, resultado, erro, latencia)
+        notificar(EventoLog(operacao, instante))
         return resultado
     return envelope
 
+# Campos da operação em andamento (CPF, conta, motivo da falha), preenchidos
+# pela própria operação com anotar_operacao
+CONTEXTO_OPERACAO = threading.local()
+
+def anotar_operacao(**campos):
+    atuais = getattr(CONTEXTO_OPERACAO, "campos", None)
+    if atuais is not None:
+        atuais.update(campos)
+
+# Grava os registros de auditoria em JSON lines, em lotes, numa thread própria;
+# o arquivo é rotacionado ao passar de tamanho_maximo
+class AuditoriaAssincrona:
+    def __init__(self, caminho, capacidade=10_000, lote=512, intervalo=0.2, tamanho_maximo=16 * 1024 * 1024, arquivos_mantidos=5):
+        self.caminho = caminho
+        self.capacidade = capacidade
+        self.lote = lote
+        self.intervalo = intervalo
+        self.tamanho_maximo = tamanho_maximo
+        self.arquivos_mantidos = arquivos_mantidos
+        # deque.append é atômico: quem registra não disputa lock no caminho comum
+        self._pendentes = deque()
+        self._acordar = threading.Event()
+        self._liberado = threading.Condition()
+        self._arquivo = open(caminho, "a", encoding="utf-8")
+        self._tamanho = self._arquivo.tell()
+        self._encerrar = False
+        self._fechada = False
+        self._thread = threading.Thread(target=self._escrever, name="auditoria", daemon=True)
+        self._thread.start()
+        atexit.register(self.fechar)
+
+    def registrar(self, *registro):
+        pendentes = self._pendentes
+        pendentes.append(registro)
+        if len(pendentes) >= self.lote:
+            self._acordar.set()
+            # Com a fila cheia, quem registra espera o escritor (contrapressão)
+            # em vez de descartar registros
+            if len(pendentes) >= self.capacidade:
+                with self._liberado:
+                    while len(pendentes) >= self.capacidade and self._thread.is_alive():
+                        self._liberado.wait(self.intervalo)
+
+    def _escrever(self):
+        import json
+        codificar = json.JSONEncoder(ensure_ascii=False).encode
+        pendentes = self._pendentes
+        while True:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            encerrar = self._encerrar
+            linhas = []
+            while pendentes:
+                linhas.append(codificar(self._montar(*pendentes.popleft())) + "\n")
+            if linhas:
+                texto = "".join(linhas)
+                self._arquivo.write(texto)
+                self._arquivo.flush()
+                self._tamanho += len(texto.encode("utf-8"))
+                if self._tamanho >= self.tamanho_maximo:
+                    self._rotacionar()
+            with self._liberado:
+                self._liberado.notify_all()
+            if encerrar:
+                return
+
+    @staticmethod
+    def _montar(operacao, instante, campos, resultado, erro, latencia):
+        if erro is not None:
+            desfecho, mensagem = "erro", f"{type(erro).__name__}: {erro}"
+        elif isinstance(resultado, Resultado):
+            desfecho, mensagem = ("sucesso" if resultado.sucesso else "falha"), resultado.mensagem
+        elif "motivo" in campos:
+            desfecho, mensagem = "falha", campos["motivo"]
+        else:
+            desfecho, mensagem = "sucesso", None
+        return {
+            "instante": instante,
+            "operacao": operacao,
+            "cpf": campos.get("cpf"),
+            "conta": campos.get("conta"),
+            "desfecho": desfecho,
+            "mensagem": mensagem,
+            "latencia_us": round(latencia / 1000, 1),
+        }
+
+    def _rotacionar(self):
+        # caminho -> caminho.1 -> caminho.2 ...; o mais antigo é descartado
+        self._arquivo.close()
+        for indice in range(self.arquivos_mantidos - 1, 0, -1):
+            origem = f"{self.caminho}.{indice}"
+            if os.path.exists(origem):
+                os.replace(origem, f"{self.caminho}.{indice + 1}")
+        os.replace(self.caminho, f"{self.caminho}.1")
+        self._arquivo = open(self.caminho, "a", encoding="utf-8")
+        self._tamanho = 0
+
+    def fechar(self):
+        if self._fechada:
+            return
+        self._fechada = True
+        self._encerrar = True
+        self._acordar.set()
+        self._thread.join()
+        self._arquivo.close()
+
+AUDITORIA = None
+
+def configurar_auditoria(auditoria):
+    global AUDITORIA
+    if AUDITORIA is not None:
+        AUDITORIA.fechar()
+    AUDITORIA = auditoria
+
+# Métricas de latência por operação em histogramas log-lineares (estilo HDR):
+# cada potência de 2, em nanossegundos, é dividida em 2**BITS_SUBFAIXA faixas
+# iguais, o que limita o erro relativo a 1/8
+BITS_SUBFAIXA = 3
+
+def indice_faixa(ns):
+    expoente = ns.bit_length()
+    if expoente <= BITS_SUBFAIXA + 1:
+        return ns
+    subfaixa = (ns >> (expoente - 1 - BITS_SUBFAIXA)) & ((1 << BITS_SUBFAIXA) - 1)
+    return ((expoente - BITS_SUBFAIXA) << BITS_SUBFAIXA) + subfaixa
+
+def limite_faixa(indice):
+    # Primeiro valor acima da faixa
+    if indice < 2 << BITS_SUBFAIXA:
+        return indice + 1
+    deslocamento = (indice >> BITS_SUBFAIXA) - 1
+    return ((1 << BITS_SUBFAIXA) + (indice & ((1 << BITS_SUBFAIXA) - 1)) + 1) << deslocamento
+
+class HistogramaLatencia:
+    def __init__(self):
+        self.contagens = [0] * (64 << BITS_SUBFAIXA)
+        self.total = 0
+        self.soma = 0
+        self.maximo = 0
+
+    def registrar(self, ns):
+        self.contagens[indice_faixa(ns)] += 1
+        self.total += 1
+        self.soma += ns
+        if ns > self.maximo:
+            self.maximo = ns
+
+    def faixas(self):
+        # (limite da faixa, contagem acumulada) das faixas ocupadas
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            if contagem:
+                acumulado += contagem
+                yield limite_faixa(indice), acumulado
+
+    def percentil(self, p):
+        alvo = -(-self.total * p // 100)
+        for limite, acumulado in self.faixas():
+            if acumulado >= alvo:
+                return min(limite - 1, self.maximo)
+        return 0
+
+def rotulo_prometheus(texto):
+    return str(texto).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Metricas:
+    def __init__(self):
+        self.latencias = defaultdict(HistogramaLatencia)
+        self.falhas = Counter()
+
+    def registrar(self, operacao, ns, motivo=None):
+        self.latencias[operacao].registrar(ns)
+        if motivo is not None:
+            self.falhas[operacao, motivo] += 1
+
+    def exportar_prometheus(self):
+        nome = "banco_operacao_duracao_segundos"
+        linhas = [
+            f"# HELP {nome} Latência das operações bancárias.",
+            f"# TYPE {nome} histogram",
+        ]
+        for operacao, histograma in sorted(self.latencias.items()):
+            rotulo = f'operacao="{rotulo_prometheus(operacao)}"'
+            for limite, acumulado in histograma.faixas():
+                linhas.append(f'{nome}_bucket{{{rotulo},le="{(limite - 1) / 1e9:.9g}"}} {acumulado}')
+            linhas.append(f'{nome}_bucket{{{rotulo},le="+Inf"}} {histograma.total}')
+            linhas.append(f"{nome}_sum{{{rotulo}}} {histograma.soma / 1e9:.9g}")
+            linhas.append(f"{nome}_count{{{rotulo}}} {histograma.total}")
+        linhas += [
+            "# HELP banco_operacao_falhas_total Falhas das operações bancárias por motivo.",
+            "# TYPE banco_operacao_falhas_total counter",
+        ]
+        for (operacao, motivo), total in sorted(self.falhas.items()):
+            linhas.append(f'banco_operacao_falhas_total{{operacao="{rotulo_prometheus(operacao)}",motivo="{rotulo_prometheus(motivo)}"}} {total}')
+        return "\n".join(linhas) + "\n"
+
+    def gravar(self, caminho):
+        # Troca atômica, para quem lê o arquivo nunca ver um snapshot pela metade
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            arquivo.write(self.exportar_prometheus())
+        os.replace(temporario, caminho)
+
+METRICAS = Metricas()
+
+def configurar_metricas(metricas):
+    global METRICAS
+    METRICAS = metricas
+
+def gravar_metricas():
+    # Com BANCO_XYZ_METRICAS definido, o snapshot vai para esse arquivo
+    caminho = os.environ.get("BANCO_XYZ_METRICAS")
+    if caminho and METRICAS is not None:
+        METRICAS.gravar(caminho)
+        return caminho
+    return None
+
+# Decorador de instrumentação: mede a latência e conta o motivo da falha
+# anotado pela operação (ou o tipo da exceção)
+def medir_operacao(func):
+    operacao = func.__name__
+
+    @wraps(func)
+    def envelope(*args, **kwargs):
+        metricas = METRICAS
+        if metricas is None:
+            return func(*args, **kwargs)
+
+        anterior = getattr(CONTEXTO_OPERACAO, "campos", None)
+        campos = CONTEXTO_OPERACAO.campos = {}
+        erro = None
+        inicio = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            erro = type(e).__name__
+            raise
+        finally:
+            latencia = time.perf_counter_ns() - inicio
+            CONTEXTO_OPERACAO.campos = anterior
+            if anterior is not None:
+                anterior.update(campos)
+            metricas.registrar(operacao, latencia, erro or campos.get("motivo"))
+    return envelope
+
+# Captura de perfil (cProfile + tracemalloc), ligada e desligada em tempo de
+# execução pelo menu oculto PF
+class CapturaPerfil:
+    def __init__(self, diretorio="."):
+        import cProfile
+        import tracemalloc
+        self.diretorio = diretorio
+        tracemalloc.start()
+        self._perfil = cProfile.Profile()
+        self._perfil.enable()
+
+    def encerrar(self):
+        import tracemalloc
+        self._perfil.disable()
+        memoria = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        carimbo = time.strftime("%Y%m%d-%H%M%S")
+        caminho_perfil = os.path.join(self.diretorio, f"perfil-{carimbo}.prof")
+        caminho_memoria = os.path.join(self.diretorio, f"memoria-{carimbo}.txt")
+        self._perfil.dump_stats(caminho_perfil)
+        with open(caminho_memoria, "w", encoding="utf-8") as arquivo:
+            for estatistica in memoria.statistics("lineno")[:50]:
+                arquivo.write(f"{estatistica}\n")
+        return caminho_perfil, caminho_memoria
+
+CAPTURA_PERFIL = None
+
+def alternar_perfil():
+    global CAPTURA_PERFIL
+    if CAPTURA_PERFIL is None:
+        CAPTURA_PERFIL = CapturaPerfil(os.environ.get("BANCO_XYZ_PERFIL", "."))
+        mostrar_moldura("Captura de perfil iniciada.", borda='=')
+        return
+    caminhos = list(CAPTURA_PERFIL.encerrar())
+    CAPTURA_PERFIL = None
+    metricas = gravar_metricas()
+    if metricas:
+        caminhos.append(metricas)
+    mostrar_moldura_multilinha(["Captura de perfil encerrada:"] + caminhos, borda='=')
+
 # Molduras visuais personalizadas
 def calcular_largura_ideal(linhas, largura_minima=45, padding=8):
     comprimento_max = max(len(l.strip()) for l in linhas)
     return max(comprimento_max, largura_minima) + padding
 
+# Bordas e linhas vazias são montadas uma única vez por (borda, largura)
+@lru_cache(maxsize=None)
+def partes_moldura(borda, largura):
+    lateral = borda * 4
+    return borda * (largura + 8), lateral + " " * largura + lateral, lateral
+
+def linha_moldura(texto, lateral, largura):
+    espaco_esq = (largura - len(texto)) // 2
+    espaco_dir = largura - len(texto) - espaco_esq
+    return f"{lateral}{' ' * espaco_esq}{texto}{' ' * espaco_dir}{lateral}"
+
+# Cada moldura é montada em um buffer e escrita com um único write
 def mostrar_moldura(texto, borda='=', largura=None):
     if largura is None:
         largura = calcular_largura_ideal([texto])
-    print("\n")
-    print(borda * (largura + 8))
-    print(borda * 4 + " " * largura + borda * 4)
-    espaco_esq = (largura - len(texto)) // 2
-    espaco_dir = largura - len(texto) - espaco_esq
-    print(borda * 4 + " " * espaco_esq + texto + " " * espaco_dir + borda * 4)
-    print(borda * 4 + " " * largura + borda * 4)
-    print(borda * (largura + 8))
-    print("\n")
+    cheia, vazia, lateral = partes_moldura(borda, largura)
+    sys.stdout.write(f"\n\n{cheia}\n{vazia}\n{linha_moldura(texto, lateral, largura)}\n{vazia}\n{cheia}\n\n\n")
 
-def mostrar_moldura_multilinha(linhas, borda='@', largura=None):
+def mostrar_moldura_multilinha(linhas, borda='@', largura=None, tamanho_bloco=None):
+    # Com tamanho_bloco, as linhas são escritas em blocos à medida que são
+    # consumidas (modo streaming); informe a largura para não materializar tudo
     if largura is None:
+        linhas = list(linhas)
         largura = calcular_largura_ideal(linhas)
-    print("\n" + borda * (largura + 8))
-    print(borda * 4 + " " * largura + borda * 4)
+    cheia, vazia, lateral = partes_moldura(borda, largura)
+    escrever = sys.stdout.write
+    buffer = [f"\n{cheia}\n{vazia}\n"]
     for linha in linhas:
-        linha = linha.strip()
-        espaco_esq = (largura - len(linha)) // 2
-        espaco_dir = largura - len(linha) - espaco_esq
-        print(borda * 4 + " " * espaco_esq + linha + " " * espaco_dir + borda * 4)
-    print(borda * 4 + " " * largura + borda * 4)
-    print(borda * (largura + 8) + "\n")
+        buffer.append(linha_moldura(linha.strip(), lateral, largura) + "\n")
+        if tamanho_bloco and len(buffer) >= tamanho_bloco:
+            escrever("".join(buffer))
+            buffer.clear()
+    buffer.append(f"{vazia}\n{cheia}\n\n")
+    escrever("".join(buffer))
 
 #def mostrar_aviso_legal(limite, limite_saques, numero_saques):
     #linhas = [
@@ -62,18 +524,65 @@ def mostrar_moldura_multilinha(linhas, borda='@', largura=None):
     #mostrar_moldura_multilinha(linhas, borda='=')
 
 def mostrar_menu_moldurado(linhas, borda='=', largura_total=84, largura_conteudo=50):
-    print("\n" + borda * (largura_total))
-    margem = (largura_total - largura_conteudo - 8) // 2
-    for linha in linhas:
-        texto = linha.strip()
-        texto_formatado = texto.ljust(largura_conteudo)
-        print(f"{borda*4}{' ' * margem}{texto_formatado}{' ' * margem}{borda*4}")
-    print(borda * (largura_total))
-    print()
+    cheia = borda * largura_total
+    margem = " " * ((largura_total - largura_conteudo - 8) // 2)
+    lateral = borda * 4
+    corpo = "".join(f"{lateral}{margem}{linha.strip().ljust(largura_conteudo)}{margem}{lateral}\n" for linha in linhas)
+    sys.stdout.write(f"\n{cheia}\n{corpo}{cheia}\n\n")
+
+# Resultados e eventos do domínio; a apresentação fica a cargo do APRESENTADOR
+class Resultado(namedtuple("Resultado", "sucesso mensagem")):
+    __slots__ = ()
+
+    def __bool__(self):
+        return self.sucesso
+
+class EventoLog(namedtuple("EventoLog", "operacao instante")):
+    __slots__ = ()
+
+    @property
+    def mensagem(self):
+        # Formatado apenas se algum apresentador ler a mensagem
+        return f"{RELOGIO.formatar(self.instante)}: {self.operacao.upper()} executada."
+
+class ApresentadorMoldura:
+    def apresentar(self, evento):
+        if isinstance(evento, EventoLog):
+            mostrar_moldura(evento.mensagem, borda='=')
+        else:
+            mostrar_moldura(evento.mensagem, borda='*' if evento.sucesso else '#')
+
+class ApresentadorSilencioso:
+    def apresentar(self, evento):
+        pass
+
+class ApresentadorBuffer:
+    def __init__(self, destino=None):
+        self.eventos = []
+        self._destino = destino or ApresentadorMoldura()
+
+    def apresentar(self, evento):
+        self.eventos.append(evento)
+
+    def descarregar(self):
+        eventos, self.eventos = self.eventos, []
+        for evento in eventos:
+            self._destino.apresentar(evento)
+
+APRESENTADOR = ApresentadorMoldura()
+
+def configurar_apresentador(apresentador):
+    global APRESENTADOR
+    APRESENTADOR = apresentador
+
+def notificar(evento):
+    APRESENTADOR.apresentar(evento)
+    return evento
 
 # Montar o mapa completo de timezones categorizado
 def construir_mapa_timezones():
     categorias = defaultdict(list)
+    from pytz import all_timezones
     for tz in all_timezones:
         if '/' in tz and not tz.startswith("Etc/"):
             regiao = tz.split('/')[0]
@@ -88,24 +597,49 @@ def construir_mapa_timezones():
         mapa_final[letra] = (regiao, grupos_numerados)
     return mapa_final
 
-MAPA_TIMEZONES = construir_mapa_timezones()
+# O mapa só é montado quando o menu TZ é usado. Com BANCO_XYZ_CACHE_TZ
+# apontando para um diretório, ele fica em cache no disco por versão do tzdata
+DIRETORIO_CACHE_TIMEZONES = os.environ.get("BANCO_XYZ_CACHE_TZ") or None
+
+@lru_cache(maxsize=None)
+def obter_mapa_timezones():
+    import json
+    from pytz import OLSON_VERSION
+    caminho = None
+    if DIRETORIO_CACHE_TIMEZONES:
+        caminho = os.path.join(DIRETORIO_CACHE_TIMEZONES, f"timezones-{OLSON_VERSION}.json")
+        try:
+            with open(caminho, encoding="utf-8") as arquivo:
+                return {letra: tuple(grupo) for letra, grupo in json.load(arquivo).items()}
+        except (OSError, ValueError):
+            pass
+    mapa = construir_mapa_timezones()
+    if caminho:
+        try:
+            os.makedirs(DIRETORIO_CACHE_TIMEZONES, exist_ok=True)
+            with open(caminho, "w", encoding="utf-8") as arquivo:
+                json.dump(mapa, arquivo)
+        except OSError:
+            pass
+    return mapa
 
 # Função para configurar TZ via menu oculto
 def configurar_timezone():
     global TIMEZONE_ATUAL
 
     mostrar_moldura("CONFIGURAÇÃO DE TIMEZONE", borda='=')
+    mapa_timezones = obter_mapa_timezones()
     
     print("Categorias disponíveis:")
-    for letra, (regiao, _) in MAPA_TIMEZONES.items():
+    for letra, (regiao, _) in mapa_timezones.items():
         print(f"[{letra.upper()}] {regiao}")
     
     letra = input("Escolha a letra da categoria: ").lower()
-    if letra not in MAPA_TIMEZONES:
+    if letra not in mapa_timezones:
         mostrar_moldura("Categoria inválida!", borda='#')
         return
 
-    regiao, zonas = MAPA_TIMEZONES[letra]
+    regiao, zonas = mapa_timezones[letra]
     print(f"\nTimezones disponíveis na categoria {regiao}:")
     
     for numero, zona in zonas.items():
@@ -122,37 +656,132 @@ def configurar_timezone():
         return
 
     selecionado = zonas[numero]
-    TIMEZONE_ATUAL = timezone(selecionado)
+    TIMEZONE_ATUAL = obter_timezone(selecionado)
     mostrar_moldura(f"Timezone configurado para {selecionado}", borda='*')
 
 # Classes
-class ContasIterador:
-    def __init__(self, contas):
-        self.contas = contas
-        self._index = 0
+class ClienteRegistry:
+    def __init__(self):
+        self._clientes = {}
+        self._contas = {}
+        self._trava = threading.RLock()
+
+    def __len__(self):
+        return len(self._clientes)
 
     def __iter__(self):
-        return self
+        return iter(self._clientes.values())
+
+    def __contains__(self, cpf):
+        return cpf in self._clientes
+
+    def buscar(self, cpf):
+        return self._clientes.get(cpf)
+
+    def adicionar(self, cliente):
+        with self._trava:
+            if cliente.cpf in self._clientes:
+                return False
+            self._clientes[cliente.cpf] = cliente
+            if DIARIO is not None:
+                DIARIO.registrar_cliente(cliente)
+            for conta in cliente.contas:
+                self.adicionar_conta(conta)
+            return True
 
-    def __next__(self):
-        if self._index >= len(self.contas):
-            raise StopIteration
-        conta = self.contas[self._index]
-        self._index += 1
-        return f"Agência: {conta.agencia}\nConta: {conta.numero}\nTitular: {conta.cliente.nome}\nSaldo: R$ {conta.saldo:.2f}"
+    def adicionar_conta(self, conta):
+        with self._trava:
+            self._contas[(conta.agencia, conta.numero)] = conta
+            if DIARIO is not None:
+                DIARIO.registrar_conta(conta)
+
+    @property
+    def contas(self):
+        return self._contas.values()
 
+    def buscar_conta(self, agencia, numero):
+        return self._contas.get((agencia, numero))
+
+# Bloco de cada conta na listagem (LC); o saldo sai direto dos centavos
+TAMANHO_PAGINA_CONTAS = 500
+
+def formatar_conta(conta):
+    return f"Agência: {conta.agencia}\nConta: {conta.numero}\nTitular: {conta.cliente.nome}\nSaldo: R$ {formatar_centavos(conta._saldo)}"
+
+# Critérios de ordenação aceitos por ContasView.ordenar
+CHAVES_CONTAS = {
+    "numero": lambda conta: conta.numero,
+    "saldo": lambda conta: conta._saldo,
+    "titular": lambda conta: conta.cliente.nome.casefold(),
+}
+
+# Visão de acesso aleatório sobre uma lista de contas: len, índices, fatias,
+# ordenação e páginas por cursor. Fatias e ordenações devolvem novas visões
+# (só índices), e as linhas são formatadas apenas quando consumidas
+class ContasView:
+    def __init__(self, contas, indices=None):
+        self._contas = contas
+        # None acompanha a lista original, inclusive contas criadas depois
+        self._indices = indices
+
+    def _posicoes(self):
+        return range(len(self._contas)) if self._indices is None else self._indices
+
+    def __len__(self):
+        return len(self._posicoes())
+
+    def __getitem__(self, posicao):
+        if isinstance(posicao, slice):
+            return ContasView(self._contas, self._posicoes()[posicao])
+        return self._contas[self._posicoes()[posicao]]
+
+    def __iter__(self):
+        if self._indices is None:
+            return iter(self._contas)
+        contas = self._contas
+        return (contas[i] for i in self._indices)
+
+    def ordenar(self, chave="numero", decrescente=False):
+        # As chaves são calculadas uma vez por conta; o resultado guarda só os índices
+        extrair = CHAVES_CONTAS[chave]
+        posicoes = self._posicoes()
+        contas = self._contas
+        chaves = [extrair(contas[i]) for i in posicoes]
+        ordem = sorted(range(len(chaves)), key=chaves.__getitem__, reverse=decrescente)
+        return ContasView(contas, array("q", (posicoes[i] for i in ordem)))
+
+    def pagina(self, cursor=0, tamanho=TAMANHO_PAGINA_CONTAS):
+        # Contas da página e cursor da próxima (None na última)
+        fim = cursor + tamanho
+        return self[cursor:fim], (fim if fim < len(self) else None)
+
+    def paginas(self, tamanho=TAMANHO_PAGINA_CONTAS):
+        cursor = 0
+        while cursor is not None:
+            pagina, cursor = self.pagina(cursor, tamanho)
+            yield pagina
+
+    def linhas(self):
+        return map(formatar_conta, self)
+
+# Classes do domínio com __slots__: sem __dict__ por instância, o que pesa
+# quando há milhões de clientes, contas e transações
 class Cliente:
+    __slots__ = ("endereco", "contas")
+
     def __init__(self, endereco):
         self.endereco = endereco
         self.contas = []
 
     def realizar_transacao(self, conta, transacao):
-        transacao.registrar(conta)
+        return transacao.registrar(conta)
 
     def adicionar_conta(self, conta):
         self.contas.append(conta)
 
 class PessoaFisica(Cliente):
+    __slots__ = ("nome", "data_nascimento", "cpf")
+
     def __init__(self, nome, data_nascimento, cpf, endereco):
         super().__init__(endereco)
         self.nome = nome
@@ -160,12 +789,20 @@ class PessoaFisica(Cliente):
         self.cpf = cpf
 
 class Conta:
+    __slots__ = ("_saldo", "_numero", "_agencia", "_cliente", "_historico", "_trava")
+    # Backend do histórico; HistoricoCompacto guarda as transações em arrays
+    classe_historico = None
+    # Quanto o saque pode levar o saldo abaixo de zero (cheque especial)
+    _cheque_especial_centavos = 0
+
     def __init__(self, numero, cliente):
         self._saldo = 0
         self._numero = numero
-        self._agencia = "0001"
+        self._agencia = AGENCIA
         self._cliente = cliente
-        self._historico = Historico()
+        self._historico = (self.classe_historico or Historico)(numero)
+        # Saldo e histórico só mudam com a trava da conta
+        self._trava = threading.RLock()
 
     @classmethod
     def nova_conta(cls, cliente, numero):
@@ -173,7 +810,7 @@ class Conta:
 
     @property
     def saldo(self):
-        return self._saldo
+        return para_reais(self._saldo)
 
     @property
     def numero(self):
@@ -192,102 +829,1369 @@ class Conta:
         return self._historico
 
     def sacar(self, valor):
-        if valor <= 0:
-            mostrar_moldura("Operacao falhou! Valor invalido.", borda='#')
-            return False
-        if valor > self._saldo:
-            mostrar_moldura("Operacao falhou! Saldo insuficiente.", borda='#')
-            return False
-        self._saldo -= valor
-        mostrar_moldura("Saque realizado com sucesso!", borda='*')
-        return True
+        return self.sacar_centavos(para_centavos(valor))
+
+    def sacar_centavos(self, centavos):
+        motivo = self._aplicar_saque(centavos)
+        if motivo:
+            anotar_operacao(motivo=motivo)
+            return notificar(Resultado(False, f"Operacao falhou! {motivo}."))
+        return notificar(Resultado(True, "Saque realizado com sucesso!"))
 
     def depositar(self, valor):
-        if valor <= 0:
-            mostrar_moldura("Operacao falhou! Valor invalido.", borda='#')
-            return False
-        self._saldo += valor
-        mostrar_moldura("Deposito realizado com sucesso!", borda='*')
-        return True
+        return self.depositar_centavos(para_centavos(valor))
+
+    def depositar_centavos(self, centavos):
+        motivo = self._aplicar_deposito(centavos)
+        if motivo:
+            anotar_operacao(motivo=motivo)
+            return notificar(Resultado(False, f"Operacao falhou! {motivo}."))
+        return notificar(Resultado(True, "Deposito realizado com sucesso!"))
+
+    # Validação e aplicação sem saída no terminal: devolvem o motivo da
+    # recusa ou None quando a operação foi aplicada
+    def _validar_saque(self, centavos):
+        if centavos <= 0:
+            return "Valor invalido"
+        if centavos > self._saldo + self._cheque_especial_centavos:
+            return "Saldo insuficiente"
+        return None
+
+    def _aplicar_saque(self, centavos):
+        motivo = self._validar_saque(centavos)
+        if motivo is None:
+            self._saldo -= centavos
+        return motivo
+
+    def _aplicar_deposito(self, centavos):
+        if centavos <= 0:
+            return "Valor invalido"
+        self._saldo += centavos
+        return None
 
 class ContaCorrente(Conta):
+    __slots__ = ("_limite", "_limite_centavos")
+
     def __init__(self, numero, cliente, limite=500, limite_saques=3):
         super().__init__(numero, cliente)
         self._limite = limite
+        self._limite_centavos = para_centavos(limite)
         #self._limite_saques = limite_saques
 
-    def sacar(self, valor):
-        numero_saques = len([
-            t for t in self.historico.transacoes if t["tipo"] == "Saque"
-        ])
-        if valor > self._limite:
-            mostrar_moldura("Operacao falhou! Valor excede limite.", borda='#')
-            return False
+    def _validar_saque(self, centavos):
+        #numero_saques = self.historico.transacoes_hoje("Saque")
+        if centavos > self._limite_centavos:
+            return "Valor excede limite"
         #if numero_saques >= self._limite_saques:
-            #mostrar_moldura("Operacao falhou! Limite de saques excedido.", borda='#')
-            #return False
-        return super().sacar(valor)
+            #return "Limite de saques excedido"
+        return super()._validar_saque(centavos)
+
+# Conta corrente com cheque especial: o saldo pode ficar negativo até o
+# limite contratado e paga encargo no fechamento mensal
+class ContaChequeEspecial(ContaCorrente):
+    __slots__ = ("_cheque_especial", "_cheque_especial_centavos")
+
+    def __init__(self, numero, cliente, cheque_especial=1000, limite=500, limite_saques=3):
+        super().__init__(numero, cliente, limite, limite_saques)
+        self._cheque_especial = cheque_especial
+        self._cheque_especial_centavos = para_centavos(cheque_especial)
+
+    @classmethod
+    def nova_conta(cls, cliente, numero, cheque_especial=1000):
+        return cls(numero, cliente, cheque_especial)
+
+    @property
+    def cheque_especial(self):
+        return self._cheque_especial
+
+# Transação registrada; valor e data só são convertidos quando lidos, e o
+# acesso no formato antigo (t["tipo"], t["valor"], t["data"]) continua valendo.
+# contraparte é o número da outra conta nas entradas de uma transferência
+class RegistroTransacao(namedtuple("RegistroTransacao", "tipo centavos instante contraparte", defaults=(None,))):
+    __slots__ = ()
+
+    @property
+    def valor(self):
+        return para_reais(self.centavos)
+
+    @property
+    def data(self):
+        return RELOGIO.formatar(self.instante)
+
+    def __getitem__(self, chave):
+        if isinstance(chave, str):
+            return getattr(self, chave)
+        return tuple.__getitem__(self, chave)
+
+# Índices de um histórico, atualizados a cada transação armazenada: posições
+# por tipo, faixas de posições por dia e resumos diários por (dia, tipo)
+class IndiceHistorico:
+    __slots__ = ("total", "posicoes_tipo", "dias", "inicio_dia", "resumo_dia", "cronologico", "_dia", "_ordinal")
+
+    def __init__(self, inicio=0):
+        # inicio: posição da primeira transação indexada (as anteriores estão em segmentos)
+        self.total = inicio
+        self.posicoes_tipo = {}
+        # Cada dia ocupa uma faixa contígua de posições, a partir de inicio_dia[k]
+        self.dias = array("l")
+        self.inicio_dia = array("q")
+        # (ordinal do dia, tipo) -> [quantidade, soma, mínimo, máximo], em centavos
+        self.resumo_dia = {}
+        # Falso se o relógio voltou para um dia anterior (dias fora de ordem)
+        self.cronologico = True
+        self._dia = None
+        self._ordinal = None
+
+    def adicionar(self, tipo, centavos, dia):
+        posicao = self.total
+        self.total += 1
+        posicoes = self.posicoes_tipo.get(tipo)
+        if posicoes is None:
+            posicoes = self.posicoes_tipo[tipo] = array("q")
+        posicoes.append(posicao)
+
+        if dia != self._dia:
+            self._dia = dia
+            self._ordinal = dia.toordinal()
+            if self.dias and self._ordinal < self.dias[-1]:
+                self.cronologico = False
+            self.dias.append(self._ordinal)
+            self.inicio_dia.append(posicao)
+
+        resumo = self.resumo_dia.get((self._ordinal, tipo))
+        if resumo is None:
+            self.resumo_dia[self._ordinal, tipo] = [1, centavos, centavos, centavos]
+        else:
+            resumo[0] += 1
+            resumo[1] += centavos
+            if centavos < resumo[2]:
+                resumo[2] = centavos
+            elif centavos > resumo[3]:
+                resumo[3] = centavos
+
+    def faixas_dias(self, de=None, ate=None):
+        # (ordinal, primeira posição, posição final) dos dias entre de e ate (ordinais inclusivos)
+        k0, k1 = 0, len(self.dias)
+        if self.cronologico:
+            if de is not None:
+                k0 = bisect_left(self.dias, de)
+            if ate is not None:
+                k1 = bisect_right(self.dias, ate)
+        for k in range(k0, k1):
+            ordinal = self.dias[k]
+            if (de is not None and ordinal < de) or (ate is not None and ordinal > ate):
+                continue
+            fim = self.inicio_dia[k + 1] if k + 1 < len(self.dias) else self.total
+            yield ordinal, self.inicio_dia[k], fim
+
+    def resumos(self, ordinal, tipo=None):
+        if tipo is not None:
+            resumo = self.resumo_dia.get((ordinal, tipo))
+            return [resumo] if resumo else []
+        return [r for r in (self.resumo_dia.get((ordinal, t)) for t in self.tipos()) if r]
+
+    def tipos(self):
+        return self.posicoes_tipo.keys()
+
+    def posicoes(self, tipo, inicio, fim):
+        # Posições do tipo em [inicio, fim); None = a faixa inteira
+        if tipo is None:
+            return None
+        posicoes = self.posicoes_tipo.get(tipo, ())
+        return posicoes[bisect_left(posicoes, inicio):bisect_left(posicoes, fim)]
+
+# Índice de um segmento do HistoricoCompacto, remontado do rodapé do arquivo:
+# faixas e resumos por dia, sem as posições por tipo (o tipo é filtrado na leitura)
+class IndiceSegmento(IndiceHistorico):
+    __slots__ = ("_tipos",)
+
+    def __init__(self, inicio, quantidade, faixas, resumos):
+        super().__init__(inicio + quantidade)
+        for ordinal, posicao in faixas:
+            if self.dias and ordinal < self.dias[-1]:
+                self.cronologico = False
+            self.dias.append(ordinal)
+            self.inicio_dia.append(inicio + posicao)
+        self._tipos = set()
+        for ordinal, tipo, *resumo in resumos:
+            self.resumo_dia[ordinal, tipo] = resumo
+            self._tipos.add(tipo)
+
+    def tipos(self):
+        return self._tipos
+
+    def posicoes(self, tipo, inicio, fim):
+        return None
+
+Agregado = namedtuple("Agregado", "periodo quantidade soma minimo maximo")
+
+def restringir(escolher, novo, atual):
+    if novo is None:
+        return atual
+    return novo if atual is None else escolher(novo, atual)
+
+# Consulta sobre o histórico de uma conta; filtrar() devolve uma nova consulta
+# com os filtros combinados: o período (datas inclusivas) e a faixa de valor se
+# estreitam, e o tipo informado substitui o anterior
+class ConsultaHistorico:
+    def __init__(self, historico, tipo=None, inicio=None, fim=None, minimo=None, maximo=None):
+        self._historico = historico
+        self.tipo = tipo
+        self.inicio = inicio
+        self.fim = fim
+        self.minimo = minimo
+        self.maximo = maximo
+
+    def filtrar(self, tipo=None, inicio=None, fim=None, minimo=None, maximo=None):
+        return ConsultaHistorico(
+            self._historico,
+            tipo if tipo is not None else self.tipo,
+            restringir(max, inicio, self.inicio),
+            restringir(min, fim, self.fim),
+            restringir(max, None if minimo is None else para_centavos(minimo), self.minimo),
+            restringir(min, None if maximo is None else para_centavos(maximo), self.maximo),
+        )
+
+    def _tipo_indexado(self):
+        # O nome do tipo é comparado sem distinção de caixa uma vez por consulta
+        tipos = self._historico._tipos_indexados()
+        if self.tipo in tipos:
+            return self.tipo
+        tipo = self.tipo.lower()
+        return next((t for t in tipos if t.lower() == tipo), None)
+
+    def _limites(self):
+        return (self.inicio.toordinal() if self.inicio else None,
+                self.fim.toordinal() if self.fim else None)
+
+    def _faixas(self, indice, tipo, de, ate):
+        # Dias do período cujo resumo pode conter valores na faixa pedida
+        for ordinal, inicio, fim in indice.faixas_dias(de, ate):
+            resumos = indice.resumos(ordinal, tipo)
+            if not resumos:
+                continue
+            if self.minimo is not None and max(r[3] for r in resumos) < self.minimo:
+                continue
+            if self.maximo is not None and min(r[2] for r in resumos) > self.maximo:
+                continue
+            yield ordinal, inicio, fim
+
+    def __iter__(self):
+        tipo = None
+        if self.tipo is not None:
+            tipo = self._tipo_indexado()
+            if tipo is None:
+                return
+        valores = None
+        if self.minimo is not None or self.maximo is not None:
+            valores = (
+                self.minimo if self.minimo is not None else -SEM_TRANSICAO,
+                self.maximo if self.maximo is not None else SEM_TRANSICAO,
+            )
+        historico = self._historico
+        de, ate = self._limites()
+        for indice in historico._indices(tipo, de, ate):
+            for _, inicio, fim in self._faixas(indice, tipo, de, ate):
+                yield from historico._registros_faixa(inicio, fim, indice.posicoes(tipo, inicio, fim), valores, tipo)
+
+    def agregar(self, por="dia"):
+        # Agregados por dia ou por mês (periodo = primeiro dia do mês). Sem
+        # filtro de valor, saem direto dos resumos diários, sem reler transações
+        if por not in ("dia", "mes"):
+            raise ValueError(f"Agrupamento inválido: {por}")
+        grupos = {}
+        if self.minimo is None and self.maximo is None:
+            tipo = None
+            if self.tipo is not None:
+                tipo = self._tipo_indexado()
+                if tipo is None:
+                    return []
+            # Um dia que volta (relógio atrasado, troca de fuso, lançamento
+            # retroativo) ocupa mais de uma faixa, mas tem um resumo só em cada
+            # índice; entre segmentos, os resumos do mesmo dia se somam
+            de, ate = self._limites()
+            for indice in self._historico._indices(tipo, de, ate):
+                vistos = set()
+                for ordinal, _, _ in self._faixas(indice, tipo, de, ate):
+                    if ordinal in vistos:
+                        continue
+                    vistos.add(ordinal)
+                    for resumo in indice.resumos(ordinal, tipo):
+                        self._acumular(grupos, ordinal, por, *resumo)
+        else:
+            for registro in self:
+                centavos = registro.centavos
+                self._acumular(grupos, RELOGIO.dia(registro.instante).toordinal(), por, 1, centavos, centavos, centavos)
+        return [
+            Agregado(periodo, quantidade, para_reais(soma), para_reais(minimo), para_reais(maximo))
+            for periodo, (quantidade, soma, minimo, maximo) in sorted(grupos.items())
+        ]
+
+    @staticmethod
+    def _acumular(grupos, ordinal, por, quantidade, soma, minimo, maximo):
+        periodo = date.fromordinal(ordinal)
+        if por == "mes":
+            periodo = periodo.replace(day=1)
+        grupo = grupos.get(periodo)
+        if grupo is None:
+            grupos[periodo] = [quantidade, soma, minimo, maximo]
+        else:
+            grupo[0] += quantidade
+            grupo[1] += soma
+            grupo[2] = min(grupo[2], minimo)
+            grupo[3] = max(grupo[3], maximo)
+
+# Trava várias contas sempre na ordem (agencia, numero): duas operações que
+# envolvem as mesmas contas em sentidos opostos não se bloqueiam mutuamente
+def chave_trava(conta):
+    return conta.agencia, conta.numero
+
+class TravaContas:
+    def __init__(self, *contas):
+        if len(contas) == 2:
+            # Caso das transferências, sem dicionário nem sort
+            primeira, segunda = contas
+            if primeira is segunda:
+                contas = (primeira,)
+            elif chave_trava(segunda) < chave_trava(primeira):
+                contas = (segunda, primeira)
+            self._travas = [conta._trava for conta in contas]
+            return
+        unicas = {id(conta): conta for conta in contas}.values()
+        self._travas = [conta._trava for conta in sorted(unicas, key=chave_trava)]
+
+    def __enter__(self):
+        for trava in self._travas:
+            trava.acquire()
+        return self
+
+    def __exit__(self, *excecao):
+        for trava in reversed(self._travas):
+            trava.release()
 
 class Historico:
-    def __init__(self):
+    __slots__ = ("_numero_conta", "_transacoes", "_dia_atual", "_total_dia", "_contagem_dia", "_indice")
+    LIMITE_DIARIO = 10
+    # Lançamentos do fechamento mensal não contam no limite diário do cliente
+    TIPOS_FORA_DO_LIMITE = frozenset(("Juros", "Tarifa", "Encargo"))
+
+    def __init__(self, numero_conta=None):
+        self._numero_conta = numero_conta
         self._transacoes = []
+        # Contadores do dia corrente (no TIMEZONE_ATUAL), zerados na virada do dia
+        self._dia_atual = None
+        self._total_dia = 0
+        self._contagem_dia = defaultdict(int)
+        self._indice = IndiceHistorico()
 
     @property
     def transacoes(self):
         return self._transacoes
 
+    def _virar_dia(self, dia):
+        if dia != self._dia_atual:
+            self._dia_atual = dia
+            self._total_dia = 0
+            self._contagem_dia = defaultdict(int)
+
+    def transacoes_hoje(self, tipo=None):
+        # Só leitura: a virada do dia fica com quem registra. Contadores de
+        # outro dia valem zero hoje
+        if RELOGIO.dia() != self._dia_atual:
+            return 0
+        if tipo is None:
+            return self._total_dia
+        return self._contagem_dia.get(tipo, 0)
+
+    def excedeu_limite(self):
+        return self.transacoes_hoje() >= self.LIMITE_DIARIO
+
     def adicionar_transacao(self, transacao):
-        hoje = get_horario_atual().strftime("%d-%m-%Y")
-        transacoes_hoje = [t for t in self._transacoes if t["data"].startswith(hoje)]
+        instante = RELOGIO.agora()
+        self._virar_dia(RELOGIO.dia(instante))
+
+        if self._total_dia >= self.LIMITE_DIARIO:
+            anotar_operacao(motivo="Limite diário de transações atingido")
+            return notificar(Resultado(False, "Limite diário de 10 transações atingido!"))
+
+        self._registrar(transacao, instante)
+        # O registro bem-sucedido não gera aviso próprio
+        return Resultado(True, "Transação registrada no histórico.")
+
+    def _registrar(self, transacao, instante):
+        tipo = transacao.__class__.__name__
+        centavos = transacao.centavos
+        if DIARIO is not None and self._numero_conta is not None:
+            DIARIO.registrar_transacao(self._numero_conta, tipo, transacao.SINAL * centavos, instante)
+        self._incluir(tipo, centavos, instante)
+
+    def _incluir(self, tipo, centavos, instante, contraparte=None):
+        # Entrada já aplicada ao saldo (e já no diário, se houver um)
+        self._armazenar(tipo, centavos, instante, contraparte)
+        self._indice.adicionar(tipo, centavos, self._dia_atual)
+        if tipo not in self.TIPOS_FORA_DO_LIMITE:
+            self._total_dia += 1
+        self._contagem_dia[tipo] += 1
+
+    def _entradas(self):
+        # (tipo, centavos, instante epoch, contraparte) de cada transação, para os snapshots
+        return iter(self._transacoes)
+
+    def _incluir_datado(self, tipo, centavos, instante, dia, contraparte=None):
+        # Entrada com data própria: fora do dia corrente ela vai para o
+        # histórico e para o índice no seu dia, sem mexer nos contadores
+        if dia == self._dia_atual:
+            self._incluir(tipo, centavos, instante, contraparte)
+        else:
+            self._armazenar(tipo, centavos, instante, contraparte)
+            self._indice.adicionar(tipo, centavos, dia)
+
+    def _restaurar(self, tipo, centavos, instante, contraparte=None):
+        # Usado na recuperação: entradas chegam em ordem cronológica, então os
+        # contadores terminam refletindo o último dia visto
+        dia = RELOGIO.dia(instante)
+        if self._dia_atual is None or dia > self._dia_atual:
+            self._virar_dia(dia)
+        self._incluir_datado(tipo, centavos, instante, dia, contraparte)
+
+    def _armazenar(self, tipo, centavos, instante, contraparte=None):
+        self._transacoes.append(RegistroTransacao(tipo, centavos, instante, contraparte))
+
+    def _indices(self, tipo=None, de=None, ate=None):
+        # Índices que cobrem o histórico, em ordem de posição
+        return (self._indice,)
+
+    def _tipos_indexados(self):
+        return self._indice.tipos()
+
+    def _registros_faixa(self, inicio, fim, posicoes=None, valores=None, tipo=None):
+        # Registros das posições [inicio, fim), ou só das posições dadas (em
+        # ordem crescente), com centavos na faixa valores = (mínimo, máximo).
+        # Sem posições, o tipo (se houver) é filtrado aqui
+        transacoes = self._transacoes
+        registros = transacoes[inicio:fim] if posicoes is None else [transacoes[p] for p in posicoes]
+        if posicoes is None and tipo is not None:
+            registros = [r for r in registros if r.tipo == tipo]
+        if valores is None:
+            return registros
+        minimo, maximo = valores
+        return [r for r in registros if minimo <= r.centavos <= maximo]
+
+    def consulta(self):
+        return ConsultaHistorico(self)
+
+    def gerar_relatorio(self, tipo_transacao=None, inicio=None, fim=None):
+        # inicio e fim são datas (date) inclusivas
+        return iter(self.consulta().filtrar(tipo=tipo_transacao, inicio=inicio, fim=fim))
+
+class TransacoesView:
+    # Visão somente leitura sobre as colunas do HistoricoCompacto; os registros
+    # são montados apenas quando cada item é acessado
+    def __init__(self, historico):
+        self._historico = historico
+
+    def __len__(self):
+        return self._historico._quantidade()
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("índice de transação fora do intervalo")
+        return self._historico._montar(*self._historico._campos(indice))
 
-        if len(transacoes_hoje) >= 10:
-            mostrar_moldura("Limite diário de 10 transações atingido!", borda='#')
-            return
+    def __iter__(self):
+        montar = self._historico._montar
+        for campos in self._historico._iterar_campos():
+            yield montar(*campos)
+
+# Dias encerrados de um HistoricoCompacto vão para arquivos de segmento com
+# registros de largura fixa, lidos via mmap. Depois dos registros, um rodapé
+# com as faixas e os resumos de cada dia; em memória fica só o índice do
+# segmento: dias extremos e contagem por tipo
+FORMATO_SEGMENTO = struct.Struct("<BqqI")  # tipo, centavos, instante, contraparte (0 = nenhuma)
+FORMATO_RODAPE = struct.Struct("<II")  # quantidade de faixas, quantidade de resumos
+FORMATO_FAIXA = struct.Struct("<iI")  # ordinal do dia, primeira posição no segmento
+FORMATO_RESUMO = struct.Struct("<iBqqqq")  # ordinal do dia, tipo, quantidade, soma, mínimo, máximo
+
+class SegmentoHistorico:
+    __slots__ = ("caminho", "quantidade", "inicio", "fim", "contagem", "_mapa")
+    _trava_mapas = threading.Lock()
+
+    def __init__(self, caminho, tipos, centavos, instantes, contrapartes, indice):
+        # indice: o IndiceHistorico da parte em memória que está sendo descarregada
+        empacotar = FORMATO_SEGMENTO.pack
+        base = indice.total - len(tipos)
+        codigos = HistoricoCompacto.CODIGOS
+        partes = [empacotar(*campos) for campos in zip(tipos, centavos, instantes, contrapartes)]
+        partes.append(FORMATO_RODAPE.pack(len(indice.dias), len(indice.resumo_dia)))
+        partes.extend(FORMATO_FAIXA.pack(ordinal, posicao - base) for ordinal, posicao in zip(indice.dias, indice.inicio_dia))
+        partes.extend(FORMATO_RESUMO.pack(ordinal, codigos[tipo], *resumo) for (ordinal, tipo), resumo in indice.resumo_dia.items())
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(b"".join(partes))
+        self.caminho = caminho
+        self.quantidade = len(tipos)
+        # Primeiro e último dia (ordinais) e quantidade por tipo: bastam para
+        # descartar o segmento numa consulta sem abrir o arquivo
+        self.inicio = min(indice.dias)
+        self.fim = max(indice.dias)
+        self.contagem = Counter()
+        for (_, tipo), resumo in indice.resumo_dia.items():
+            self.contagem[tipo] += resumo[0]
+        self._mapa = None
+
+    def descartavel(self, tipo, de, ate):
+        return ((tipo is not None and not self.contagem[tipo])
+                or (de is not None and self.fim < de)
+                or (ate is not None and self.inicio > ate))
+
+    def _mapeado(self):
+        # Um mapeamento por segmento, aberto na primeira leitura e mantido até
+        # fechar(); o arquivo em si pode ser fechado logo
+        mapa = self._mapa
+        if mapa is None:
+            with self._trava_mapas:
+                mapa = self._mapa
+                if mapa is None:
+                    with open(self.caminho, "rb") as arquivo:
+                        mapa = self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        return mapa
+
+    def campos(self, indice):
+        return FORMATO_SEGMENTO.unpack_from(self._mapeado(), indice * FORMATO_SEGMENTO.size)
+
+    def ler(self, indices):
+        # Vários registros (índices em ordem crescente)
+        mapa = self._mapeado()
+        desempacotar = FORMATO_SEGMENTO.unpack_from
+        tamanho = FORMATO_SEGMENTO.size
+        for indice in indices:
+            yield desempacotar(mapa, indice * tamanho)
+
+    def __iter__(self):
+        # Sobre uma cópia dos registros: o iterador não segura o buffer do mapeamento
+        return FORMATO_SEGMENTO.iter_unpack(self._mapeado()[:self.quantidade * FORMATO_SEGMENTO.size])
+
+    def indice(self, inicio):
+        # IndiceSegmento com as posições a partir de inicio, lido do rodapé
+        mapa = self._mapeado()
+        deslocamento = self.quantidade * FORMATO_SEGMENTO.size
+        faixas, resumos = FORMATO_RODAPE.unpack_from(mapa, deslocamento)
+        deslocamento += FORMATO_RODAPE.size
+        fim_faixas = deslocamento + faixas * FORMATO_FAIXA.size
+        tipos = HistoricoCompacto.TIPOS
+        return IndiceSegmento(
+            inicio,
+            self.quantidade,
+            FORMATO_FAIXA.iter_unpack(mapa[deslocamento:fim_faixas]),
+            ((ordinal, tipos[codigo], *resumo) for ordinal, codigo, *resumo
+             in FORMATO_RESUMO.iter_unpack(mapa[fim_faixas:fim_faixas + resumos * FORMATO_RESUMO.size])),
+        )
+
+    def fechar(self):
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+
+    def remover(self):
+        self.fechar()
+        os.remove(self.caminho)
+
+class HistoricoCompacto(Historico):
+    __slots__ = ("_tipos", "_centavos", "_instantes", "_contrapartes", "_segmentos", "_em_segmentos", "_inicios_segmentos")
+    # Tipos de transação conhecidos, compartilhados por todos os históricos
+    TIPOS = []
+    CODIGOS = {}
+    # Com um diretório configurado, os dias encerrados saem da memória
+    diretorio_segmentos = None
+
+    def __init__(self, numero_conta=None):
+        super().__init__(numero_conta)
+        self._tipos = array("B")
+        self._centavos = array("q")
+        self._instantes = array("q")
+        self._contrapartes = array("I")
+        self._segmentos = []
+        self._em_segmentos = 0
+        # Posição inicial de cada segmento e, por último, a da parte em memória
+        self._inicios_segmentos = [0]
 
-        self._transacoes.append({
-            "tipo": transacao.__class__.__name__,
-            "valor": transacao.valor,
-            "data": get_horario_atual().strftime("%d-%m-%Y %H:%M:%S")
-        })
+    @property
+    def transacoes(self):
+        return TransacoesView(self)
 
-    def gerar_relatorio(self, tipo_transacao=None):
-        for transacao in self._transacoes:
-            if tipo_transacao is None or transacao["tipo"].lower() == tipo_transacao.lower():
-                yield transacao
+    _trava_tipos = threading.Lock()
+
+    @classmethod
+    def _codigo(cls, tipo):
+        codigo = cls.CODIGOS.get(tipo)
+        if codigo is None:
+            with cls._trava_tipos:
+                codigo = cls.CODIGOS.get(tipo)
+                if codigo is None:
+                    codigo = len(cls.TIPOS)
+                    cls.TIPOS.append(tipo)
+                    cls.CODIGOS[tipo] = codigo
+        return codigo
+
+    def _quantidade(self):
+        return self._em_segmentos + len(self._centavos)
+
+    def _virar_dia(self, dia):
+        if dia != self._dia_atual and self.diretorio_segmentos and len(self._centavos):
+            self._descarregar_segmento()
+        super()._virar_dia(dia)
+
+    def fechar(self):
+        # Só ao encerrar: os segmentos aliviam a memória, mas o estado durável
+        # é o do diário
+        for segmento in self._segmentos:
+            segmento.remover()
+        self._segmentos = []
+
+    def _descarregar_segmento(self):
+        nome = f"historico-{self._numero_conta or id(self)}-{len(self._segmentos):06d}.seg"
+        caminho = os.path.join(self.diretorio_segmentos, nome)
+        self._segmentos.append(
+            SegmentoHistorico(caminho, self._tipos, self._centavos, self._instantes, self._contrapartes, self._indice)
+        )
+        self._em_segmentos += len(self._centavos)
+        self._inicios_segmentos.append(self._em_segmentos)
+        # O índice do que foi para o segmento fica no segmento
+        self._indice = IndiceHistorico(self._em_segmentos)
+        self._tipos = array("B")
+        self._centavos = array("q")
+        self._instantes = array("q")
+        self._contrapartes = array("I")
+
+    def _armazenar(self, tipo, centavos, instante, contraparte=None):
+        self._tipos.append(self._codigo(tipo))
+        self._centavos.append(centavos)
+        self._instantes.append(instante)
+        self._contrapartes.append(contraparte or 0)
+
+    def _campos(self, indice):
+        for segmento in self._segmentos:
+            if indice < segmento.quantidade:
+                return segmento.campos(indice)
+            indice -= segmento.quantidade
+        return self._tipos[indice], self._centavos[indice], self._instantes[indice], self._contrapartes[indice]
+
+    def _iterar_campos(self):
+        for segmento in self._segmentos:
+            yield from segmento
+        yield from zip(self._tipos, self._centavos, self._instantes, self._contrapartes)
+
+    def _campos_faixa(self, inicio, fim, posicoes=None):
+        # A faixa é dividida nos segmentos que ela cruza; cada um é mapeado uma vez
+        inicios = self._inicios_segmentos
+        numero = bisect_right(inicios, inicio) - 1
+        while inicio < fim:
+            base = inicios[numero]
+            em_segmento = numero < len(self._segmentos)
+            limite = min(fim, inicios[numero + 1]) if em_segmento else fim
+            if posicoes is None:
+                indices = range(inicio - base, limite - base)
+            else:
+                corte = bisect_left(posicoes, limite)
+                indices = [p - base for p in posicoes[:corte]]
+                posicoes = posicoes[corte:]
+            if em_segmento:
+                yield from self._segmentos[numero].ler(indices)
+            elif posicoes is None:
+                corte = slice(indices.start, indices.stop)
+                yield from zip(self._tipos[corte], self._centavos[corte], self._instantes[corte], self._contrapartes[corte])
+            else:
+                tipos, centavos, instantes, contrapartes = self._tipos, self._centavos, self._instantes, self._contrapartes
+                yield from ((tipos[i], centavos[i], instantes[i], contrapartes[i]) for i in indices)
+            inicio = limite
+            numero += 1
+
+    def _indices(self, tipo=None, de=None, ate=None):
+        # Segmentos que o índice em memória descarta para o tipo e o período
+        # pedidos não são abertos
+        for segmento, inicio in zip(self._segmentos, self._inicios_segmentos):
+            if not segmento.descartavel(tipo, de, ate):
+                yield segmento.indice(inicio)
+        yield self._indice
+
+    def _tipos_indexados(self):
+        tipos = set(self._indice.tipos())
+        for segmento in self._segmentos:
+            tipos.update(segmento.contagem)
+        return tipos
+
+    def _registros_faixa(self, inicio, fim, posicoes=None, valores=None, tipo=None):
+        # Tipo e valores são comparados nos campos, antes de montar os registros
+        campos = self._campos_faixa(inicio, fim, posicoes)
+        if posicoes is None and tipo is not None:
+            codigo = self.CODIGOS[tipo]
+            campos = (c for c in campos if c[0] == codigo)
+        if valores is not None:
+            minimo, maximo = valores
+            campos = (c for c in campos if minimo <= c[1] <= maximo)
+        return starmap(self._montar, campos)
+
+    def _entradas(self):
+        tipos = self.TIPOS
+        for codigo, centavos, instante, contraparte in self._iterar_campos():
+            yield tipos[codigo], centavos, instante, contraparte or None
+
+    def _montar(self, codigo, centavos, instante, contraparte=0):
+        return RegistroTransacao(self.TIPOS[codigo], centavos, instante, contraparte or None)
+
+# Backends do histórico que podem ser escolhidos em BANCO_XYZ_HISTORICO
+CLASSES_HISTORICO = {"objetos": Historico, "compacto": HistoricoCompacto}
+
+def configurar_historico(classe):
+    # Vale para as contas abertas (ou recuperadas do diário) daqui em diante
+    Conta.classe_historico = classe
+
+def configurar_segmentos(diretorio):
+    # Liga o HistoricoCompacto com os dias encerrados em arquivos no diretório.
+    # Segmentos deixados por uma execução interrompida são descartados: o
+    # histórico é remontado a partir do diário
+    os.makedirs(diretorio, exist_ok=True)
+    for nome in os.listdir(diretorio):
+        if nome.startswith("historico-") and nome.endswith(".seg"):
+            os.remove(os.path.join(diretorio, nome))
+    HistoricoCompacto.diretorio_segmentos = diretorio
+    configurar_historico(HistoricoCompacto)
+
+def fechar_segmentos(clientes):
+    # Ao encerrar: apaga os arquivos de segmento das contas
+    with clientes._trava:
+        contas = list(clientes.contas)
+    for conta in contas:
+        if isinstance(conta.historico, HistoricoCompacto):
+            with conta._trava:
+                conta.historico.fechar()
 
 class Transacao(ABC):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def valor(self):
         pass
 
+    @property
+    def centavos(self):
+        return para_centavos(self.valor)
+
     @abstractmethod
     def registrar(self, conta):
         pass
 
+    # Aplica a transação sem saída no terminal; devolve o motivo da recusa ou None
+    @abstractmethod
+    def aplicar(self, conta):
+        pass
+
+    @classmethod
+    def de_centavos(cls, centavos):
+        # Para Saque e Deposito com o valor já em centavos, sem passar por Decimal
+        transacao = cls.__new__(cls)
+        transacao._centavos = centavos
+        return transacao
+
+    # Passo completo do processamento em lote: limite diário, saldo e
+    # histórico sob a trava da conta; devolve o motivo da recusa ou None
+    def efetivar(self, conta, instante, dia):
+        historico = conta.historico
+        with conta._trava:
+            historico._virar_dia(dia)
+            if historico._total_dia >= historico.LIMITE_DIARIO:
+                return "Limite diário de transações atingido"
+            motivo = self.aplicar(conta)
+            if motivo is None:
+                historico._registrar(self, instante)
+            return motivo
+
 class Saque(Transacao):
+    __slots__ = ("_centavos",)
+    SINAL = -1
+
     def __init__(self, valor):
-        self._valor = valor
+        self._centavos = para_centavos(valor)
 
     @property
     def valor(self):
-        return self._valor
+        return para_reais(self._centavos)
+
+    @property
+    def centavos(self):
+        return self._centavos
 
     def registrar(self, conta):
-        if conta.sacar(self.valor):
-            conta.historico.adicionar_transacao(self)
+        # O limite diário é conferido antes de mexer no saldo, para que todo
+        # movimento do saldo tenha sua entrada no histórico; com a trava da
+        # conta, conferência, saldo e histórico formam um passo só
+        with conta._trava:
+            if conta.historico.excedeu_limite():
+                anotar_operacao(motivo="Limite diário de transações atingido")
+                return notificar(Resultado(False, "Limite diário de 10 transações atingido!"))
+            resultado = conta.sacar_centavos(self.centavos)
+            if resultado:
+                conta.historico.adicionar_transacao(self)
+        verificar_snapshot()
+        return resultado
+
+    def aplicar(self, conta):
+        return conta._aplicar_saque(self._centavos)
 
 class Deposito(Transacao):
+    __slots__ = ("_centavos",)
+    SINAL = 1
+
     def __init__(self, valor):
-        self._valor = valor
+        self._centavos = para_centavos(valor)
+
+    @property
+    def valor(self):
+        return para_reais(self._centavos)
+
+    @property
+    def centavos(self):
+        return self._centavos
+
+    def registrar(self, conta):
+        # O limite diário é conferido antes de mexer no saldo, para que todo
+        # movimento do saldo tenha sua entrada no histórico; com a trava da
+        # conta, conferência, saldo e histórico formam um passo só
+        with conta._trava:
+            if conta.historico.excedeu_limite():
+                anotar_operacao(motivo="Limite diário de transações atingido")
+                return notificar(Resultado(False, "Limite diário de 10 transações atingido!"))
+            resultado = conta.depositar_centavos(self.centavos)
+            if resultado:
+                conta.historico.adicionar_transacao(self)
+        verificar_snapshot()
+        return resultado
+
+    def aplicar(self, conta):
+        return conta._aplicar_deposito(self._centavos)
+
+class Transferencia(Transacao):
+    # Débito na conta que registra e crédito em destino como uma unidade: as
+    # duas contas são travadas juntas, tudo é conferido antes (limites
+    # diários de ambas, saldo e limite da origem) e só então os dois saldos e
+    # as duas entradas vinculadas do histórico são gravados, com um único
+    # registro no diário
+    __slots__ = ("_centavos", "destino")
+    ENVIADA = "TransferenciaEnviada"
+    RECEBIDA = "TransferenciaRecebida"
+
+    def __init__(self, valor, destino):
+        self._centavos = para_centavos(valor)
+        self.destino = destino
 
     @property
     def valor(self):
-        return self._valor
+        return para_reais(self._centavos)
+
+    @property
+    def centavos(self):
+        return self._centavos
 
     def registrar(self, conta):
-        if conta.depositar(self.valor):
-            conta.historico.adicionar_transacao(self)
+        instante = RELOGIO.agora()
+        motivo = self.efetivar(conta, instante, RELOGIO.dia(instante))
+        verificar_snapshot()
+        if motivo:
+            anotar_operacao(motivo=motivo)
+            return notificar(Resultado(False, f"Operacao falhou! {motivo}."))
+        return notificar(Resultado(True, "Transferencia realizada com sucesso!"))
+
+    def aplicar(self, conta):
+        # Mexer nos dois saldos fora de efetivar deixaria as contas sem trava,
+        # sem histórico e sem diário
+        raise TypeError("Transferencia não é aplicada isoladamente: use efetivar")
+
+    def _preparar(self, origem):
+        destino = self.destino
+        if destino is None or destino is origem:
+            return "Conta de destino invalida"
+        for conta in (origem, destino):
+            historico = conta.historico
+            if historico._total_dia >= historico.LIMITE_DIARIO:
+                return "Limite diário de transações atingido"
+        return origem._validar_saque(self._centavos)
+
+    def efetivar(self, conta, instante, dia):
+        origem, destino, centavos = conta, self.destino, self._centavos
+        if destino is None or destino is origem:
+            return "Conta de destino invalida"
+        with TravaContas(origem, destino):
+            origem.historico._virar_dia(dia)
+            destino.historico._virar_dia(dia)
+            motivo = self._preparar(origem)
+            if motivo is not None:
+                return motivo
+            if DIARIO is not None:
+                DIARIO.registrar_transferencia(origem.numero, destino.numero, centavos, instante)
+            origem._saldo -= centavos
+            destino._saldo += centavos
+            origem.historico._incluir(self.ENVIADA, centavos, instante, destino.numero)
+            destino.historico._incluir(self.RECEBIDA, centavos, instante, origem.numero)
+        return None
+
+def transferir(origem, destino, valor):
+    return Transferencia(valor, destino).registrar(origem)
+
+# Persistência: diário de transações (write-ahead) em formato binário, com
+# group commit, fsync em lotes e snapshots periódicos
+CODIGOS_DIARIO = {
+    "Deposito": 1, "Saque": 2, "TransferenciaEnviada": 3, "TransferenciaRecebida": 4,
+    "Juros": 5, "Tarifa": 6, "Encargo": 7,
+}
+TIPOS_DIARIO = {codigo: tipo for tipo, codigo in CODIGOS_DIARIO.items()}
+
+REGISTRO_CLIENTE = 1
+REGISTRO_CONTA = 2
+REGISTRO_TRANSACAO = 3   # altera o saldo e entra no histórico
+REGISTRO_HISTORICO = 4   # só entra no histórico (snapshots)
+REGISTRO_SALDO = 5       # saldo consolidado (snapshots)
+REGISTRO_TRANSFERENCIA = 6  # altera os dois saldos e entra nos dois históricos
+REGISTRO_VINCULADO = 7   # entrada de histórico com contraparte (snapshots)
+REGISTRO_CONTA_ESPECIAL = 8  # conta com cheque especial
+
+FORMATO_TAMANHO = struct.Struct("<H")
+FORMATO_CONTA = struct.Struct("<I11s")
+FORMATO_CONTA_ESPECIAL = struct.Struct("<I11sq")  # numero, cpf, cheque especial em centavos
+FORMATO_TRANSACAO = struct.Struct("<BIqq")  # tipo, conta, centavos, instante (epoch)
+FORMATO_SALDO = struct.Struct("<Iq")
+FORMATO_TRANSFERENCIA = struct.Struct("<IIqq")  # origem, destino, centavos, instante
+FORMATO_VINCULADO = struct.Struct("<BIqqI")  # tipo, conta, centavos, instante, contraparte
+CABECALHO_SNAPSHOT = struct.Struct("<8sQ")
+ASSINATURA_SNAPSHOT = b"XYZSNAP1"
+
+def _registro_cliente(cliente):
+    dados = "\x1f".join((cliente.nome, cliente.data_nascimento, cliente.cpf, cliente.endereco)).encode()
+    return bytes((REGISTRO_CLIENTE,)) + FORMATO_TAMANHO.pack(len(dados)) + dados
+
+def _registro_conta(conta):
+    if isinstance(conta, ContaChequeEspecial):
+        return bytes((REGISTRO_CONTA_ESPECIAL,)) + FORMATO_CONTA_ESPECIAL.pack(
+            conta.numero, conta.cliente.cpf.encode(), conta._cheque_especial_centavos
+        )
+    return bytes((REGISTRO_CONTA,)) + FORMATO_CONTA.pack(conta.numero, conta.cliente.cpf.encode())
+
+def _registro_transacao(marca, numero, tipo, centavos, instante):
+    return bytes((marca,)) + FORMATO_TRANSACAO.pack(CODIGOS_DIARIO[tipo], numero, centavos, instante)
+
+def _registro_historico(numero, tipo, centavos, instante, contraparte):
+    if contraparte is None:
+        return _registro_transacao(REGISTRO_HISTORICO, numero, tipo, centavos, instante)
+    return bytes((REGISTRO_VINCULADO,)) + FORMATO_VINCULADO.pack(CODIGOS_DIARIO[tipo], numero, centavos, instante, contraparte)
+
+def ler_registros(dados):
+    # Gera (marca, campos, fim_do_registro); para no primeiro registro
+    # incompleto ou desconhecido (cauda de uma escrita interrompida)
+    pos, total = 0, len(dados)
+    while pos < total:
+        marca = dados[pos]
+        inicio = pos + 1
+        if marca in (REGISTRO_TRANSACAO, REGISTRO_HISTORICO):
+            fim = inicio + FORMATO_TRANSACAO.size
+            if fim > total:
+                return
+            campos = FORMATO_TRANSACAO.unpack_from(dados, inicio)
+        elif marca == REGISTRO_TRANSFERENCIA:
+            fim = inicio + FORMATO_TRANSFERENCIA.size
+            if fim > total:
+                return
+            campos = FORMATO_TRANSFERENCIA.unpack_from(dados, inicio)
+        elif marca == REGISTRO_VINCULADO:
+            fim = inicio + FORMATO_VINCULADO.size
+            if fim > total:
+                return
+            campos = FORMATO_VINCULADO.unpack_from(dados, inicio)
+        elif marca == REGISTRO_SALDO:
+            fim = inicio + FORMATO_SALDO.size
+            if fim > total:
+                return
+            campos = FORMATO_SALDO.unpack_from(dados, inicio)
+        elif marca == REGISTRO_CONTA:
+            fim = inicio + FORMATO_CONTA.size
+            if fim > total:
+                return
+            numero, cpf = FORMATO_CONTA.unpack_from(dados, inicio)
+            campos = (numero, cpf.decode())
+        elif marca == REGISTRO_CONTA_ESPECIAL:
+            fim = inicio + FORMATO_CONTA_ESPECIAL.size
+            if fim > total:
+                return
+            numero, cpf, cheque_especial = FORMATO_CONTA_ESPECIAL.unpack_from(dados, inicio)
+            campos = (numero, cpf.decode(), cheque_especial)
+        elif marca == REGISTRO_CLIENTE:
+            if inicio + FORMATO_TAMANHO.size > total:
+                return
+            (tamanho,) = FORMATO_TAMANHO.unpack_from(dados, inicio)
+            inicio += FORMATO_TAMANHO.size
+            fim = inicio + tamanho
+            if fim > total:
+                return
+            campos = bytes(dados[inicio:fim]).decode().split("\x1f")
+        else:
+            return
+        yield marca, campos, fim
+        pos = fim
+
+def aplicar_registro(clientes, marca, campos):
+    if marca == REGISTRO_TRANSACAO or marca == REGISTRO_HISTORICO:
+        codigo, numero, centavos, instante = campos
+        conta = clientes.buscar_conta(AGENCIA, numero)
+        if marca == REGISTRO_TRANSACAO:
+            conta._saldo += centavos
+        conta.historico._restaurar(TIPOS_DIARIO[codigo], abs(centavos), instante)
+    elif marca == REGISTRO_TRANSFERENCIA:
+        numero_origem, numero_destino, centavos, instante = campos
+        origem = clientes.buscar_conta(AGENCIA, numero_origem)
+        destino = clientes.buscar_conta(AGENCIA, numero_destino)
+        origem._saldo -= centavos
+        destino._saldo += centavos
+        origem.historico._restaurar(Transferencia.ENVIADA, centavos, instante, numero_destino)
+        destino.historico._restaurar(Transferencia.RECEBIDA, centavos, instante, numero_origem)
+    elif marca == REGISTRO_VINCULADO:
+        codigo, numero, centavos, instante, contraparte = campos
+        conta = clientes.buscar_conta(AGENCIA, numero)
+        conta.historico._restaurar(TIPOS_DIARIO[codigo], centavos, instante, contraparte)
+    elif marca == REGISTRO_SALDO:
+        numero, saldo = campos
+        clientes.buscar_conta(AGENCIA, numero)._saldo = saldo
+    elif marca == REGISTRO_CONTA or marca == REGISTRO_CONTA_ESPECIAL:
+        cliente = clientes.buscar(campos[1])
+        if marca == REGISTRO_CONTA:
+            conta = ContaCorrente.nova_conta(cliente, campos[0])
+        else:
+            conta = ContaChequeEspecial.nova_conta(cliente, campos[0], para_reais(campos[2]))
+        cliente.adicionar_conta(conta)
+        clientes.adicionar_conta(conta)
+    elif marca == REGISTRO_CLIENTE:
+        clientes.adicionar(PessoaFisica(*campos))
+
+class Diario:
+    def __init__(self, diretorio, clientes, lote_commit=256, lote_fsync=16, snapshot_a_cada=1_000_000):
+        # lote_commit: registros acumulados antes de cada write (group commit)
+        # lote_fsync: commits entre cada os.fsync (0 desliga o fsync)
+        # snapshot_a_cada: transações no diário antes de um novo snapshot (0 desliga)
+        self._diretorio = diretorio
+        self._clientes = clientes
+        self.lote_commit = lote_commit
+        self.lote_fsync = lote_fsync
+        self.snapshot_a_cada = snapshot_a_cada
+        self._pendentes = []
+        self._commits_sem_fsync = 0
+        self._transacoes_no_diario = 0
+        # O snapshot não é gravado no meio de uma transação: fica pendente até
+        # verificar_snapshot ser chamado sem nenhuma trava de conta em mãos
+        self.snapshot_pendente = False
+        self._trava = threading.RLock()
+        self._geracao = ler_geracao_snapshot(diretorio)
+        os.makedirs(diretorio, exist_ok=True)
+        self._arquivo = open(caminho_diario(diretorio, self._geracao), "ab")
+        atexit.register(self.fechar)
+
+    def registrar_cliente(self, cliente):
+        self._anexar(_registro_cliente(cliente))
+
+    def registrar_conta(self, conta):
+        self._anexar(_registro_conta(conta))
+
+    def registrar_transacao(self, numero_conta, tipo, variacao, instante):
+        with self._trava:
+            self._anexar(_registro_transacao(REGISTRO_TRANSACAO, numero_conta, tipo, variacao, instante))
+            self._contar_transacao()
+
+    def registrar_transferencia(self, origem, destino, centavos, instante):
+        # Um registro só para as duas pernas: a recuperação nunca vê metade
+        with self._trava:
+            self._anexar(bytes((REGISTRO_TRANSFERENCIA,)) + FORMATO_TRANSFERENCIA.pack(origem, destino, centavos, instante))
+            self._contar_transacao()
+
+    def registrar_lote(self, registros):
+        # Registros de transação já montados, anexados de uma vez (fechamento mensal)
+        with self._trava:
+            self._pendentes.extend(registros)
+            self._contar_transacao(len(registros))
+            if len(self._pendentes) >= self.lote_commit:
+                self.confirmar()
+
+    def _contar_transacao(self, quantidade=1):
+        self._transacoes_no_diario += quantidade
+        if self.snapshot_a_cada and self._transacoes_no_diario >= self.snapshot_a_cada:
+            self.snapshot_pendente = True
+
+    def _anexar(self, registro):
+        with self._trava:
+            self._pendentes.append(registro)
+            if len(self._pendentes) >= self.lote_commit:
+                self.confirmar()
+
+    def confirmar(self, forcar_fsync=False):
+        with self._trava:
+            self._confirmar(forcar_fsync)
+
+    def _confirmar(self, forcar_fsync):
+        if self._pendentes:
+            self._arquivo.write(b"".join(self._pendentes))
+            self._pendentes.clear()
+            self._arquivo.flush()
+            self._commits_sem_fsync += 1
+        if self._commits_sem_fsync and (forcar_fsync or (self.lote_fsync and self._commits_sem_fsync >= self.lote_fsync)):
+            os.fsync(self._arquivo.fileno())
+            self._commits_sem_fsync = 0
+
+    def gravar_snapshot(self, somente_pendente=False):
+        # Ordem das travas: cadastro, contas, diário (a mesma de quem cadastra e
+        # de quem movimenta); nenhuma conta fica com o saldo alterado e a
+        # entrada ainda fora do diário
+        with self._clientes._trava, TravaContas(*self._clientes.contas), self._trava:
+            if somente_pendente and not self.snapshot_pendente:
+                return
+            self.snapshot_pendente = False
+            self._gravar_snapshot()
+
+    def _gravar_snapshot(self):
+        # O snapshot da geração g + 1 substitui o anterior de forma atômica e
+        # passa a valer junto com um diário novo; o diário antigo é descartado
+        self._confirmar(forcar_fsync=True)
+        nova_geracao = self._geracao + 1
+        caminho = os.path.join(self._diretorio, "snapshot.bin")
+        temporario = caminho + ".tmp"
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(CABECALHO_SNAPSHOT.pack(ASSINATURA_SNAPSHOT, nova_geracao))
+            for cliente in self._clientes:
+                arquivo.write(_registro_cliente(cliente))
+            for conta in self._clientes.contas:
+                arquivo.write(_registro_conta(conta))
+                arquivo.write(b"".join(
+                    _registro_historico(conta.numero, tipo, centavos, instante, contraparte)
+                    for tipo, centavos, instante, contraparte in conta.historico._entradas()
+                ))
+                arquivo.write(bytes((REGISTRO_SALDO,)) + FORMATO_SALDO.pack(conta.numero, conta._saldo))
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, caminho)
+        self._arquivo.close()
+        antigo = caminho_diario(self._diretorio, self._geracao)
+        self._geracao = nova_geracao
+        self._arquivo = open(caminho_diario(self._diretorio, self._geracao), "ab")
+        self._transacoes_no_diario = 0
+        os.remove(antigo)
+
+    def fechar(self):
+        with self._trava:
+            if self._arquivo.closed:
+                return
+            self._confirmar(forcar_fsync=True)
+            self._arquivo.close()
+
+def caminho_diario(diretorio, geracao):
+    return os.path.join(diretorio, f"diario-{geracao:08d}.bin")
+
+def ler_geracao_snapshot(diretorio):
+    caminho = os.path.join(diretorio, "snapshot.bin")
+    if not os.path.exists(caminho):
+        return 0
+    with open(caminho, "rb") as arquivo:
+        assinatura, geracao = CABECALHO_SNAPSHOT.unpack(arquivo.read(CABECALHO_SNAPSHOT.size))
+    if assinatura != ASSINATURA_SNAPSHOT:
+        raise ValueError(f"Snapshot inválido em {caminho}")
+    return geracao
+
+def recuperar_estado(diretorio):
+    # Último snapshot + cauda do diário da mesma geração
+    clientes = ClienteRegistry()
+    geracao = ler_geracao_snapshot(diretorio)
+    caminho_snapshot = os.path.join(diretorio, "snapshot.bin")
+    if geracao:
+        with open(caminho_snapshot, "rb") as arquivo:
+            dados = arquivo.read()
+        for marca, campos, _ in ler_registros(memoryview(dados)[CABECALHO_SNAPSHOT.size:]):
+            aplicar_registro(clientes, marca, campos)
+    caminho = caminho_diario(diretorio, geracao)
+    if os.path.exists(caminho):
+        with open(caminho, "rb") as arquivo:
+            dados = arquivo.read()
+        valido = 0
+        for marca, campos, valido in ler_registros(memoryview(dados)):
+            aplicar_registro(clientes, marca, campos)
+        if valido < len(dados):
+            # Descarta a cauda de uma escrita interrompida
+            with open(caminho, "r+b") as arquivo:
+                arquivo.truncate(valido)
+    contas = sorted(clientes.contas, key=lambda conta: conta.numero)
+    return clientes, contas
+
+DIARIO = None
+
+def configurar_diario(diario):
+    global DIARIO
+    if DIARIO is not None:
+        DIARIO.fechar()
+    DIARIO = diario
+
+def verificar_snapshot():
+    # Chamado ao fim de cada transação, já fora das travas das contas
+    diario = DIARIO
+    if diario is not None and diario.snapshot_pendente:
+        diario.gravar_snapshot(somente_pendente=True)
+
+# Fechamento mensal: juros sobre saldo positivo, encargo sobre saldo negativo
+# e tarifa (até o saldo disponível, isenta a partir de um saldo mínimo), com
+# uma tabela por produto. Em cada bloco de contas, travado inteiro, os saldos
+# vão para um vetor, os valores são calculados de uma vez (com NumPy, se
+# instalado) e lançados de volta com as entradas de histórico e o diário.
+# Taxas em partes por milhão e valores em centavos: o cálculo é inteiro e dá
+# o mesmo resultado com ou sem NumPy
+TabelaMensal = namedtuple("TabelaMensal", "juros tarifa isencao encargo")
+ResumoFechamento = namedtuple("ResumoFechamento", "contas lancamentos juros tarifas encargos segundos vetorizado")
+
+TABELAS_MENSAIS = {
+    # juros e encargo ao mês; tarifa e isenção em reais. ContaChequeEspecial
+    # usa a tabela de ContaCorrente
+    ContaCorrente: TabelaMensal(Decimal("0.005"), Decimal("12.90"), Decimal("5000"), Decimal("0.08")),
+}
+TABELA_SEM_COBRANCA = TabelaMensal(Decimal(0), Decimal(0), Decimal(0), Decimal(0))
+PARTES_POR_MILHAO = 1_000_000
+
+def tabela_produto(classe, tabelas):
+    # A tabela da classe ou da mais próxima na hierarquia que tenha uma
+    for base in classe.__mro__:
+        if base in tabelas:
+            return tabelas[base]
+    return TABELA_SEM_COBRANCA
+
+def taxas_tabela(tabela):
+    # (juros ppm, tarifa em centavos, isenção em centavos, encargo ppm)
+    return (
+        int(tabela.juros * PARTES_POR_MILHAO),
+        para_centavos(tabela.tarifa),
+        para_centavos(tabela.isencao),
+        int(tabela.encargo * PARTES_POR_MILHAO),
+    )
+
+def calcular_fechamento(saldos, produtos, taxas):
+    # saldos em centavos e o índice do produto de cada conta em taxas;
+    # devolve as listas de juros, tarifas e encargos em centavos
+    meio = PARTES_POR_MILHAO // 2
+    juros, tarifas, encargos = [], [], []
+    for saldo, produto in zip(saldos, produtos):
+        taxa_juros, tarifa, isencao, taxa_encargo = taxas[produto]
+        valor_juros = (saldo * taxa_juros + meio) // PARTES_POR_MILHAO if saldo > 0 else 0
+        valor_encargo = (-saldo * taxa_encargo + meio) // PARTES_POR_MILHAO if saldo < 0 else 0
+        base = saldo + valor_juros - valor_encargo
+        juros.append(valor_juros)
+        encargos.append(valor_encargo)
+        tarifas.append(0 if base >= isencao else min(tarifa, max(base, 0)))
+    return juros, tarifas, encargos
+
+def calcular_fechamento_numpy(np, saldos, produtos, taxas):
+    meio = PARTES_POR_MILHAO // 2
+    saldo = np.frombuffer(saldos, dtype=np.int64)
+    colunas = np.array(taxas, dtype=np.int64)[np.frombuffer(produtos, dtype=np.uint16)]
+    taxa_juros, tarifa, isencao, taxa_encargo = colunas.T
+    juros = np.where(saldo > 0, (saldo * taxa_juros + meio) // PARTES_POR_MILHAO, 0)
+    encargos = np.where(saldo < 0, (-saldo * taxa_encargo + meio) // PARTES_POR_MILHAO, 0)
+    base = saldo + juros - encargos
+    tarifas = np.where(base >= isencao, 0, np.minimum(tarifa, np.maximum(base, 0)))
+    return juros.tolist(), tarifas.tolist(), encargos.tolist()
+
+def fechamento_mensal(clientes, tabelas=None, instante=None, tamanho_bloco=100_000, usar_numpy=None):
+    # usar_numpy: None usa o NumPy se estiver instalado; False força o Python puro
+    inicio = time.perf_counter()
+    tabelas = TABELAS_MENSAIS if tabelas is None else tabelas
+    np = None
+    if usar_numpy is not False:
+        try:
+            import numpy as np
+        except ImportError:
+            if usar_numpy:
+                raise
+    instante = RELOGIO.agora() if instante is None else instante
+    dia = RELOGIO.dia(instante)
+    with clientes._trava:
+        contas = list(clientes.contas)
+
+    # Os lançamentos criam milhões de objetos sem ciclos; com o coletor
+    # ligado, cada geração cheia faria uma varredura de todas as contas
+    coletor_ligado = gc.isenabled()
+    gc.disable()
+    try:
+        resumo = _fechar_blocos(contas, tabelas, np, instante, dia, tamanho_bloco)
+    finally:
+        if coletor_ligado:
+            gc.enable()
+    return resumo._replace(segundos=time.perf_counter() - inicio)
+
+def _fechar_blocos(contas, tabelas, np, instante, dia, tamanho_bloco):
+    # Um índice por classe de conta; as taxas de cada produto, uma vez só
+    indices, taxas = {}, []
+    hoje = RELOGIO.dia()
+    total_juros = total_tarifas = total_encargos = lancamentos = 0
+    for posicao in range(0, len(contas), tamanho_bloco):
+        bloco = contas[posicao:posicao + tamanho_bloco]
+        registros = []
+        with TravaContas(*bloco):
+            # O retrato dos saldos e os lançamentos acontecem com o bloco travado
+            saldos = array("q", [conta._saldo for conta in bloco])
+            produtos = array("H")
+            for conta in bloco:
+                classe = conta.__class__
+                indice = indices.get(classe)
+                if indice is None:
+                    indice = indices[classe] = len(taxas)
+                    taxas.append(taxas_tabela(tabela_produto(classe, tabelas)))
+                produtos.append(indice)
+            if np is not None:
+                juros, tarifas, encargos = calcular_fechamento_numpy(np, saldos, produtos, taxas)
+            else:
+                juros, tarifas, encargos = calcular_fechamento(saldos, produtos, taxas)
+
+            for conta, valor_juros, tarifa, encargo in zip(bloco, juros, tarifas, encargos):
+                if not (valor_juros or tarifa or encargo):
+                    continue
+                historico = conta.historico
+                # Um fechamento retroativo lança na data dele, mas não vira o
+                # dia corrente da conta nem zera o limite diário do cliente
+                historico._virar_dia(hoje)
+                for tipo, centavos, sinal in (("Juros", valor_juros, 1), ("Encargo", encargo, -1), ("Tarifa", tarifa, -1)):
+                    if centavos:
+                        if DIARIO is not None:
+                            registros.append(_registro_transacao(REGISTRO_TRANSACAO, conta.numero, tipo, sinal * centavos, instante))
+                        historico._incluir_datado(tipo, centavos, instante, dia)
+                        lancamentos += 1
+                conta._saldo += valor_juros - encargo - tarifa
+            # Ainda com o bloco travado: um snapshot não vê saldo sem diário
+            if registros:
+                DIARIO.registrar_lote(registros)
+        total_juros += sum(juros)
+        total_tarifas += sum(tarifas)
+        total_encargos += sum(encargos)
+        verificar_snapshot()
+
+    return ResumoFechamento(
+        len(contas), lancamentos, para_reais(total_juros), para_reais(total_tarifas),
+        para_reais(total_encargos), 0.0, np is not None,
+    )
+
+def executar_fechamento_mensal(clientes):
+    resumo = fechamento_mensal(clientes)
+    linhas = [
+        "FECHAMENTO MENSAL",
+        "-" * 45,
+        f"Contas: {resumo.contas} | Lançamentos: {resumo.lancamentos}",
+        f"Juros: R$ {resumo.juros:,.2f}",
+        f"Tarifas: R$ {resumo.tarifas:,.2f}",
+        f"Encargos: R$ {resumo.encargos:,.2f}",
+        f"Tempo: {resumo.segundos:.3f} s ({'NumPy' if resumo.vetorizado else 'Python puro'})",
+    ]
+    mostrar_moldura_multilinha(linhas, borda='=', largura=calcular_largura_ideal(linhas))
+    return resumo
 
 # Funções e operações
 
@@ -310,17 +2214,17 @@ def menu():
     return input("Selecione a opção desejada: ")
 
 def get_horario_atual():
-    return datetime.now(TIMEZONE_ATUAL)
+    return RELOGIO.momento()
 
 def ler_valor_numerico(msg):
     valor_str = input(msg)
     try:
-        valor = float(valor_str)
+        valor = para_reais(para_centavos(Decimal(valor_str.strip())))
         if valor <= 0:
             mostrar_moldura("Valor inválido! Deve ser maior que zero.", borda='#')
             return None
         return valor
-    except ValueError:
+    except (ValueError, InvalidOperation):
         mostrar_moldura("Valor inválido! Tente novamente.", borda='#')
         return None
 
@@ -336,7 +2240,7 @@ def solicitar_cpf():
             mostrar_moldura("CPF inválido! Deve conter 11 dígitos.", borda='#')
 
 def filtrar_cliente(cpf, clientes):
-    return next((c for c in clientes if c.cpf == cpf), None)
+    return clientes.buscar(cpf)
 
 def recuperar_conta_cliente(cliente):
     if not cliente.contas:
@@ -345,112 +2249,956 @@ def recuperar_conta_cliente(cliente):
     return cliente.contas[0]
 
 def excedeu_limite_transacoes(conta):
-    hoje = get_horario_atual().strftime("%d-%m-%Y")
-    transacoes_hoje = [t for t in conta.historico.transacoes if t["data"].startswith(hoje)]
-    return len(transacoes_hoje) >= 10
+    return conta.historico.transacoes_hoje() >= Historico.LIMITE_DIARIO
+
+# Processamento em lote, sem molduras nem input/print
+ResultadoLote = namedtuple("ResultadoLote", "indice conta transacao sucesso motivo")
+
+def resolver_conta(clientes, chave):
+    # chave pode ser o CPF do titular ou a tupla (agencia, numero)
+    if isinstance(chave, tuple):
+        return clientes.buscar_conta(*chave)
+    cliente = clientes.buscar(chave)
+    if cliente is None or not cliente.contas:
+        return None
+    return cliente.contas[0]
+
+def aplicar_lote(conta_ou_registry, transacoes, inicio=0):
+    # Com uma Conta, transacoes é uma sequência de Transacao; com o
+    # ClienteRegistry, é uma sequência de pares (cpf ou (agencia, numero), Transacao).
+    # inicio é o índice do primeiro item nos resultados
+    instante = RELOGIO.agora()
+    dia = RELOGIO.dia(instante)
+    conta_unica = conta_ou_registry if isinstance(conta_ou_registry, Conta) else None
+    resultados = []
+    for indice, item in enumerate(transacoes, inicio):
+        if conta_unica is not None:
+            conta, transacao = conta_unica, item
+        else:
+            chave, transacao = item
+            conta = resolver_conta(conta_ou_registry, chave)
+
+        if conta is None:
+            motivo = "Conta não encontrada"
+        else:
+            motivo = transacao.efetivar(conta, instante, dia)
+            if DIARIO is not None and DIARIO.snapshot_pendente:
+                verificar_snapshot()
+        resultados.append(ResultadoLote(indice, conta, transacao, motivo is None, motivo))
+    return resultados
+
+def aplicar_lote_concorrente(conta_ou_registry, transacoes, trabalhadores=4, tamanho_bloco=1024):
+    # Blocos de transacoes aplicados por um pool de threads; cada transação
+    # continua atômica na sua conta, mas transações de blocos diferentes sobre
+    # a mesma conta podem ser aplicadas em qualquer ordem
+    from concurrent.futures import ThreadPoolExecutor
+    transacoes = list(transacoes)
+    with ThreadPoolExecutor(trabalhadores) as pool:
+        blocos = [
+            pool.submit(aplicar_lote, conta_ou_registry, transacoes[i:i + tamanho_bloco], i)
+            for i in range(0, len(transacoes), tamanho_bloco)
+        ]
+        return [resultado for bloco in blocos for resultado in bloco.result()]
+
+# Motor particionado: clientes e contas distribuídos entre processos pelo
+# hash do CPF. Cada processo é dono do ClienteRegistry da sua partição (e do
+# seu diário, com um diretório); o roteador só reparte os lotes e junta as
+# respostas
+def particao_cpf(cpf, particoes):
+    # crc32 e não hash(): o resultado não pode variar entre processos
+    return zlib.crc32(cpf.encode()) % particoes
+
+def servir_particao(conexao, diretorio=None):
+    global DIARIO
+    configurar_apresentador(ApresentadorSilencioso())
+    # Num fork, o diário herdado pertence ao processo pai: não é fechado aqui
+    DIARIO = None
+    if diretorio:
+        clientes, _ = recuperar_estado(diretorio)
+        configurar_diario(Diario(diretorio, clientes))
+    else:
+        clientes = ClienteRegistry()
+    classes = {CODIGOS_DIARIO["Deposito"]: Deposito, CODIGOS_DIARIO["Saque"]: Saque}
+    while True:
+        comando, dados = conexao.recv()
+        if comando == "lote":
+            itens = [(cpf, classes[codigo].de_centavos(centavos)) for cpf, codigo, centavos in dados]
+            # Só as recusas voltam: (posição no lote, motivo)
+            conexao.send([(r.indice, r.motivo) for r in aplicar_lote(clientes, itens) if not r.sucesso])
+        elif comando == "cadastrar":
+            for nome, nascimento, cpf, endereco, numero in dados:
+                cliente = clientes.buscar(cpf)
+                if cliente is None:
+                    cliente = PessoaFisica(nome, nascimento, cpf, endereco)
+                    clientes.adicionar(cliente)
+                conta = ContaCorrente.nova_conta(cliente, numero)
+                cliente.adicionar_conta(conta)
+                clientes.adicionar_conta(conta)
+            conexao.send(len(dados))
+        elif comando == "contas":
+            conexao.send([(conta.numero, conta.cliente.cpf, conta._saldo) for conta in clientes.contas])
+        elif comando == "encerrar":
+            configurar_diario(None)
+            conexao.send(None)
+            return
+
+class MotorParticionado:
+    def __init__(self, particoes=None, diretorio=None, metodo_inicio=None):
+        # metodo_inicio: "fork", "spawn" ou "forkserver" (None = o padrão da plataforma)
+        import multiprocessing
+        contexto = multiprocessing.get_context(metodo_inicio)
+        self.particoes = particoes or os.cpu_count() or 1
+        self._conexoes = []
+        self._processos = []
+        for numero in range(self.particoes):
+            local, remota = contexto.Pipe()
+            subdiretorio = os.path.join(diretorio, f"particao-{numero:03d}") if diretorio else None
+            if contexto.get_start_method() == "fork" or __name__ == "__main__":
+                alvo, argumentos = servir_particao, (remota, subdiretorio)
+            else:
+                # Sem fork, o processo novo importa o alvo pelo nome do módulo, o
+                # que não dá com o script carregado pelo caminho (testes,
+                # benchmark): ele é executado de novo lá, como __particao__
+                import runpy
+                alvo, argumentos = runpy.run_path, (__file__, {"PARTICAO": (remota, subdiretorio)}, "__particao__")
+            processo = contexto.Process(target=alvo, args=argumentos, daemon=True)
+            processo.start()
+            remota.close()
+            self._conexoes.append(local)
+            self._processos.append(processo)
+        # Números de conta são globais; com um diretório, continuam dos recuperados
+        self._proximo_numero = max((numero for numero, _, _ in self.contas()), default=0) + 1
+        atexit.register(self.fechar)
+
+    def _todas(self, comando, dados=None):
+        for conexao in self._conexoes:
+            conexao.send((comando, dados))
+        return [conexao.recv() for conexao in self._conexoes]
+
+    def cadastrar(self, clientes):
+        # clientes: tuplas (nome, data_nascimento, cpf, endereco); cada uma
+        # ganha uma conta corrente na partição do CPF. Devolve os números
+        por_particao = [[] for _ in range(self.particoes)]
+        numeros = []
+        for nome, nascimento, cpf, endereco in clientes:
+            numero = self._proximo_numero
+            self._proximo_numero += 1
+            por_particao[particao_cpf(cpf, self.particoes)].append((nome, nascimento, cpf, endereco, numero))
+            numeros.append(numero)
+        for conexao, itens in zip(self._conexoes, por_particao):
+            conexao.send(("cadastrar", itens))
+        for conexao in self._conexoes:
+            conexao.recv()
+        return numeros
+
+    def contas(self):
+        # (numero, cpf, saldo em centavos) de todas as partições, por número
+        return sorted(conta for contas in self._todas("contas") for conta in contas)
+
+    def _repartir(self, bloco):
+        itens = [[] for _ in range(self.particoes)]
+        posicoes = [[] for _ in range(self.particoes)]
+        particoes = self.particoes
+        crc32 = zlib.crc32
+        codigos = {Deposito: CODIGOS_DIARIO["Deposito"], Saque: CODIGOS_DIARIO["Saque"]}
+        for posicao, (cpf, transacao) in enumerate(bloco):
+            codigo = codigos.get(type(transacao))
+            if codigo is None:
+                raise ValueError("O motor particionado só processa Saque e Deposito")
+            particao = crc32(cpf.encode()) % particoes
+            itens[particao].append((cpf, codigo, transacao._centavos))
+            posicoes[particao].append(posicao)
+        return itens, posicoes
+
+    def processar(self, transacoes, tamanho_bloco=20_000):
+        # transacoes: pares (cpf, Saque ou Deposito). Devolve ResultadoLote na
+        # ordem da entrada, com o CPF no lugar da conta (a conta vive no
+        # processo da partição). O bloco seguinte é repartido enquanto as
+        # partições ainda processam o atual
+        transacoes = iter(transacoes)
+        resultados = []
+        bloco = list(islice(transacoes, tamanho_bloco))
+        preparado = self._repartir(bloco)
+        while bloco:
+            itens, posicoes = preparado
+            for conexao, lote in zip(self._conexoes, itens):
+                conexao.send(("lote", lote))
+            proximo = list(islice(transacoes, tamanho_bloco))
+            preparado = self._repartir(proximo)
+            motivos = [None] * len(bloco)
+            for conexao, posicoes_particao in zip(self._conexoes, posicoes):
+                for indice, motivo in conexao.recv():
+                    motivos[posicoes_particao[indice]] = motivo
+            inicio = len(resultados)
+            resultados.extend(
+                ResultadoLote(inicio + posicao, cpf, transacao, motivo is None, motivo)
+                for posicao, ((cpf, transacao), motivo) in enumerate(zip(bloco, motivos))
+            )
+            bloco = proximo
+        return resultados
+
+    def fechar(self):
+        if not self._processos:
+            return
+        for conexao in self._conexoes:
+            conexao.send(("encerrar", None))
+        for conexao, processo in zip(self._conexoes, self._processos):
+            conexao.recv()
+            conexao.close()
+            processo.join()
+        self._conexoes = []
+        self._processos = []
 
 @log_transacao
+@medir_operacao
 def depositar(clientes):
     cpf = solicitar_cpf()
+    anotar_operacao(cpf=cpf)
     cliente = filtrar_cliente(cpf, clientes)
     if not cliente:
+        anotar_operacao(motivo="Cliente não encontrado")
         mostrar_moldura("Cliente não encontrado!", borda='#')
         return
     
     conta = recuperar_conta_cliente(cliente)
     
     if conta is None:
+        anotar_operacao(motivo="Cliente não possui contas")
         return
+    anotar_operacao(conta=conta.numero)
     if excedeu_limite_transacoes(conta):
+        anotar_operacao(motivo="Limite diário de transações atingido")
         mostrar_moldura("Limite diário de transações atingido!", borda='#')
         return
         
     valor = ler_valor_numerico("Valor do depósito: ")
     
     if valor is not None:
-        cliente.realizar_transacao(conta, Deposito(valor))
+        return cliente.realizar_transacao(conta, Deposito(valor))
+    anotar_operacao(motivo="Valor inválido")
 
 @log_transacao
+@medir_operacao
 def sacar(clientes):
     cpf = solicitar_cpf()
+    anotar_operacao(cpf=cpf)
     cliente = filtrar_cliente(cpf, clientes)
     if not cliente:
+        anotar_operacao(motivo="Cliente não encontrado")
         mostrar_moldura("Cliente não encontrado!", borda='#')
         return
     
     conta = recuperar_conta_cliente(cliente)
     
     if conta is None:
+        anotar_operacao(motivo="Cliente não possui contas")
         return
+    anotar_operacao(conta=conta.numero)
     
     #mostrar_aviso_legal(conta._limite, conta._limite_saques, numero_saques
     
     if excedeu_limite_transacoes(conta):
+        anotar_operacao(motivo="Limite diário de transações atingido")
         mostrar_moldura("Limite diário de transações atingido!", borda='#')
         return
             
     valor = ler_valor_numerico("Valor do saque: ")
     
     if valor is not None:
-        cliente.realizar_transacao(conta, Saque(valor))
+        return cliente.realizar_transacao(conta, Saque(valor))
+    anotar_operacao(motivo="Valor inválido")
+
+# Extrato em streaming: as linhas saem do gerador direto para a moldura, em
+# blocos de TAMANHO_PAGINA_EXTRATO, sem montar a lista completa. As colunas
+# têm largura fixa (data e hora, tipo, valor), e a moldura é dimensionada por elas
+TAMANHO_PAGINA_EXTRATO = 500
+LARGURA_TIPO_EXTRATO = len("TransferenciaRecebida")
+LARGURA_VALOR_EXTRATO = 14
+LARGURA_LINHA_EXTRATO = len("dd-mm-aaaa hh:mm:ss | ") + LARGURA_TIPO_EXTRATO + len(" | R$ ") + LARGURA_VALOR_EXTRATO
+
+def linhas_extrato(conta, tipo_transacao=None, inicio=None, fim=None, pagina=None, tamanho_pagina=TAMANHO_PAGINA_EXTRATO):
+    transacoes = conta.historico.gerar_relatorio(tipo_transacao, inicio, fim)
+    if pagina is not None:
+        transacoes = islice(transacoes, (pagina - 1) * tamanho_pagina, pagina * tamanho_pagina)
+    vazio = True
+    for t in transacoes:
+        vazio = False
+        yield f"{t.data} | {t.tipo[:LARGURA_TIPO_EXTRATO]:<{LARGURA_TIPO_EXTRATO}} | R$ {formatar_centavos(t.centavos):>{LARGURA_VALOR_EXTRATO}}"
+    if vazio:
+        yield "Não foram realizadas movimentações."
 
 @log_transacao
-def exibir_extrato(clientes):
+@medir_operacao
+def exibir_extrato(clientes, tipo_transacao=None, inicio=None, fim=None, pagina=None, tamanho_pagina=TAMANHO_PAGINA_EXTRATO):
     cpf = solicitar_cpf()
+    anotar_operacao(cpf=cpf)
     cliente = filtrar_cliente(cpf, clientes)
     if not cliente:
+        anotar_operacao(motivo="Cliente não encontrado")
         mostrar_moldura("Cliente não encontrado!", borda='#')
         return
     conta = recuperar_conta_cliente(cliente)
-    linhas = [
-        f"EXTRATO - {get_horario_atual().strftime('%d/%m/%Y %H:%M:%S')}",
-        "-" * 60
+    cabecalho = [
+        f"EXTRATO - {RELOGIO.formatar(RELOGIO.agora(), '%d/%m/%Y %H:%M:%S')}",
+        "-" * LARGURA_LINHA_EXTRATO
+    ]
+    rodape = [
+        "-" * LARGURA_LINHA_EXTRATO,
+        f"Saldo atual: R$ {conta.saldo:.2f}"
     ]
-    for t in conta.historico.gerar_relatorio():
-        linhas.append(f"{t['data']} | {t['tipo']} | R$ {t['valor']:.2f}")
-    if not conta.historico.transacoes:
-        linhas.append("Não foram realizadas movimentações.")
-    linhas.append("-" * 60)
-    linhas.append(f"Saldo atual: R$ {conta.saldo:.2f}")
-    mostrar_moldura_multilinha(linhas, borda='=')
+    anotar_operacao(conta=conta.numero)
+    # Os separadores têm a largura das linhas de transação
+    largura = calcular_largura_ideal(cabecalho + rodape)
+    corpo = linhas_extrato(conta, tipo_transacao, inicio, fim, pagina, tamanho_pagina)
+    mostrar_moldura_multilinha(chain(cabecalho, corpo, rodape), borda='=', largura=largura, tamanho_bloco=tamanho_pagina)
 
 @log_transacao
+@medir_operacao
 def criar_cliente(clientes):
     cpf = solicitar_cpf()
+    anotar_operacao(cpf=cpf)
     if filtrar_cliente(cpf, clientes):
+        anotar_operacao(motivo="Cliente já existe")
         mostrar_moldura("Cliente já existe!", borda='#')
         return
     nome = input("Nome completo: ")
     nascimento = input("Data de nascimento (dd/mm/aaaa): ")
     endereco = input("Endereço completo: ")
     cliente = PessoaFisica(nome, nascimento, cpf, endereco)
-    clientes.append(cliente)
+    clientes.adicionar(cliente)
     mostrar_moldura("Cliente criado com sucesso!", borda='*')
 
 @log_transacao
+@medir_operacao
 def criar_conta(clientes, contas):
     cpf = solicitar_cpf()
+    anotar_operacao(cpf=cpf)
     cliente = filtrar_cliente(cpf, clientes)
     if not cliente:
+        anotar_operacao(motivo="Cliente não encontrado")
         mostrar_moldura("Cliente não encontrado!", borda='#')
         return
     
     numero = len(contas) + 1
+    anotar_operacao(conta=numero)
     conta = ContaCorrente.nova_conta(cliente, numero)
     cliente.adicionar_conta(conta)
+    clientes.adicionar_conta(conta)
     contas.append(conta)
     mostrar_moldura("Conta criada com sucesso!", borda='*')
 
-def listar_contas(contas):
+def listar_contas(contas, ordenar_por=None, decrescente=False, tamanho_pagina=TAMANHO_PAGINA_CONTAS):
     if not contas:
         mostrar_moldura("Nenhuma conta encontrada!", borda='@')
         return
-    linhas = [str(conta) for conta in ContasIterador(contas)]
-    mostrar_moldura_multilinha(linhas, borda='@')
+    visao = ContasView(contas)
+    if ordenar_por is not None:
+        visao = visao.ordenar(ordenar_por, decrescente)
+    # A largura da moldura vem de uma primeira passada que só mede os blocos;
+    # na segunda, as páginas são formatadas e escritas uma a uma
+    largura = calcular_largura_ideal(visao.linhas())
+    corpo = chain.from_iterable(pagina.linhas() for pagina in visao.paginas(tamanho_pagina))
+    mostrar_moldura_multilinha(corpo, borda='@', largura=largura, tamanho_bloco=tamanho_pagina)
+
+# Modo não interativo: "--comandos <arquivo>" (ou "-" para a entrada padrão)
+# executa um comando compacto por linha com as mesmas operações do domínio,
+# sem menu nem molduras, e mostra um resumo no fim:
+#   NU <cpf> "<nome>" <nascimento> "<endereço>" | NC <cpf> | D <cpf> <valor>
+#   S <cpf> <valor> | E <cpf> | LC | Q (encerra a leitura)
+# Linhas vazias e iniciadas por # são ignoradas
+ResumoComandos = namedtuple("ResumoComandos", "total sucesso falhas erros segundos por_comando motivos")
+
+def opcao_linha_comando(argumentos, nome, padrao=None):
+    # Valor que segue a opção nome na linha de comando
+    if nome in argumentos:
+        posicao = argumentos.index(nome)
+        if posicao + 1 < len(argumentos):
+            return argumentos[posicao + 1]
+    return padrao
+
+def interpretar_comando(linha):
+    # (comando, argumentos), ou None para linhas vazias e comentários; só o
+    # NU, que tem textos com espaços, passa pelo shlex
+    linha = linha.strip()
+    if not linha or linha.startswith("#"):
+        return None
+    if linha[:3].upper() == "NU ":
+        partes = shlex.split(linha)
+    else:
+        partes = linha.split()
+    return partes[0].upper(), partes[1:]
+
+def valor_comando(texto):
+    # Conferido já na leitura: um valor fora da faixa é erro da linha
+    try:
+        valor = Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {texto!r}")
+    para_centavos(valor)
+    return valor
+
+def comando_novo_cliente(clientes, contas, cpf, nome, nascimento, endereco):
+    if not validar_cpf(cpf):
+        raise ValueError(f"CPF inválido: {cpf!r}")
+    if filtrar_cliente(cpf, clientes):
+        return Resultado(False, "Cliente já existe")
+    clientes.adicionar(PessoaFisica(nome, nascimento, cpf, endereco))
+    return Resultado(True, "Cliente criado com sucesso!")
+
+def comando_nova_conta(clientes, contas, cpf):
+    cliente = filtrar_cliente(cpf, clientes)
+    if not cliente:
+        return Resultado(False, "Cliente não encontrado")
+    conta = ContaCorrente.nova_conta(cliente, len(contas) + 1)
+    cliente.adicionar_conta(conta)
+    clientes.adicionar_conta(conta)
+    contas.append(conta)
+    return Resultado(True, "Conta criada com sucesso!")
+
+def comando_deposito(clientes, contas, cpf, valor):
+    conta = resolver_conta(clientes, cpf)
+    if conta is None:
+        return Resultado(False, "Conta não encontrada")
+    return conta.cliente.realizar_transacao(conta, Deposito(valor_comando(valor)))
+
+def comando_saque(clientes, contas, cpf, valor):
+    conta = resolver_conta(clientes, cpf)
+    if conta is None:
+        return Resultado(False, "Conta não encontrada")
+    return conta.cliente.realizar_transacao(conta, Saque(valor_comando(valor)))
+
+def comando_extrato(clientes, contas, cpf):
+    conta = resolver_conta(clientes, cpf)
+    if conta is None:
+        return Resultado(False, "Conta não encontrada")
+    # As linhas são geradas como no extrato do menu, mas não são exibidas
+    for _ in linhas_extrato(conta):
+        pass
+    return Resultado(True, "Extrato gerado")
+
+def comando_listar_contas(clientes, contas):
+    for _ in ContasView(contas).linhas():
+        pass
+    return Resultado(True, "Contas listadas")
+
+# comando -> (função, quantidade de argumentos)
+COMANDOS_SCRIPT = {
+    "NU": (comando_novo_cliente, 4),
+    "NC": (comando_nova_conta, 1),
+    "D": (comando_deposito, 2),
+    "S": (comando_saque, 2),
+    "E": (comando_extrato, 1),
+    "LC": (comando_listar_contas, 0),
+}
+
+def executar_comandos(linhas, clientes, contas):
+    # Falhas são recusas do domínio (saldo, limites, cliente inexistente);
+    # erros são linhas que não puderam ser interpretadas, relatadas no stderr
+    por_comando = Counter()
+    motivos = Counter()
+    sucesso = falhas = erros = 0
+    inicio = time.perf_counter()
+    for numero, linha in enumerate(linhas, 1):
+        try:
+            interpretado = interpretar_comando(linha)
+            if interpretado is None:
+                continue
+            comando, argumentos = interpretado
+            if comando == "Q":
+                break
+            if comando not in COMANDOS_SCRIPT:
+                raise ValueError(f"Comando desconhecido: {comando}")
+            executar, quantidade = COMANDOS_SCRIPT[comando]
+            if len(argumentos) != quantidade:
+                raise ValueError(f"{comando} espera {quantidade} argumento(s)")
+            por_comando[comando] += 1
+            resultado = executar(clientes, contas, *argumentos)
+        except (ValueError, ArithmeticError) as e:
+            erros += 1
+            sys.stderr.write(f"linha {numero}: {e}\n")
+            continue
+        if resultado:
+            sucesso += 1
+        else:
+            falhas += 1
+            motivos[resultado.mensagem] += 1
+    segundos = time.perf_counter() - inicio
+    return ResumoComandos(sucesso + falhas + erros, sucesso, falhas, erros, segundos, por_comando, motivos)
+
+def executar_arquivo_comandos(caminho, clientes, contas):
+    anterior = APRESENTADOR
+    configurar_apresentador(ApresentadorSilencioso())
+    try:
+        if caminho == "-":
+            resumo = executar_comandos(sys.stdin, clientes, contas)
+        else:
+            with open(caminho, encoding="utf-8") as arquivo:
+                resumo = executar_comandos(arquivo, clientes, contas)
+    finally:
+        configurar_apresentador(anterior)
+    mostrar_resumo_comandos(resumo)
+    return resumo
+
+def mostrar_resumo_comandos(resumo):
+    vazao = resumo.total / resumo.segundos if resumo.segundos else 0
+    linhas = [
+        "RESUMO DOS COMANDOS",
+        "-" * 45,
+        f"Comandos: {resumo.total}",
+        f"Sucesso: {resumo.sucesso} | Falhas: {resumo.falhas} | Erros: {resumo.erros}",
+        f"Tempo: {resumo.segundos:.3f} s | Vazão: {vazao:,.0f} comandos/s",
+        "-" * 45,
+    ]
+    linhas.extend(f"{comando}: {quantidade}" for comando, quantidade in sorted(resumo.por_comando.items()))
+    linhas.extend(f"{motivo}: {quantidade}" for motivo, quantidade in resumo.motivos.most_common())
+    mostrar_moldura_multilinha(linhas, borda='=', largura=calcular_largura_ideal(linhas))
+
+# Serviço HTTP/JSON com asyncio (só a biblioteca padrão), ligado com
+# "--servir [host:]porta":
+#   POST /clientes              {"cpf", "nome", "data_nascimento", "endereco"}
+#   POST /contas                {"cpf"}
+#   GET  /contas                ?ordenar=numero|saldo|titular&cursor=0&tamanho=500
+#   POST /contas/<n>/depositos  {"valor": "10.50"}
+#   POST /contas/<n>/saques     {"valor": "10.50"}
+#   GET  /contas/<n>/extrato    ?tipo=Saque&pagina=1
+# As operações passam por log_transacao e medir_operacao como as do menu
+RAZOES_HTTP = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 422: "Unprocessable Entity",
+    500: "Internal Server Error",
+}
+# Os corpos das rotas são objetos pequenos; acima disso a requisição é recusada
+# sem ler o corpo
+TAMANHO_MAXIMO_CORPO = 16 * 1024
+
+class CorpoExcedido(Exception):
+    pass
+
+@log_transacao
+@medir_operacao
+def cadastrar_cliente(clientes, cpf, nome, data_nascimento, endereco):
+    anotar_operacao(cpf=cpf)
+    if not validar_cpf(cpf):
+        anotar_operacao(motivo="CPF inválido")
+        return Resultado(False, "CPF inválido! Deve conter 11 dígitos.")
+    # adicionar confere e cadastra sob a trava do cadastro
+    if not clientes.adicionar(PessoaFisica(nome, data_nascimento, cpf, endereco)):
+        anotar_operacao(motivo="Cliente já existe")
+        return Resultado(False, "Cliente já existe!")
+    return Resultado(True, "Cliente criado com sucesso!")
+
+@log_transacao
+@medir_operacao
+def abrir_conta(clientes, contas, cpf):
+    anotar_operacao(cpf=cpf)
+    cliente = filtrar_cliente(cpf, clientes)
+    if not cliente:
+        anotar_operacao(motivo="Cliente não encontrado")
+        return None
+    # O número sai de len(contas): a trava do cadastro evita números repetidos
+    with clientes._trava:
+        conta = ContaCorrente.nova_conta(cliente, len(contas) + 1)
+        cliente.adicionar_conta(conta)
+        clientes.adicionar_conta(conta)
+        contas.append(conta)
+    anotar_operacao(conta=conta.numero)
+    return conta
+
+@log_transacao
+@medir_operacao
+def depositar_valor(conta, valor):
+    anotar_operacao(cpf=conta.cliente.cpf, conta=conta.numero)
+    return conta.cliente.realizar_transacao(conta, Deposito(valor))
+
+@log_transacao
+@medir_operacao
+def sacar_valor(conta, valor):
+    anotar_operacao(cpf=conta.cliente.cpf, conta=conta.numero)
+    return conta.cliente.realizar_transacao(conta, Saque(valor))
+
+@log_transacao
+@medir_operacao
+def gerar_extrato(conta, tipo_transacao=None, pagina=1, tamanho_pagina=TAMANHO_PAGINA_EXTRATO):
+    anotar_operacao(cpf=conta.cliente.cpf, conta=conta.numero)
+    transacoes = islice(conta.historico.gerar_relatorio(tipo_transacao), (pagina - 1) * tamanho_pagina, pagina * tamanho_pagina)
+    return {
+        "agencia": conta.agencia,
+        "numero": conta.numero,
+        "saldo": f"{conta.saldo:.2f}",
+        "transacoes": [{"data": t.data, "tipo": t.tipo, "valor": f"{t.valor:.2f}"} for t in transacoes],
+    }
+
+def consultar_contas(visao, cursor=0, tamanho=TAMANHO_PAGINA_CONTAS):
+    pagina, proximo = visao.pagina(cursor, tamanho)
+    return {
+        "contas": [
+            {"agencia": conta.agencia, "numero": conta.numero, "titular": conta.cliente.nome, "saldo": f"{conta.saldo:.2f}"}
+            for conta in pagina
+        ],
+        "proximo": proximo,
+    }
+
+def executar_pendentes(pendentes):
+    # Roda as operações de uma conta em sequência, numa thread do pool; cada
+    # uma devolve (sucesso, resultado ou exceção)
+    saidas = []
+    for funcao, args in pendentes:
+        try:
+            saidas.append((True, funcao(*args)))
+        except Exception as e:
+            saidas.append((False, e))
+    return saidas
+
+def inteiro_consulta(consulta, nome, padrao, minimo=0):
+    # Parâmetro inteiro da query string; fora do formato ou abaixo do mínimo é 400
+    texto = consulta.get(nome)
+    if texto is None:
+        return padrao
+    if not texto.isdigit() or int(texto) < minimo:
+        raise ValueError(f"{nome} deve ser um inteiro a partir de {minimo}")
+    return int(texto)
+
+# Ordenações cujas chaves só mudam com a abertura de uma conta; a por saldo
+# muda a cada lançamento e é refeita em toda consulta
+ORDENACOES_ESTAVEIS = frozenset(("numero", "titular"))
+
+class ServicoBanco:
+    def __init__(self, clientes, contas, threads=None):
+        import json
+        self.clientes = clientes
+        self.contas = contas
+        # ordenação -> (quantidade de contas, ContasView ordenada)
+        self._ordenadas = {}
+        self._codificar = json.JSONEncoder(ensure_ascii=False).encode
+        self._decodificar = json.loads
+        # Com threads (o padrão quando há diário, cujo fsync bloquearia o
+        # loop), as operações de cada conta vão para uma fila própria,
+        # esvaziada em ordem por uma tarefa que roda o lote pendente no pool:
+        # contas diferentes nunca esperam umas pelas outras e a fila só existe
+        # enquanto há operações pendentes. Sem threads, cada operação roda
+        # inteira no loop, que já as serializa
+        self._pool = None
+        if threads:
+            from concurrent.futures import ThreadPoolExecutor
+            self._pool = ThreadPoolExecutor(threads)
+        self._filas = {}
+
+    def _contas_ordenadas(self, ordenar_por):
+        # A visão ordenada é reaproveitada até que uma conta seja aberta
+        quantidade = len(self.contas)
+        guardada = self._ordenadas.get(ordenar_por)
+        if guardada is not None and guardada[0] == quantidade:
+            return guardada[1]
+        visao = ContasView(self.contas).ordenar(ordenar_por)
+        if ordenar_por in ORDENACOES_ESTAVEIS:
+            self._ordenadas[ordenar_por] = (quantidade, visao)
+        return visao
+
+    def _consultar_contas(self, ordenar_por, cursor, tamanho):
+        return consultar_contas(self._contas_ordenadas(ordenar_por), cursor, tamanho)
+
+    async def executar(self, funcao, *args):
+        if self._pool is None:
+            return funcao(*args)
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(self._pool, funcao, *args)
+
+    async def executar_na_conta(self, conta, funcao, *args):
+        if self._pool is None:
+            return funcao(*args)
+        import asyncio
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        chave = chave_trava(conta)
+        fila = self._filas.get(chave)
+        if fila is None:
+            fila = self._filas[chave] = deque()
+            loop.create_task(self._esvaziar(chave, fila))
+        fila.append((futuro, funcao, args))
+        return await futuro
+
+    async def _esvaziar(self, chave, fila):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        try:
+            while fila:
+                lote = list(fila)
+                fila.clear()
+                saidas = await loop.run_in_executor(self._pool, executar_pendentes, [(funcao, args) for _, funcao, args in lote])
+                for (futuro, _, _), (sucesso, valor) in zip(lote, saidas):
+                    if futuro.done():
+                        continue
+                    if sucesso:
+                        futuro.set_result(valor)
+                    else:
+                        futuro.set_exception(valor)
+        finally:
+            del self._filas[chave]
+
+    async def atender(self, leitor, escritor):
+        # Uma conexão HTTP/1.1, com keep-alive
+        import asyncio
+        try:
+            while True:
+                try:
+                    requisicao = await self._ler_requisicao(leitor)
+                except (ValueError, asyncio.LimitOverrunError):
+                    escritor.write(self._resposta(400, {"sucesso": False, "mensagem": "Requisição malformada"}, False))
+                    break
+                except CorpoExcedido:
+                    mensagem = f"Corpo acima de {TAMANHO_MAXIMO_CORPO} bytes"
+                    escritor.write(self._resposta(413, {"sucesso": False, "mensagem": mensagem}, False))
+                    break
+                if requisicao is None:
+                    break
+                metodo, alvo, corpo, manter = requisicao
+                status, dados = await self._rotear(metodo, alvo, corpo)
+                escritor.write(self._resposta(status, dados, manter))
+                await escritor.drain()
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _ler_requisicao(self, leitor):
+        import asyncio
+        try:
+            cabecalho = await leitor.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise ValueError("Cabeçalho incompleto")
+            return None
+        linhas = cabecalho.decode("latin-1").split("\r\n")
+        metodo, alvo, versao = linhas[0].split(" ", 2)
+        campos = {}
+        for linha in linhas[1:]:
+            if linha:
+                nome, _, valor = linha.partition(":")
+                campos[nome.strip().lower()] = valor.strip()
+        tamanho = int(campos.get("content-length", 0))
+        if tamanho < 0:
+            raise ValueError("Content-Length negativo")
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            raise CorpoExcedido(tamanho)
+        corpo = await leitor.readexactly(tamanho) if tamanho else b""
+        conexao = campos.get("connection", "").lower()
+        manter = conexao != "close" if versao == "HTTP/1.1" else conexao == "keep-alive"
+        return metodo, alvo, corpo, manter
+
+    def _resposta(self, status, dados, manter):
+        corpo = self._codificar(dados).encode()
+        cabecalho = (
+            f"HTTP/1.1 {status} {RAZOES_HTTP[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n"
+        )
+        return cabecalho.encode() + corpo
+
+    async def _rotear(self, metodo, alvo, corpo):
+        from urllib.parse import parse_qs, urlsplit
+        partes_alvo = urlsplit(alvo)
+        caminho = [parte for parte in partes_alvo.path.split("/") if parte]
+        consulta = {nome: valores[-1] for nome, valores in parse_qs(partes_alvo.query).items()}
+        try:
+            dados = self._decodificar(corpo) if corpo else {}
+            if not isinstance(dados, dict):
+                raise ValueError("O corpo deve ser um objeto JSON")
+            if caminho == ["clientes"]:
+                if metodo != "POST":
+                    return 405, {"sucesso": False, "mensagem": "Método não permitido"}
+                resultado = await self.executar(
+                    cadastrar_cliente, self.clientes, str(dados["cpf"]), dados["nome"], dados["data_nascimento"], dados["endereco"]
+                )
+                return (201 if resultado else 422), {"sucesso": resultado.sucesso, "mensagem": resultado.mensagem}
+            if caminho == ["contas"]:
+                if metodo == "GET":
+                    ordenar_por = consulta.get("ordenar", "numero")
+                    if ordenar_por not in CHAVES_CONTAS:
+                        raise ValueError(f"Ordenação desconhecida: {ordenar_por}")
+                    cursor = inteiro_consulta(consulta, "cursor", 0)
+                    tamanho = inteiro_consulta(consulta, "tamanho", TAMANHO_PAGINA_CONTAS, minimo=1)
+                    return 200, await self.executar(self._consultar_contas, ordenar_por, cursor, tamanho)
+                if metodo != "POST":
+                    return 405, {"sucesso": False, "mensagem": "Método não permitido"}
+                conta = await self.executar(abrir_conta, self.clientes, self.contas, str(dados["cpf"]))
+                if conta is None:
+                    return 404, {"sucesso": False, "mensagem": "Cliente não encontrado"}
+                return 201, {"sucesso": True, "mensagem": "Conta criada com sucesso!", "agencia": conta.agencia, "numero": conta.numero}
+            if len(caminho) == 3 and caminho[0] == "contas" and caminho[1].isdigit():
+                conta = self.clientes.buscar_conta(AGENCIA, int(caminho[1]))
+                if conta is None:
+                    return 404, {"sucesso": False, "mensagem": "Conta não encontrada"}
+                operacao = caminho[2]
+                if operacao == "extrato" and metodo == "GET":
+                    pagina = inteiro_consulta(consulta, "pagina", 1, minimo=1)
+                    return 200, await self.executar_na_conta(conta, gerar_extrato, conta, consulta.get("tipo"), pagina)
+                if operacao in ("depositos", "saques") and metodo == "POST":
+                    valor = valor_comando(str(dados["valor"]))
+                    funcao = depositar_valor if operacao == "depositos" else sacar_valor
+                    resultado = await self.executar_na_conta(conta, funcao, conta, valor)
+                    return (200 if resultado else 422), {
+                        "sucesso": resultado.sucesso, "mensagem": resultado.mensagem, "saldo": f"{conta.saldo:.2f}"
+                    }
+            return 404, {"sucesso": False, "mensagem": "Rota não encontrada"}
+        except KeyError as e:
+            return 400, {"sucesso": False, "mensagem": f"Campo obrigatório ausente: {e.args[0]}"}
+        except (ValueError, ArithmeticError) as e:
+            return 400, {"sucesso": False, "mensagem": str(e) if isinstance(e, ValueError) else "Valor inválido"}
+        except Exception:
+            # O detalhe fica no servidor; o cliente só recebe o status
+            import traceback
+            traceback.print_exc(file=sys.stderr)
+            return 500, {"sucesso": False, "mensagem": "Erro interno do servidor"}
+
+def separar_endereco(endereco, host_padrao="127.0.0.1"):
+    # "porta" ou "host:porta"
+    host, _, porta = endereco.rpartition(":")
+    return host or host_padrao, int(porta)
+
+def servir(endereco, clientes, contas, threads=None):
+    import asyncio
+    host, porta = separar_endereco(endereco)
+    if threads is None:
+        threads = 8 if DIARIO is not None else 0
+    servico = ServicoBanco(clientes, contas, threads)
+
+    async def executar():
+        servidor = await asyncio.start_server(servico.atender, host, porta, backlog=4096)
+        mostrar_moldura(f"Servindo em http://{host}:{porta} (Ctrl+C encerra)", borda='=')
+        async with servidor:
+            await servidor.serve_forever()
+
+    anterior = APRESENTADOR
+    configurar_apresentador(ApresentadorSilencioso())
+    try:
+        asyncio.run(executar())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        configurar_apresentador(anterior)
+
+# Teste de carga do serviço: "--carga [host:]porta [--sessoes N] [--requisicoes N]".
+# Cada sessão é uma conexão keep-alive com um cliente e uma conta próprios,
+# que alterna depósitos, saques e extratos; o resumo traz requisições por
+# segundo, percentis de latência e as respostas por status
+async def requisitar(leitor, escritor, metodo, caminho, dados=None):
+    import json
+    corpo = json.dumps(dados).encode() if dados is not None else b""
+    escritor.write(
+        f"{metodo} {caminho} HTTP/1.1\r\nHost: banco\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(corpo)}\r\n\r\n".encode() + corpo
+    )
+    await escritor.drain()
+    cabecalho = await leitor.readuntil(b"\r\n\r\n")
+    linhas = cabecalho.decode("latin-1").split("\r\n")
+    status = int(linhas[0].split(" ", 2)[1])
+    tamanho = 0
+    for linha in linhas[1:]:
+        nome, _, valor = linha.partition(":")
+        if nome.strip().lower() == "content-length":
+            tamanho = int(valor)
+    resposta = await leitor.readexactly(tamanho)
+    return status, json.loads(resposta)
+
+def testar_carga(endereco, sessoes=100, requisicoes=100):
+    import asyncio
+    host, porta = separar_endereco(endereco)
+    latencias = HistogramaLatencia()
+    status = Counter()
+    # CPFs a partir do instante, para que testes seguidos não colidam
+    base = (time.time_ns() // 1000) % 10**10
+
+    async def sessao(numero):
+        leitor, escritor = await asyncio.open_connection(host, porta)
+        try:
+            cpf = f"9{(base + numero) % 10**10:010d}"
+            await requisitar(leitor, escritor, "POST", "/clientes", {"cpf": cpf, "nome": f"Carga {numero}", "data_nascimento": "01/01/2000", "endereco": "Rua Carga"})
+            _, conta = await requisitar(leitor, escritor, "POST", "/contas", {"cpf": cpf})
+            caminho = f"/contas/{conta['numero']}"
+            for indice in range(requisicoes):
+                if indice % 3 == 0:
+                    metodo, destino, dados = "POST", caminho + "/depositos", {"valor": "10.00"}
+                elif indice % 3 == 1:
+                    metodo, destino, dados = "POST", caminho + "/saques", {"valor": "5.00"}
+                else:
+                    metodo, destino, dados = "GET", caminho + "/extrato", None
+                inicio = time.perf_counter_ns()
+                codigo, _ = await requisitar(leitor, escritor, metodo, destino, dados)
+                latencias.registrar(time.perf_counter_ns() - inicio)
+                status[codigo] += 1
+        finally:
+            escritor.close()
+
+    async def executar():
+        inicio = time.perf_counter()
+        await asyncio.gather(*(sessao(numero) for numero in range(sessoes)))
+        return time.perf_counter() - inicio
+
+    segundos = asyncio.run(executar())
+    linhas = [
+        "TESTE DE CARGA",
+        "-" * 45,
+        f"Sessões: {sessoes} | Requisições: {latencias.total}",
+        f"Tempo: {segundos:.3f} s | Vazão: {latencias.total / segundos:,.0f} req/s",
+        f"Latência p50: {latencias.percentil(50) / 1e6:.2f} ms | p99: {latencias.percentil(99) / 1e6:.2f} ms",
+        f"Latência máxima: {latencias.maximo / 1e6:.2f} ms",
+        "-" * 45,
+    ]
+    linhas.extend(f"HTTP {codigo}: {quantidade}" for codigo, quantidade in sorted(status.items()))
+    mostrar_moldura_multilinha(linhas, borda='=', largura=calcular_largura_ideal(linhas))
+    return latencias, status, segundos
 
 def main():
-    clientes = []
-    contas = []
+    argumentos = sys.argv[1:]
+    endereco_carga = opcao_linha_comando(argumentos, "--carga")
+    if endereco_carga:
+        testar_carga(
+            endereco_carga,
+            int(opcao_linha_comando(argumentos, "--sessoes", 100)),
+            int(opcao_linha_comando(argumentos, "--requisicoes", 100)),
+        )
+        return
+    # Com BANCO_XYZ_HISTORICO=compacto, o histórico das contas fica em arrays
+    # (HistoricoCompacto) em vez de um objeto por transação
+    nome_historico = os.environ.get("BANCO_XYZ_HISTORICO")
+    if nome_historico:
+        classe = CLASSES_HISTORICO.get(nome_historico.lower())
+        if classe is None:
+            raise SystemExit(f"BANCO_XYZ_HISTORICO deve ser um de: {', '.join(CLASSES_HISTORICO)}")
+        configurar_historico(classe)
+    # Com --segmentos DIR, o histórico compacto guarda os dias encerrados em
+    # arquivos no diretório, apagados ao encerrar
+    diretorio_segmentos = opcao_linha_comando(argumentos, "--segmentos")
+    if diretorio_segmentos:
+        configurar_segmentos(diretorio_segmentos)
+    # Com BANCO_XYZ_DADOS definido, o estado é recuperado do disco e cada
+    # operação é gravada no diário
+    diretorio_dados = os.environ.get("BANCO_XYZ_DADOS")
+    if diretorio_dados:
+        clientes, contas = recuperar_estado(diretorio_dados)
+        configurar_diario(Diario(diretorio_dados, clientes))
+    else:
+        clientes = ClienteRegistry()
+        contas = []
+    # Com BANCO_XYZ_AUDITORIA definido, as operações geram registros de auditoria
+    caminho_auditoria = os.environ.get("BANCO_XYZ_AUDITORIA")
+    if caminho_auditoria:
+        configurar_auditoria(AuditoriaAssincrona(caminho_auditoria))
+    caminho_comandos = opcao_linha_comando(argumentos, "--comandos")
+    endereco_servico = opcao_linha_comando(argumentos, "--servir")
+    if caminho_comandos or endereco_servico:
+        if caminho_comandos:
+            executar_arquivo_comandos(caminho_comandos, clientes, contas)
+        else:
+            servir(endereco_servico, clientes, contas)
+        configurar_diario(None)
+        configurar_auditoria(None)
+        fechar_segmentos(clientes)
+        gravar_metricas()
+        return
     while True:
         try:
             opcao = menu().strip().upper()
@@ -467,13 +3215,24 @@ def main():
             elif opcao == 'LC':
                 listar_contas(contas)
             elif opcao == 'Q':
+                configurar_diario(None)
+                configurar_auditoria(None)
+                fechar_segmentos(clientes)
+                gravar_metricas()
                 mostrar_moldura("Encerrando o sistema...", borda='=')
                 break
             elif opcao == 'TZ': # Menu oculto para setar o TZ
                 configurar_timezone()
+            elif opcao == 'PF': # Menu oculto para ligar/desligar a captura de perfil
+                alternar_perfil()
+            elif opcao == 'FM': # Menu oculto para o fechamento mensal
+                executar_fechamento_mensal(clientes)
             else:
                 mostrar_moldura("Opção inválida!", borda='#')
         except Exception as e:
             mostrar_moldura(f"Erro: {e}", borda='#')
 
-main()
+if __name__ == "__main__":
+    main()
+elif __name__ == "__particao__":
+    servir_particao(*PARTICAO)
@@ -0,0 +1,96 @@
+import importlib.util
+import pathlib
+import sys
+import time
+
+import pytest
+
+RAIZ = pathlib.Path(__file__).resolve().parent.parent
+V4 = RAIZ / "desafios-04-05-decorador-iterador-gerador-datas-timezones.py"
+
+
+def carregar_script(caminho, nome):
+    # Os scripts têm hífens no nome: são carregados pelo caminho, e o main()
+    # só roda sob __main__
+    spec = importlib.util.spec_from_file_location(nome, caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nome] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+@pytest.fixture
+def banco():
+    # Módulo novo a cada teste: relógio, diário e limites são globais
+    modulo = carregar_script(V4, "banco_v4")
+    modulo.configurar_apresentador(modulo.ApresentadorSilencioso())
+    yield modulo
+    modulo.configurar_diario(None)
+    modulo.configurar_auditoria(None)
+    sys.modules.pop("banco_v4", None)
+
+
+@pytest.fixture
+def carregar():
+    # Carrega um script da raiz pelo nome do arquivo, num módulo novo que sai
+    # de sys.modules ao fim do teste
+    nomes = []
+
+    def carregar(arquivo):
+        nome = f"script_{len(nomes)}"
+        nomes.append(nome)
+        return carregar_script(RAIZ / arquivo, nome)
+
+    yield carregar
+    for nome in nomes:
+        sys.modules.pop(nome, None)
+
+
+@pytest.fixture
+def abrir_contas(banco):
+    def abrir(quantidade, clientes=None, saldo_inicial=0):
+        clientes = banco.ClienteRegistry() if clientes is None else clientes
+        contas = []
+        for numero in range(1, quantidade + 1):
+            cliente = banco.PessoaFisica(f"Cliente {numero}", "01/01/2000", f"{numero:011d}", "Rua A, 1")
+            clientes.adicionar(cliente)
+            conta = banco.ContaCorrente.nova_conta(cliente, numero)
+            cliente.adicionar_conta(conta)
+            clientes.adicionar_conta(conta)
+            if saldo_inicial:
+                banco.Deposito(saldo_inicial).registrar(conta)
+            contas.append(conta)
+        return clientes, contas
+
+    return abrir
+
+
+@pytest.fixture
+def trocas_frequentes():
+    # Trocas de thread bem mais frequentes que o padrão de 5 ms, para que as
+    # corridas apareçam em poucas operações
+    anterior = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    yield
+    sys.setswitchinterval(anterior)
+
+
+@pytest.fixture
+def pontos_de_troca(banco, monkeypatch, trocas_frequentes):
+    # Cede a vez logo depois de cada conferência (limite diário, saldo), no
+    # intervalo entre conferir e alterar: sem as travas das contas, as
+    # corridas aparecem em quase toda execução
+    def ceder_depois(metodo):
+        def envolvido(*args, **kwargs):
+            resultado = metodo(*args, **kwargs)
+            time.sleep(0)
+            return resultado
+
+        return envolvido
+
+    for classe, nome in (
+        (banco.Historico, "excedeu_limite"),
+        (banco.ContaCorrente, "_validar_saque"),
+        (banco.Transferencia, "_preparar"),
+    ):
+        monkeypatch.setattr(classe, nome, ceder_depois(getattr(classe, nome)))
@@ -0,0 +1,64 @@
+import json
+import threading
+
+
+def ler_linhas(caminho):
+    return [json.loads(linha) for linha in caminho.read_text(encoding="utf-8").splitlines()]
+
+
+def test_auditoria_should_gravar_tudo_com_a_fila_cheia(banco, tmp_path):
+    caminho = tmp_path / "auditoria.jsonl"
+    auditoria = banco.AuditoriaAssincrona(str(caminho), capacidade=8, lote=4, intervalo=0.01)
+    banco.configurar_auditoria(auditoria)
+
+    def registrar(trabalhador):
+        for n in range(250):
+            instante = trabalhador * 1000 + n
+            if n % 5 == 0:
+                desfecho = {"resultado": banco.Resultado(False, "Saldo insuficiente"), "erro": None}
+            elif n % 7 == 0:
+                desfecho = {"resultado": None, "erro": ValueError("Valor inválido")}
+            else:
+                desfecho = {"resultado": banco.Resultado(True, "ok"), "erro": None}
+            auditoria.registrar("sacar", instante, {"cpf": f"{trabalhador:011d}", "conta": n}, desfecho["resultado"], desfecho["erro"], 2500)
+
+    threads = [threading.Thread(target=registrar, args=(t,)) for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Encerrar a auditoria descarrega o que ainda estiver na fila
+    banco.configurar_auditoria(None)
+
+    registros = ler_linhas(caminho)
+    assert sorted(r["instante"] for r in registros) == [t * 1000 + n for t in range(4) for n in range(250)]
+    por_instante = {r["instante"]: r for r in registros}
+    assert por_instante[2005] == {
+        "instante": 2005, "operacao": "sacar", "cpf": "00000000002", "conta": 5,
+        "desfecho": "falha", "mensagem": "Saldo insuficiente", "latencia_us": 2.5,
+    }
+    assert por_instante[7]["desfecho"] == "erro"
+    assert por_instante[7]["mensagem"] == "ValueError: Valor inválido"
+    assert por_instante[1]["desfecho"] == "sucesso"
+    # Cada thread grava os seus registros na ordem em que os registrou
+    for trabalhador in range(4):
+        proprios = [r["instante"] for r in registros if r["cpf"] == f"{trabalhador:011d}"]
+        assert proprios == sorted(proprios)
+
+
+def test_auditoria_should_rotacionar_e_manter_so_os_arquivos_mais_recentes(banco, tmp_path):
+    caminho = tmp_path / "auditoria.jsonl"
+    auditoria = banco.AuditoriaAssincrona(str(caminho), capacidade=16, lote=8, intervalo=0.01, tamanho_maximo=2000, arquivos_mantidos=2)
+    banco.configurar_auditoria(auditoria)
+    for n in range(400):
+        auditoria.registrar("depositar", n, {"cpf": "12345678901", "conta": 1}, banco.Resultado(True, "ok"), None, 1000)
+    banco.configurar_auditoria(None)
+
+    arquivos = sorted(p.name for p in tmp_path.iterdir())
+    assert arquivos == ["auditoria.jsonl", "auditoria.jsonl.1", "auditoria.jsonl.2"]
+    for rotacionado in ("auditoria.jsonl.1", "auditoria.jsonl.2"):
+        assert (tmp_path / rotacionado).stat().st_size >= 2000
+    # Do mais antigo mantido ao atual, os registros são os últimos, sem lacunas
+    instantes = [r["instante"] for nome in reversed(arquivos) for r in ler_linhas(tmp_path / nome)]
+    assert instantes == list(range(400 - len(instantes), 400))
+    assert len(instantes) < 400
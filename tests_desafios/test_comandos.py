@@ -0,0 +1,82 @@
+import pytest
+
+# Arquivos de comandos com sucessos, recusas do domínio e linhas inválidas,
+# um por versão (cada uma aceita um conjunto próprio de comandos)
+COMANDOS_V1 = """\
+# depósito, saque e extrato numa conta só
+D 100.00
+S 30.00
+S 1000
+X 1
+D abc
+
+E
+Q
+D 1
+"""
+
+COMANDOS_V2 = """\
+NU 12345678901 "Ana" 01/01/2000 "Rua A, 1"
+NU 12345678901 "Ana" 01/01/2000 "Rua A, 1"
+NC 12345678901
+NC 99999999999
+D 100.00
+S 1000
+D 1e30
+ZZ
+E
+LC
+Q
+D 1
+"""
+
+COMANDOS_V3_V4 = """\
+NU 12345678901 "Ana" 01/01/2000 "Rua A, 1"
+NU 123 "Bia" 01/01/2000 "Rua B, 2"
+NC 12345678901
+NC 99999999999
+D 12345678901 100.00
+S 12345678901 1000
+D 12345678901 abc
+D 12345678901
+# extrato e listagem
+E 12345678901
+LC
+Q
+D 12345678901 1
+"""
+
+
+def executar_v1(banco, linhas):
+    sucesso, falhas, erros, _ = banco.executar_comandos(linhas)
+    return sucesso, falhas, erros
+
+
+def executar_v2(banco, linhas):
+    resumo = banco.executar_comandos(linhas)
+    return resumo["sucesso"], resumo["falhas"], resumo["erros"]
+
+
+def executar_v3_v4(banco, linhas):
+    resumo = banco.executar_comandos(linhas, banco.ClienteRegistry(), [])
+    assert resumo.total == resumo.sucesso + resumo.falhas + resumo.erros
+    return resumo.sucesso, resumo.falhas, resumo.erros
+
+
+@pytest.mark.parametrize("arquivo, comandos, executar, contagens, linhas_com_erro", [
+    ("desafio-01.py", COMANDOS_V1, executar_v1, (3, 1, 2), [5, 6]),
+    ("desafio-02-Estrutura-de-dados.py", COMANDOS_V2, executar_v2, (5, 3, 2), [7, 8]),
+    ("desafio-03-POO.py", COMANDOS_V3_V4, executar_v3_v4, (5, 2, 3), [2, 7, 8]),
+    ("desafios-04-05-decorador-iterador-gerador-datas-timezones.py", COMANDOS_V3_V4, executar_v3_v4, (5, 2, 3), [2, 7, 8]),
+])
+def test_executar_comandos_should_contar_e_apontar_as_linhas_com_erro(
+        carregar, capsys, tmp_path, arquivo, comandos, executar, contagens, linhas_com_erro):
+    banco = carregar(arquivo)
+    caminho = tmp_path / "comandos.txt"
+    caminho.write_text(comandos, encoding="utf-8")
+
+    with open(caminho, encoding="utf-8") as linhas:
+        assert executar(banco, linhas) == contagens
+
+    erros = capsys.readouterr().err.splitlines()
+    assert [int(linha.split(":")[0].removeprefix("linha ")) for linha in erros] == linhas_com_erro
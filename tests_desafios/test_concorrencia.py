@@ -0,0 +1,164 @@
+import random
+import threading
+
+import pytest
+
+# Sinal de cada tipo de entrada do histórico no saldo da conta
+SINAIS = {
+    "Deposito": 1,
+    "Saque": -1,
+    "TransferenciaEnviada": -1,
+    "TransferenciaRecebida": 1,
+    "Juros": 1,
+    "Tarifa": -1,
+    "Encargo": -1,
+}
+
+
+def soma_historico(conta):
+    return sum(SINAIS[t.tipo] * t.centavos for t in conta.historico.transacoes)
+
+
+def rodar_threads(alvo, argumentos):
+    threads = [threading.Thread(target=alvo, args=args) for args in argumentos]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert not any(thread.is_alive() for thread in threads), "threads travadas (deadlock?)"
+
+
+@pytest.fixture
+def sem_limite_diario(banco):
+    banco.Historico.LIMITE_DIARIO = 10**9
+
+
+def test_transferencias_concorrentes_should_conservar_saldo_total(banco, abrir_contas, sem_limite_diario, pontos_de_troca):
+    # Poucas contas com saldo baixo: boa parte das transferências disputa o
+    # último saldo da origem
+    _, contas = abrir_contas(5, saldo_inicial=10)
+    total_inicial = sum(conta._saldo for conta in contas)
+
+    def transferir(semente):
+        sorteio = random.Random(semente)
+        for _ in range(1000):
+            origem, destino = sorteio.sample(contas, 2)
+            banco.transferir(origem, destino, sorteio.randint(1, 8))
+
+    rodar_threads(transferir, [(semente,) for semente in range(8)])
+
+    assert sum(conta._saldo for conta in contas) == total_inicial
+    assert all(conta._saldo >= 0 for conta in contas)
+
+
+def test_transferencias_disputando_o_saldo_should_aceitar_uma_so(banco, abrir_contas, sem_limite_diario, pontos_de_troca):
+    # 20 transferências do saldo inteiro da mesma origem ao mesmo tempo
+    _, contas = abrir_contas(21, saldo_inicial=10)
+    origem, destinos = contas[0], contas[1:]
+    barreira = threading.Barrier(len(destinos))
+    aceitas = []
+
+    def transferir(destino):
+        barreira.wait()
+        aceitas.append(bool(banco.transferir(origem, destino, 10)))
+
+    rodar_threads(transferir, [(destino,) for destino in destinos])
+
+    assert sum(aceitas) == 1
+    assert origem._saldo == 0
+    assert sum(conta._saldo for conta in contas) == 21 * 10 * 100
+
+
+def test_transferencias_cruzadas_should_nao_travar(banco, abrir_contas, sem_limite_diario, pontos_de_troca):
+    _, (a, b) = abrir_contas(2, saldo_inicial=1000)
+
+    def cruzar(origem, destino):
+        for _ in range(2000):
+            banco.transferir(origem, destino, 1)
+
+    rodar_threads(cruzar, [(a, b), (b, a)])
+
+    assert a._saldo + b._saldo == 2 * 1000 * 100
+
+
+def test_limite_diario_should_valer_sob_disputa(banco, abrir_contas, pontos_de_troca):
+    _, (conta,) = abrir_contas(1)
+    barreira = threading.Barrier(50)
+    aceitos = []
+
+    def depositar():
+        barreira.wait()
+        aceitos.append(bool(banco.Deposito(1).registrar(conta)))
+
+    rodar_threads(depositar, [()] * 50)
+
+    assert sum(aceitos) == banco.Historico.LIMITE_DIARIO
+    assert conta.historico.transacoes_hoje() == banco.Historico.LIMITE_DIARIO
+    assert conta._saldo == banco.Historico.LIMITE_DIARIO * 100
+
+
+def test_limite_diario_should_valer_para_transferencias_recebidas(banco, abrir_contas, pontos_de_troca):
+    # 30 origens disputando o mesmo destino: o destino aceita só o seu limite
+    _, contas = abrir_contas(31, saldo_inicial=100)
+    destino, origens = contas[0], contas[1:]
+    banco.Historico.LIMITE_DIARIO = 11  # o depósito inicial já conta um
+    barreira = threading.Barrier(len(origens))
+
+    def transferir(origem):
+        barreira.wait()
+        banco.transferir(origem, destino, 1)
+
+    rodar_threads(transferir, [(origem,) for origem in origens])
+
+    assert destino.historico.transacoes_hoje() == 11
+    assert destino._saldo == (100 + 10) * 100
+    assert sum(conta._saldo for conta in contas) == 31 * 100 * 100
+
+
+def test_historico_should_somar_o_saldo_de_cada_conta(banco, abrir_contas, sem_limite_diario, pontos_de_troca):
+    clientes, contas = abrir_contas(10, saldo_inicial=500)
+
+    def movimentar(semente):
+        sorteio = random.Random(semente)
+        for _ in range(600):
+            conta = sorteio.choice(contas)
+            operacao = sorteio.random()
+            if operacao < 0.35:
+                banco.Deposito(sorteio.randint(1, 50)).registrar(conta)
+            elif operacao < 0.7:
+                banco.Saque(sorteio.randint(1, 50)).registrar(conta)
+            else:
+                banco.transferir(conta, sorteio.choice(contas), sorteio.randint(1, 50))
+
+    rodar_threads(movimentar, [(semente,) for semente in range(6)])
+    sorteio = random.Random(99)
+    itens = [
+        ((banco.AGENCIA, sorteio.randint(1, 10)), sorteio.choice([banco.Deposito, banco.Saque])(sorteio.randint(1, 50)))
+        for _ in range(5000)
+    ]
+    resultados = banco.aplicar_lote_concorrente(clientes, itens, trabalhadores=4, tamanho_bloco=250)
+
+    assert [r.indice for r in resultados] == list(range(len(itens)))
+    for conta in contas:
+        assert soma_historico(conta) == conta._saldo
+        assert conta._saldo >= 0
+
+
+def test_diario_should_recuperar_o_estado_apos_carga_concorrente(banco, abrir_contas, sem_limite_diario, pontos_de_troca, tmp_path):
+    clientes, _ = banco.recuperar_estado(tmp_path)
+    banco.configurar_diario(banco.Diario(tmp_path, clientes, snapshot_a_cada=700))
+    _, contas = abrir_contas(10, clientes, saldo_inicial=1000)
+
+    def transferir(semente):
+        sorteio = random.Random(semente)
+        for _ in range(500):
+            origem, destino = sorteio.sample(contas, 2)
+            banco.transferir(origem, destino, sorteio.randint(1, 300))
+
+    rodar_threads(transferir, [(semente,) for semente in range(6)])
+    banco.configurar_diario(None)
+    _, recuperadas = banco.recuperar_estado(tmp_path)
+
+    assert [conta._saldo for conta in recuperadas] == [conta._saldo for conta in contas]
+    for original, recuperada in zip(contas, recuperadas):
+        assert list(recuperada.historico.transacoes) == list(original.historico.transacoes)
@@ -0,0 +1,15 @@
+def test_listar_contas_should_manter_o_bloco_por_conta_mesmo_em_paginas(banco, abrir_contas, capsys):
+    _, contas = abrir_contas(5)
+    contas[1].cliente.nome = "Titular com um nome bem mais comprido"
+    contas[2]._saldo = -1234
+
+    banco.listar_contas(contas, tamanho_pagina=2)
+    paginado = capsys.readouterr().out
+    blocos = [
+        f"Agência: {c.agencia}\nConta: {c.numero}\nTitular: {c.cliente.nome}\nSaldo: R$ {c.saldo:.2f}"
+        for c in contas
+    ]
+    banco.mostrar_moldura_multilinha(blocos, borda='@')
+
+    assert paginado == capsys.readouterr().out
+    assert "Saldo: R$ -12.34" in paginado
@@ -0,0 +1,115 @@
+from decimal import Decimal
+
+import pytest
+
+INSTANTE = 1_700_000_000  # 14/11/2023, 19:13 em São Paulo
+DIA = 86400
+
+
+@pytest.fixture
+def relogio(banco):
+    relogio = banco.RelogioCongelado(INSTANTE)
+    banco.configurar_relogio(relogio)
+    return relogio
+
+
+@pytest.fixture(params=["Historico", "HistoricoCompacto"])
+def classe_historico(request, banco):
+    banco.configurar_historico(getattr(banco, request.param))
+
+
+def usar_o_limite(banco, conta):
+    for _ in range(banco.Historico.LIMITE_DIARIO):
+        assert banco.Deposito(100).registrar(conta)
+
+
+@pytest.mark.parametrize("usar_numpy", [True, False])
+def test_fechamento_retroativo_should_manter_o_limite_diario(banco, abrir_contas, relogio, classe_historico, usar_numpy):
+    clientes, (conta,) = abrir_contas(1)
+    usar_o_limite(banco, conta)
+
+    resumo = banco.fechamento_mensal(clientes, instante=INSTANTE - 20 * DIA, usar_numpy=usar_numpy)
+
+    assert resumo.lancamentos == 2
+    assert not banco.Deposito(1).registrar(conta)
+    assert conta.historico.transacoes_hoje() == banco.Historico.LIMITE_DIARIO
+    assert conta.historico.transacoes_hoje("Juros") == 0
+
+
+def test_fechamento_retroativo_should_lancar_na_data_dele(banco, abrir_contas, relogio, classe_historico):
+    clientes, (conta,) = abrir_contas(1)
+    usar_o_limite(banco, conta)
+    passado = INSTANTE - 20 * DIA
+
+    banco.fechamento_mensal(clientes, instante=passado)
+
+    por_dia = [(a.periodo, a.quantidade, a.soma) for a in conta.historico.consulta().agregar("dia")]
+    assert por_dia == [
+        (relogio.dia(passado), 2, Decimal("17.90")),
+        (relogio.dia(), 10, Decimal("1000.00")),
+    ]
+    retroativos = conta.historico.consulta().filtrar(inicio=relogio.dia(passado), fim=relogio.dia(passado))
+    assert [t.tipo for t in retroativos] == ["Juros", "Tarifa"]
+
+
+def test_fechamento_de_hoje_should_contar_no_dia_sem_usar_o_limite(banco, abrir_contas, relogio, classe_historico):
+    clientes, (conta,) = abrir_contas(1)
+    usar_o_limite(banco, conta)
+
+    banco.fechamento_mensal(clientes)
+
+    assert conta.historico.transacoes_hoje() == banco.Historico.LIMITE_DIARIO
+    assert conta.historico.transacoes_hoje("Juros") == 1
+
+
+def test_recuperacao_should_manter_o_limite_apos_fechamento_retroativo(banco, abrir_contas, relogio, tmp_path):
+    clientes, _ = banco.recuperar_estado(tmp_path)
+    banco.configurar_diario(banco.Diario(tmp_path, clientes))
+    _, (conta,) = abrir_contas(1, clientes)
+    usar_o_limite(banco, conta)
+    banco.fechamento_mensal(clientes, instante=INSTANTE - 20 * DIA)
+    banco.configurar_diario(None)
+
+    _, (recuperada,) = banco.recuperar_estado(tmp_path)
+
+    assert list(recuperada.historico.transacoes) == list(conta.historico.transacoes)
+    assert recuperada._saldo == conta._saldo
+    assert recuperada.historico.transacoes_hoje() == banco.Historico.LIMITE_DIARIO
+    assert not banco.Deposito(1).registrar(recuperada)
+
+
+@pytest.mark.parametrize("usar_numpy", [True, False])
+def test_cheque_especial_should_lancar_encargo_e_recuperar_do_diario(banco, relogio, tmp_path, usar_numpy):
+    clientes, _ = banco.recuperar_estado(tmp_path)
+    diario = banco.Diario(tmp_path, clientes)
+    banco.configurar_diario(diario)
+    cliente = banco.PessoaFisica("Cliente 1", "01/01/2000", f"{1:011d}", "Rua A, 1")
+    clientes.adicionar(cliente)
+    conta = banco.ContaChequeEspecial.nova_conta(cliente, 1, cheque_especial=1000)
+    cliente.adicionar_conta(conta)
+    clientes.adicionar_conta(conta)
+    assert banco.Deposito(100).registrar(conta)
+    assert banco.Saque(400).registrar(conta)
+    assert banco.Saque(500).registrar(conta)
+    assert not banco.Saque(300).registrar(conta)
+
+    resumo = banco.fechamento_mensal(clientes, usar_numpy=usar_numpy)
+
+    assert resumo.encargos == Decimal("64.00")
+    assert resumo.juros == resumo.tarifas == 0
+    assert [(t.tipo, t.valor) for t in conta.historico.transacoes][-1] == ("Encargo", Decimal("64.00"))
+    assert conta.saldo == Decimal("-864.00")
+
+    # O snapshot grava o produto; a cauda do diário vem depois dele
+    diario.gravar_snapshot()
+    assert banco.Saque(100).registrar(conta)
+    banco.configurar_diario(None)
+
+    _, (recuperada,) = banco.recuperar_estado(tmp_path)
+
+    assert type(recuperada) is banco.ContaChequeEspecial
+    assert recuperada.cheque_especial == 1000
+    assert recuperada.saldo == Decimal("-964.00")
+    assert list(recuperada.historico.transacoes) == list(conta.historico.transacoes)
+    assert not banco.Saque(100).registrar(recuperada)
+    assert banco.Saque(36).registrar(recuperada)
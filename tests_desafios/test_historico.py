@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+import pytest
+
+INSTANTE = 1_700_000_000  # 14/11/2023, 19:13 em São Paulo
+DIA = 86400
+
+
+@pytest.fixture
+def relogio(banco):
+    relogio = banco.RelogioCongelado(INSTANTE)
+    banco.configurar_relogio(relogio)
+    return relogio
+
+
+@pytest.fixture(params=["Historico", "HistoricoCompacto"])
+def conta(request, banco, abrir_contas, relogio):
+    banco.configurar_historico(getattr(banco, request.param))
+    _, (conta,) = abrir_contas(1)
+    return conta
+
+
+def test_agregar_should_contar_uma_vez_o_dia_que_volta(banco, conta, relogio):
+    banco.Deposito(10).registrar(conta)
+    relogio.avancar(DIA)
+    banco.Deposito(20).registrar(conta)
+    # Relógio atrasado: o primeiro dia volta a receber transações
+    relogio.avancar(-DIA)
+    banco.Deposito(30).registrar(conta)
+
+    por_dia = [(a.quantidade, a.soma) for a in conta.historico.consulta().agregar("dia")]
+    por_mes = [(a.quantidade, a.soma) for a in conta.historico.consulta().agregar("mes")]
+    so_depositos = [a.quantidade for a in conta.historico.consulta().filtrar(tipo="Deposito").agregar("dia")]
+
+    assert por_dia == [(2, Decimal("40.00")), (1, Decimal("20.00"))]
+    assert por_mes == [(3, Decimal("60.00"))]
+    assert so_depositos == [2, 1]
+    assert len(list(conta.historico.consulta())) == 3
+
+
+@pytest.mark.parametrize("nome, classe", [("compacto", "HistoricoCompacto"), ("Objetos", "Historico")])
+def test_main_should_escolher_o_historico_pelo_ambiente(banco, monkeypatch, tmp_path, capsys, nome, classe):
+    comandos = tmp_path / "comandos.txt"
+    comandos.write_text('NU 12345678901 "Ana" 01/01/2000 "Rua A, 1"\nNC 12345678901\nD 12345678901 50\n', encoding="utf-8")
+    monkeypatch.setenv("BANCO_XYZ_HISTORICO", nome)
+    monkeypatch.setenv("BANCO_XYZ_DADOS", str(tmp_path / "dados"))
+    monkeypatch.setattr("sys.argv", ["banco", "--comandos", str(comandos)])
+
+    banco.main()
+    _, (conta,) = banco.recuperar_estado(tmp_path / "dados")
+
+    assert type(conta.historico) is getattr(banco, classe)
+    assert conta._saldo == 5000
+
+
+def test_main_should_recusar_historico_desconhecido(banco, monkeypatch):
+    monkeypatch.setenv("BANCO_XYZ_HISTORICO", "planilha")
+    monkeypatch.setattr("sys.argv", ["banco", "--comandos", "nada.txt"])
+
+    with pytest.raises(SystemExit, match="objetos, compacto"):
+        banco.main()
+
+
+def test_linhas_extrato_should_ter_colunas_de_largura_fixa(banco, abrir_contas, relogio):
+    _, (conta, destino) = abrir_contas(2)
+    conta._saldo = conta._limite_centavos = 10**14
+    banco.Deposito(Decimal("0.05")).registrar(conta)
+    banco.Saque(Decimal("123.45")).registrar(conta)
+    banco.Transferencia(Decimal("99999999999.99"), destino).registrar(conta)
+    banco.Transferencia(1, conta).registrar(destino)
+
+    linhas = list(banco.linhas_extrato(conta))
+
+    assert len(linhas) == 4
+    assert {len(linha) for linha in linhas} == {banco.LARGURA_LINHA_EXTRATO}
+    assert linhas[0].endswith("| Deposito              | R$           0.05")
+    assert linhas[2].endswith("| TransferenciaEnviada  | R$ 99999999999.99")
+    assert linhas[3].endswith("| TransferenciaRecebida | R$           1.00")
@@ -0,0 +1,28 @@
+import random
+
+
+def test_motor_particionado_com_spawn_should_bater_com_aplicar_lote(banco, abrir_contas):
+    # Depósitos e saques sorteados entre 12 contas: há recusas por saldo, por
+    # limite de saque e pelo limite diário de transações
+    sorteio = random.Random(19)
+    clientes, contas = abrir_contas(12)
+    itens = []
+    for _ in range(300):
+        cpf = sorteio.choice(contas).cliente.cpf
+        valor = sorteio.choice((5, 50, 200, 600))
+        itens.append((cpf, banco.Deposito(valor) if sorteio.random() < 0.5 else banco.Saque(valor)))
+
+    motor = banco.MotorParticionado(2, metodo_inicio="spawn")
+    try:
+        motor.cadastrar([(c.cliente.nome, c.cliente.data_nascimento, c.cliente.cpf, c.cliente.endereco) for c in contas])
+        particionado = motor.processar(itens, tamanho_bloco=64)
+        saldos_particionado = motor.contas()
+    finally:
+        motor.fechar()
+    esperado = banco.aplicar_lote(clientes, itens)
+
+    assert [(r.indice, r.conta, r.sucesso, r.motivo) for r in particionado] == [
+        (r.indice, r.conta.cliente.cpf, r.sucesso, r.motivo) for r in esperado
+    ]
+    assert {r.motivo for r in esperado} >= {None, "Saldo insuficiente", "Valor excede limite", "Limite diário de transações atingido"}
+    assert saldos_particionado == [(c.numero, c.cliente.cpf, c._saldo) for c in contas]
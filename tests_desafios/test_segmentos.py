@@ -0,0 +1,168 @@
+import pytest
+
+INSTANTE = 1_700_000_000  # 14/11/2023, 19:13 em São Paulo
+DIA = 86400
+
+
+@pytest.fixture
+def relogio(banco):
+    relogio = banco.RelogioCongelado(INSTANTE)
+    banco.configurar_relogio(relogio)
+    return relogio
+
+
+def arquivos_de_segmento(diretorio):
+    return sorted(p.name for p in diretorio.glob("historico-*.seg"))
+
+
+def test_dias_encerrados_should_ir_para_segmentos_e_sair_ao_fechar(banco, abrir_contas, relogio, tmp_path):
+    banco.configurar_segmentos(tmp_path)
+    clientes, (conta,) = abrir_contas(1)
+    for valor in (10, 20, 30):
+        banco.Deposito(valor).registrar(conta)
+        relogio.avancar(DIA)
+    banco.Deposito(40).registrar(conta)
+
+    assert type(conta.historico) is banco.HistoricoCompacto
+    assert arquivos_de_segmento(tmp_path) == [f"historico-1-{n:06d}.seg" for n in range(3)]
+    assert [t.centavos for t in conta.historico.transacoes] == [1000, 2000, 3000, 4000]
+
+    banco.fechar_segmentos(clientes)
+
+    assert arquivos_de_segmento(tmp_path) == []
+
+
+def test_configurar_segmentos_should_descartar_os_de_uma_execucao_interrompida(banco, tmp_path):
+    (tmp_path / "historico-1-000000.seg").write_bytes(b"\0" * banco.FORMATO_SEGMENTO.size)
+    (tmp_path / "outro.txt").write_text("fica", encoding="utf-8")
+
+    banco.configurar_segmentos(tmp_path)
+
+    assert arquivos_de_segmento(tmp_path) == []
+    assert (tmp_path / "outro.txt").exists()
+
+
+def test_main_should_ligar_os_segmentos_pela_linha_de_comando(banco, abrir_contas, relogio, monkeypatch, tmp_path):
+    segmentos = tmp_path / "segmentos"
+    comandos = tmp_path / "comandos.txt"
+    comandos.write_text('NU 12345678901 "Ana" 01/01/2000 "Rua A, 1"\nNC 12345678901\nD 12345678901 50\n', encoding="utf-8")
+    dados = tmp_path / "dados"
+    # Uma execução anterior deixou um dia encerrado no diário e em segmento
+    clientes, _ = banco.recuperar_estado(dados)
+    banco.configurar_segmentos(segmentos)
+    banco.configurar_diario(banco.Diario(dados, clientes))
+    _, (conta,) = abrir_contas(1, clientes)
+    banco.Deposito(10).registrar(conta)
+    relogio.avancar(DIA)
+    banco.Deposito(20).registrar(conta)
+    banco.configurar_diario(None)
+    assert arquivos_de_segmento(segmentos)
+    banco.HistoricoCompacto.diretorio_segmentos = None
+    banco.configurar_historico(None)
+    monkeypatch.setenv("BANCO_XYZ_DADOS", str(dados))
+    monkeypatch.setattr("sys.argv", ["banco", "--comandos", str(comandos), "--segmentos", str(segmentos)])
+
+    banco.main()
+
+    assert banco.Conta.classe_historico is banco.HistoricoCompacto
+    assert banco.HistoricoCompacto.diretorio_segmentos == str(segmentos)
+    assert arquivos_de_segmento(segmentos) == []
+    _, contas = banco.recuperar_estado(dados)
+    assert [c._saldo for c in contas] == [3000, 5000]
+
+
+def lancar_dias(banco, conta, relogio, dias):
+    # Dois depósitos e um saque por dia, com valores que variam de dia a dia
+    for dia in range(dias):
+        banco.Deposito(10 + dia).registrar(conta)
+        banco.Deposito(100).registrar(conta)
+        banco.Saque(1 + dia % 3).registrar(conta)
+        relogio.avancar(DIA)
+
+
+def test_consultas_com_segmentos_should_bater_com_o_historico_em_memoria(banco, abrir_contas, relogio, tmp_path):
+    _, (em_memoria,) = abrir_contas(1)
+    banco.configurar_segmentos(tmp_path)
+    clientes, (_, segmentada) = abrir_contas(2)
+    for conta in (em_memoria, segmentada):
+        lancar_dias(banco, conta, banco.RelogioCongelado(INSTANTE), 6)
+    # Lançamento retroativo num dia que já está em segmento
+    dia = banco.RELOGIO.dia(INSTANTE + DIA)
+    for conta in (em_memoria, segmentada):
+        conta.historico._incluir_datado("Deposito", 777, INSTANTE + DIA, dia)
+
+    hoje = banco.RELOGIO.dia(INSTANTE)
+    consultas = [
+        {},
+        {"tipo": "saque"},
+        {"inicio": hoje + banco.timedelta(days=1), "fim": hoje + banco.timedelta(days=2)},
+        {"tipo": "Deposito", "inicio": hoje + banco.timedelta(days=4)},
+        {"minimo": 12, "maximo": 50},
+    ]
+    for filtros in consultas:
+        esperado = em_memoria.historico.consulta().filtrar(**filtros)
+        obtido = segmentada.historico.consulta().filtrar(**filtros)
+        assert list(obtido) == list(esperado), filtros
+        assert obtido.agregar("dia") == esperado.agregar("dia"), filtros
+        assert obtido.agregar("mes") == esperado.agregar("mes"), filtros
+    banco.fechar_segmentos(clientes)
+
+
+def test_indice_em_memoria_should_cobrir_so_a_parte_nao_descarregada(banco, abrir_contas, relogio, tmp_path):
+    banco.configurar_segmentos(tmp_path)
+    clientes, (conta,) = abrir_contas(1)
+    lancar_dias(banco, conta, relogio, 5)
+    banco.Deposito(5).registrar(conta)
+    historico = conta.historico
+
+    indice = historico._indice
+    assert indice.total == 16
+    assert {tipo: len(p) for tipo, p in indice.posicoes_tipo.items()} == {"Deposito": 1}
+    assert len(indice.dias) == 1 and len(indice.resumo_dia) == 1
+    assert [(s.inicio, s.fim, dict(s.contagem)) for s in historico._segmentos] == [
+        (banco.RELOGIO.dia(INSTANTE + n * DIA).toordinal(),) * 2 + ({"Deposito": 2, "Saque": 1},) for n in range(5)
+    ]
+    banco.fechar_segmentos(clientes)
+
+
+def test_consulta_should_nao_abrir_segmentos_descartados_pelo_indice(banco, abrir_contas, relogio, tmp_path):
+    banco.configurar_segmentos(tmp_path)
+    clientes, (conta, destino) = abrir_contas(2)
+    lancar_dias(banco, conta, relogio, 4)
+    banco.Transferencia(1, destino).registrar(conta)
+    historico = conta.historico
+    terceiro_dia = banco.RELOGIO.dia(INSTANTE + 2 * DIA)
+
+    assert len(list(historico.gerar_relatorio("TransferenciaEnviada"))) == 1
+    assert len(list(historico.gerar_relatorio(inicio=terceiro_dia, fim=terceiro_dia))) == 3
+    assert [s._mapa is not None for s in historico._segmentos] == [False, False, True, False]
+
+    # O mapeamento é reaproveitado entre leituras e fechado com o histórico
+    mapa = historico._segmentos[2]._mapa
+    assert historico.transacoes[6].centavos == 1200
+    assert historico._segmentos[2]._mapa is mapa
+    banco.fechar_segmentos(clientes)
+    assert mapa.closed
+
+
+def test_transacoes_hoje_should_ler_sem_virar_o_dia(banco, abrir_contas, relogio, tmp_path):
+    banco.configurar_segmentos(tmp_path)
+    clientes, (conta,) = abrir_contas(1)
+    historico = conta.historico
+    banco.Deposito(10).registrar(conta)
+    banco.Saque(1).registrar(conta)
+    assert (historico.transacoes_hoje(), historico.transacoes_hoje("Saque")) == (2, 1)
+    relogio.avancar(DIA)
+
+    assert (historico.transacoes_hoje(), historico.transacoes_hoje("Saque")) == (0, 0)
+    assert not historico.excedeu_limite()
+    # Nem os contadores nem a parte em memória mudam numa leitura
+    assert historico._dia_atual == banco.RELOGIO.dia(INSTANTE)
+    assert (historico._total_dia, dict(historico._contagem_dia)) == (2, {"Deposito": 1, "Saque": 1})
+    assert arquivos_de_segmento(tmp_path) == []
+
+    banco.Deposito(5).registrar(conta)
+
+    assert historico.transacoes_hoje() == 1
+    assert arquivos_de_segmento(tmp_path) == ["historico-1-000000.seg"]
+    banco.fechar_segmentos(clientes)
@@ -0,0 +1,95 @@
+import asyncio
+
+
+def conversar(banco, servico, requisicoes):
+    # Sobe o serviço numa porta efêmera e faz as requisições em ordem, numa
+    # conexão keep-alive; (metodo, caminho, dados) -> (status, resposta)
+    async def executar():
+        servidor = await asyncio.start_server(servico.atender, "127.0.0.1", 0)
+        porta = servidor.sockets[0].getsockname()[1]
+        async with servidor:
+            leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+            respostas = [await banco.requisitar(leitor, escritor, *requisicao) for requisicao in requisicoes]
+            escritor.close()
+            return respostas
+
+    return asyncio.run(executar())
+
+
+def test_servico_should_mapear_os_status_http(banco):
+    servico = banco.ServicoBanco(banco.ClienteRegistry(), [])
+    cliente = {"cpf": "12345678901", "nome": "Ana", "data_nascimento": "01/01/2000", "endereco": "Rua A, 1"}
+
+    respostas = conversar(banco, servico, [
+        ("POST", "/clientes", cliente),
+        ("POST", "/clientes", cliente),
+        ("POST", "/contas", {"cpf": "12345678901"}),
+        ("POST", "/contas", {"cpf": "99999999999"}),
+        ("POST", "/contas/1/depositos", {"valor": "10.50"}),
+        ("POST", "/contas/1/saques", {"valor": "100"}),
+        ("POST", "/contas/1/saques", {}),
+        ("POST", "/contas/1/depositos", {"valor": "abc"}),
+        ("GET", "/contas/7/extrato", None),
+        ("GET", "/contas/1/extrato?pagina=0", None),
+        ("GET", "/nada", None),
+        ("DELETE", "/contas", None),
+    ])
+
+    assert [status for status, _ in respostas] == [201, 422, 201, 404, 200, 422, 400, 400, 404, 400, 404, 405]
+    assert respostas[4][1]["saldo"] == "10.50"
+    assert respostas[6][1]["mensagem"] == "Campo obrigatório ausente: valor"
+
+
+def test_servico_should_recusar_corpo_grande_demais_com_413(banco):
+    servico = banco.ServicoBanco(banco.ClienteRegistry(), [])
+
+    ((status, resposta),) = conversar(banco, servico, [
+        ("POST", "/clientes", {"nome": "x" * banco.TAMANHO_MAXIMO_CORPO}),
+    ])
+
+    assert status == 413
+    assert not resposta["sucesso"]
+
+
+def test_get_contas_should_validar_cursor_e_tamanho(banco, abrir_contas):
+    clientes, contas = abrir_contas(3)
+    servico = banco.ServicoBanco(clientes, contas)
+
+    respostas = conversar(banco, servico, [
+        ("GET", "/contas?cursor=-1", None),
+        ("GET", "/contas?cursor=abc", None),
+        ("GET", "/contas?tamanho=0", None),
+        ("GET", "/contas?tamanho=1.5", None),
+        ("GET", "/contas?ordenar=idade", None),
+        ("GET", "/contas?cursor=1&tamanho=1", None),
+        ("GET", "/contas?cursor=2&tamanho=5", None),
+    ])
+
+    assert [status for status, _ in respostas] == [400, 400, 400, 400, 400, 200, 200]
+    assert [c["numero"] for c in respostas[5][1]["contas"]] == [2]
+    assert respostas[5][1]["proximo"] == 2
+    assert respostas[6][1]["proximo"] is None
+
+
+def test_get_contas_should_reaproveitar_a_ordenacao_ate_abrir_uma_conta(banco, abrir_contas):
+    clientes, contas = abrir_contas(2)
+    contas[0].cliente.nome = "Zeca"
+    servico = banco.ServicoBanco(clientes, contas)
+
+    antes = conversar(banco, servico, [("GET", "/contas?ordenar=titular", None)])
+    visao = servico._ordenadas["titular"][1]
+    conversar(banco, servico, [("GET", "/contas?ordenar=titular", None)])
+    assert servico._ordenadas["titular"][1] is visao
+    cliente = {"cpf": "00000000009", "nome": "Ana", "data_nascimento": "01/01/2000", "endereco": "Rua A, 1"}
+    depois = conversar(banco, servico, [
+        ("POST", "/clientes", cliente),
+        ("POST", "/contas", {"cpf": "00000000009"}),
+        ("GET", "/contas?ordenar=titular", None),
+        ("GET", "/contas?ordenar=saldo", None),
+    ])
+
+    assert [c["titular"] for c in antes[0][1]["contas"]] == ["Cliente 2", "Zeca"]
+    assert [c["titular"] for c in depois[2][1]["contas"]] == ["Ana", "Cliente 2", "Zeca"]
+    assert servico._ordenadas["titular"][1] is not visao
+    # A ordenação por saldo muda a cada lançamento e não é guardada
+    assert "saldo" not in servico._ordenadas
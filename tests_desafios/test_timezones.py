@@ -0,0 +1,33 @@
+V4 = "desafios-04-05-decorador-iterador-gerador-datas-timezones.py"
+
+
+def carregar_com_ambiente(carregar, monkeypatch, **ambiente):
+    # DIRETORIO_CACHE_TIMEZONES é lido do ambiente na carga do módulo
+    for nome, valor in ambiente.items():
+        if valor is None:
+            monkeypatch.delenv(nome, raising=False)
+        else:
+            monkeypatch.setenv(nome, valor)
+    return carregar(V4)
+
+
+def test_mapa_de_timezones_should_nao_tocar_o_disco_por_padrao(carregar, monkeypatch, tmp_path):
+    banco = carregar_com_ambiente(carregar, monkeypatch, BANCO_XYZ_CACHE_TZ=None, HOME=str(tmp_path))
+
+    mapa = banco.obter_mapa_timezones()
+
+    assert banco.DIRETORIO_CACHE_TIMEZONES is None
+    assert any(regiao == "America" for regiao, _ in mapa.values())
+    assert list(tmp_path.rglob("*")) == []
+
+
+def test_mapa_de_timezones_should_usar_o_cache_de_BANCO_XYZ_CACHE_TZ(carregar, monkeypatch, tmp_path):
+    banco = carregar_com_ambiente(carregar, monkeypatch, BANCO_XYZ_CACHE_TZ=str(tmp_path / "tz"))
+    mapa = banco.obter_mapa_timezones()
+    (arquivo,) = (tmp_path / "tz").glob("timezones-*.json")
+
+    # Uma nova carga lê o mapa do arquivo, sem reconstruí-lo
+    banco = carregar_com_ambiente(carregar, monkeypatch, BANCO_XYZ_CACHE_TZ=str(tmp_path / "tz"))
+    monkeypatch.setattr(banco, "construir_mapa_timezones", None)
+
+    assert banco.obter_mapa_timezones() == mapa
@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+import pytest
+
+VERSOES = [
+    "desafio-01.py",
+    "desafio-02-Estrutura-de-dados.py",
+    "desafio-03-POO.py",
+    "desafios-04-05-decorador-iterador-gerador-datas-timezones.py",
+]
+
+
+@pytest.fixture(params=VERSOES)
+def versao(request, carregar):
+    return carregar(request.param)
+
+
+def test_dez_depositos_de_dez_centavos_should_somar_um_real(versao):
+    centavos = sum(versao.para_centavos("0.10") for _ in range(10))
+
+    assert centavos == 100
+    assert versao.para_reais(centavos) == Decimal("1.00")
+    assert f"{versao.para_reais(centavos):.2f}" == "1.00"
+
+
+@pytest.mark.parametrize("texto, centavos", [
+    ("0.005", 1),
+    ("0.004", 0),
+    ("0.015", 2),
+    ("2.675", 268),
+    ("1.005", 101),
+    ("-0.005", -1),
+    ("10", 1000),
+])
+def test_para_centavos_should_arredondar_metade_para_cima(versao, texto, centavos):
+    assert versao.para_centavos(texto) == centavos
+
+
+@pytest.mark.parametrize("texto", ["1e30", "abc", "NaN", "Infinity"])
+def test_para_centavos_should_recusar_valores_invalidos(versao, texto):
+    with pytest.raises(ValueError):
+        versao.para_centavos(texto)
+
+
+def test_para_reais_should_voltar_aos_centavos(versao):
+    for centavos in (0, 1, 99, 100, 123456789, -5012):
+        assert versao.para_centavos(str(versao.para_reais(centavos))) == centavos